@@ -0,0 +1,128 @@
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from telemetry import trace_headers
+from codec import accept_header
+
+# Only "agent unavailable" is worth retrying. Agents answer 502/504 when
+# their own upstream (aviationstack, Gemini) failed or timed out; retrying
+# those repeats the slow call and spends its quota again.
+RETRYABLE_STATUS_CODES = {503}
+
+
+class PoolExhausted(requests.exceptions.RequestException):
+    """Raised when no pooled connection frees up within `pool_timeout`."""
+
+
+class AgentClient:
+    """
+    Keep-alive HTTP client for one downstream agent.
+
+    Each client owns a requests.Session with its own bounded connection pool,
+    so a slow agent can only tie up its own connections. Every call has a
+    connect and read timeout. Idempotent calls are retried on connection
+    errors (including connect timeouts) and 503 with full-jitter exponential
+    backoff; read timeouts are not retried, as the agent may still be working.
+    Calls ask for MessagePack (when installed) and gzip; decode responses
+    with codec.decode.
+    """
+    def __init__(self, name, url, pool_size=10, connect_timeout=3.05, read_timeout=30,
+                 max_retries=2, backoff_base=0.2, backoff_cap=2.0, pool_timeout=10):
+        self.name = name
+        self.url = url
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.pool_timeout = pool_timeout
+
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+
+        # The semaphore mirrors the connection pool so we can see how long
+        # callers queue for a connection and how many are checked out.
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._lock = threading.Lock()
+        self._stats = {
+            "in_use": 0,
+            "requests": 0,
+            "retries": 0,
+            "errors": 0,
+            "wait_time_total_ms": 0.0,
+            "wait_time_max_ms": 0.0,
+        }
+
+    def post(self, payload, idempotent=False, **kwargs):
+        """POST `payload` as JSON and return the requests.Response."""
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            try:
+                response = self._send(payload, **kwargs)
+            except requests.exceptions.ConnectionError:
+                if last_attempt:
+                    self._count("errors")
+                    raise
+            except requests.exceptions.Timeout:
+                self._count("errors")
+                raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES or last_attempt:
+                    return response
+            self._count("retries")
+            time.sleep(random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt))))
+
+    def _send(self, payload, **kwargs):
+        waited = time.perf_counter()
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            self._count("errors")
+            raise PoolExhausted(f"No free connection to the {self.name} agent after {self.pool_timeout}s")
+        wait_ms = (time.perf_counter() - waited) * 1000
+        with self._lock:
+            self._stats["in_use"] += 1
+            self._stats["requests"] += 1
+            self._stats["wait_time_total_ms"] += wait_ms
+            self._stats["wait_time_max_ms"] = max(self._stats["wait_time_max_ms"], wait_ms)
+        try:
+            kwargs.setdefault("timeout", self.timeout)
+            kwargs["headers"] = {"Accept": accept_header(), **trace_headers(), **kwargs.get("headers", {})}
+            return self.session.post(self.url, json=payload, **kwargs)
+        finally:
+            with self._lock:
+                self._stats["in_use"] -= 1
+            self._slots.release()
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _idle_connections(self):
+        # urllib3 keeps returned connections in a LIFO queue padded with None.
+        idle = 0
+        try:
+            pools = self._adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+        except AttributeError:
+            pass
+        return idle
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["pool_size"] = self.pool_size
+        stats["idle"] = self._idle_connections()
+        stats["wait_time_avg_ms"] = round(stats["wait_time_total_ms"] / stats["requests"], 3) if stats["requests"] else 0.0
+        stats["wait_time_total_ms"] = round(stats["wait_time_total_ms"], 3)
+        stats["wait_time_max_ms"] = round(stats["wait_time_max_ms"], 3)
+        return stats
+
+    def close(self):
+        self.session.close()
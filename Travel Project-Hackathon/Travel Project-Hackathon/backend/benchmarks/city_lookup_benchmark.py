@@ -0,0 +1,82 @@
+"""
+City resolution and autocomplete time as the number of cities grows.
+
+Builds city_lookup.CityLookup over the 50 catalog cities plus made-up city
+names, then times exact lookups of messy input ("  new YORK ", "NYC") and
+prefix suggestions. Both are compared with a scan that normalizes and
+checks every city name per request. Index build time is reported separately.
+
+    python benchmarks/city_lookup_benchmark.py --sizes 50 500 5000 20000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from city_lookup import CITY_ALIASES, CityLookup, normalize
+from hotel_catalog import CITY_CENTERS
+
+SYLLABLES = ["ka", "ro", "mi", "lan", "ber", "to", "vil", "sa", "ford", "ton", "ash", "den", "mor", "el", "ly"]
+
+
+def make_cities(n, seed=7):
+    rng = random.Random(seed)
+    cities = dict.fromkeys(CITY_CENTERS, 200)
+    while len(cities) < n:
+        words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+                 for _ in range(rng.randint(1, 2))]
+        cities[" ".join(words)] = rng.randint(10, 500)
+    return cities
+
+
+def scan_resolve(cities, text):
+    key = normalize(text)
+    for city, aliases in [(city, [city] + CITY_ALIASES.get(city, [])) for city in cities]:
+        if any(normalize(alias) == key for alias in aliases):
+            return city
+    return None
+
+
+def scan_suggest(cities, prefix, limit):
+    key = normalize(prefix)
+    matches = [city for city in cities if normalize(city).startswith(key)]
+    return sorted(matches, key=lambda city: (-cities[city], city))[:limit]
+
+
+def median_us(func, inputs):
+    samples = []
+    for value in inputs:
+        started = time.perf_counter()
+        func(value)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000, 20000])
+    parser.add_argument("--limit", type=int, default=8)
+    args = parser.parse_args()
+
+    typed = ["  new YORK ", "NYC", "Los Angeles ", "washington d.c.", "Chicago, IL", "nowhere"]
+    prefixes = ["n", "ne", "new y", "san f", "la", "ka", "mor"]
+    print(f"{'cities':>8}  {'request':<18}{'scan us':>12}{'index us':>12}")
+    for n in args.sizes:
+        cities = make_cities(n)
+        started = time.perf_counter()
+        lookup = CityLookup(cities)
+        print(f"{n:>8}  {'(index build)':<18}{'':>12}{(time.perf_counter() - started) * 1e6:>12.0f}")
+        for text in typed:
+            assert lookup.resolve(text) == (scan_resolve(cities, text) or scan_resolve(cities, text.split(",")[0])), text
+        print(f"{n:>8}  {'resolve':<18}{median_us(lambda text: scan_resolve(cities, text), typed):>12.1f}"
+              f"{median_us(lookup.resolve, typed):>12.1f}")
+        print(f"{n:>8}  {'suggest':<18}{median_us(lambda prefix: scan_suggest(cities, prefix, args.limit), prefixes):>12.1f}"
+              f"{median_us(lambda prefix: lookup.suggest(prefix, args.limit), prefixes):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Bytes on the wire and serialize time for agent responses.
+
+Builds a /flights/search body (from benchmarks/stubs.py records) and a
+/hotels body (one city of catalog hotels), with and without the controller's
+field projection, and encodes each the way the agents can: Flask's jsonify,
+JSON through codec (orjson when installed) and MessagePack, each with and
+without gzip.
+
+    python benchmarks/encoding_benchmark.py --flights 500 --hotels 200
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+
+import codec
+from flight_batch import FlightBatch
+from hotel_catalog import generate_hotels
+from stubs import make_flights
+
+app = Flask(__name__)
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def flight_body(n):
+    flights = FlightBatch(make_flights("JFK", "LAX", n)).select("", datetime.now() + timedelta(days=30))
+    return {"status": "success", "source": "aviationstack", "count": len(flights), "pages_fetched": 1,
+            "flights": flights}
+
+
+def hotel_body(n):
+    hotels = generate_hotels(num_hotels_per_city=n)["Chicago"]
+    return {"hotels": [{**hotel, "checkin_date": "2025-06-01", "checkout_date": "2025-06-04", "num_of_rooms": 2}
+                       for hotel in hotels]}
+
+
+def encodings():
+    def with_jsonify(body):
+        with app.app_context():
+            return jsonify(body).get_data()
+
+    yield "jsonify", with_jsonify
+    yield "orjson" if codec.orjson else "json (compact)", codec.dumps_json
+    if codec.msgpack is not None:
+        yield "msgpack", lambda body: codec.encode(body, accept=codec.MSGPACK)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flights", type=int, default=500)
+    parser.add_argument("--hotels", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    from controller_agent import FLIGHT_RESULT_FIELDS, HOTEL_RESULT_FIELDS
+    flights, hotels = flight_body(args.flights), hotel_body(args.hotels)
+    cases = [
+        ("flights", flights),
+        ("flights + fields", codec.project_collection(flights, "flights", FLIGHT_RESULT_FIELDS)),
+        ("hotels", hotels),
+        ("hotels + fields", codec.project_collection(hotels, "hotels", HOTEL_RESULT_FIELDS)),
+    ]
+    if codec.msgpack is None:
+        print("msgpack is not installed; skipping MessagePack.")
+
+    print(f"{'body':<18}{'encoding':<16}{'bytes':>10}{'gzip bytes':>12}{'encode ms':>11}{'+gzip ms':>10}")
+    for label, body in cases:
+        for name, encode in encodings():
+            payload, encode_ms = timed(lambda: encode(body), args.repeat)
+            compressed, gzip_ms = timed(lambda: gzip.compress(payload, compresslevel=codec.GZIP_LEVEL), args.repeat)
+            print(f"{label:<18}{name:<16}{len(payload):>10}{len(compressed):>12}{encode_ms:>11.2f}{gzip_ms:>10.2f}")
+
+    # Check that every encoding round-trips to the same body.
+    for label, body in cases:
+        expected = json.loads(json.dumps(body))
+        assert codec.loads_json(codec.dumps_json(body)) == expected, label
+        if codec.msgpack is not None:
+            assert codec.decode(codec.encode(body, accept=codec.MSGPACK)[0], codec.MSGPACK) == expected, label
+
+
+if __name__ == "__main__":
+    main()
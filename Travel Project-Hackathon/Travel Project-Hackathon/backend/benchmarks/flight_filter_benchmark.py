@@ -0,0 +1,119 @@
+"""
+Row-by-row versus columnar (FlightBatch) filtering of aviationstack records.
+
+Generates aviationstack-shaped records with benchmarks/stubs.py, checks that
+both paths return the same flights, and times filtering plus each sort order.
+
+    python benchmarks/flight_filter_benchmark.py --records 10000 50000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flight_batch import FlightBatch, SORT_KEYS
+from stubs import make_flights
+
+
+def row_filter(flights_data, preferred_airline, until_date):
+    """The per-record loop unsorted /flights/search uses (flight_agent.filter_flight)."""
+    results = []
+    for flight in flights_data:
+        flight_status = (flight.get("flight_status") or "").lower()
+        if flight_status == "landed":
+            continue
+        airline_info = flight.get("airline") or {}
+        airline_name = (airline_info.get("name") or "").lower()
+        if preferred_airline and preferred_airline not in airline_name:
+            continue
+        dep_info = flight.get("departure") or {}
+        arr_info = flight.get("arrival") or {}
+        dep_time = dep_info.get("scheduled")
+        arr_time = arr_info.get("scheduled")
+        if dep_time:
+            try:
+                dep_dt = datetime.fromisoformat(dep_time.replace("Z", "+00:00"))
+                if dep_dt.date() > until_date.date():
+                    continue
+            except Exception:
+                continue
+        duration = None
+        if dep_time and arr_time:
+            try:
+                arr_dt = datetime.fromisoformat(arr_time.replace("Z", "+00:00"))
+                duration_min = int((arr_dt - dep_dt).total_seconds() / 60)
+                duration = f"{duration_min // 60}h {duration_min % 60}m"
+            except Exception:
+                pass
+        results.append({
+            "flight_number": flight.get("flight", {}).get("iata", ""),
+            "airline": airline_info.get("name", ""),
+            "departure": {"airport": dep_info.get("iata", ""), "time": dep_time,
+                          "terminal": dep_info.get("terminal", ""), "gate": dep_info.get("gate", "")},
+            "arrival": {"airport": arr_info.get("iata", ""), "time": arr_time,
+                        "terminal": arr_info.get("terminal", ""), "gate": arr_info.get("gate", "")},
+            "duration": duration,
+            "status": flight_status,
+            "aircraft": (flight.get("aircraft") or {}).get("iata", "")
+        })
+    return results
+
+
+def row_sort_key(sort):
+    def parse(value):
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc)
+    if sort == "duration":
+        return lambda f: int(f["duration"].split("h")[0]) * 60 + int(f["duration"].split()[1][:-1])
+    return lambda f: parse(f[sort]["time"])
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def make_records(n):
+    records = make_flights("JFK", "LAX", n)
+    # Mix in the offsets aviationstack sends for non-UTC airports.
+    for i, record in enumerate(records[::7]):
+        for side in ("departure", "arrival"):
+            dt = datetime.fromisoformat(record[side]["scheduled"]).astimezone(timezone(timedelta(hours=-7 + i % 3)))
+            record[side]["scheduled"] = dt.isoformat()
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--airline", default="delta")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    until_date = datetime.now() + timedelta(days=7)
+    print(f"{'records':>8}  {'case':<22}{'row ms':>10}{'columnar ms':>13}{'speedup':>9}  same")
+    for n in args.records:
+        records = make_records(n)
+        for airline in ("", args.airline):
+            expected, row_ms = timed(lambda: row_filter(records, airline, until_date), args.repeat)
+            got, col_ms = timed(lambda: FlightBatch(records).select(airline, until_date), args.repeat)
+            label = f"filter{' + airline' if airline else ''}"
+            print(f"{n:>8}  {label:<22}{row_ms:>10.1f}{col_ms:>13.1f}{row_ms / col_ms:>8.1f}x  {got == expected}")
+        for sort in SORT_KEYS:
+            key = row_sort_key(sort)
+            expected, row_ms = timed(lambda: sorted(row_filter(records, "", until_date), key=key)[:50], args.repeat)
+            got, col_ms = timed(lambda: FlightBatch(records).select("", until_date, sort, 50), args.repeat)
+            same = [key(f) for f in got] == [key(f) for f in expected]
+            print(f"{n:>8}  {'top 50 by ' + sort:<22}{row_ms:>10.1f}{col_ms:>13.1f}{row_ms / col_ms:>8.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
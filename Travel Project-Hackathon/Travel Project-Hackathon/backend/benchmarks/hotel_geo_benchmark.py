@@ -0,0 +1,113 @@
+"""
+Per-query time of /hotels `near` searches as the hotel catalog grows.
+
+Builds a catalog of the given size with hotel_catalog (spread evenly over its
+50 cities), memory-maps it, and indexes the coordinates with
+geo_index.GridIndex. Each query is centred near a random city centre (about
+where an airport would be). Radius and k-nearest searches, with and without
+a city and budget filter, are compared with a scan that computes the
+haversine distance to every hotel. Every indexed result is checked against
+the scan.
+
+    python benchmarks/hotel_geo_benchmark.py --sizes 10000 100000 250000 --queries 200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hotel_catalog
+from geo_index import GridIndex, haversine_km
+
+
+def build(n, path):
+    per_city = max(1, n // len(hotel_catalog.CITY_CENTERS))
+    hotel_catalog.save(hotel_catalog.to_records(hotel_catalog.generate_hotels(per_city, curated_path=None)), path)
+    return hotel_catalog.HotelCatalog(np.load(path, mmap_mode="r"))
+
+
+def scan(catalog, lat, lng, radius_km=None, k=None, accept=None):
+    """Distance to every hotel, then filter and sort: what a query costs without the index."""
+    distance = haversine_km(lat, lng, catalog.rows["lat"], catalog.rows["lng"])
+    rows = np.arange(len(distance))
+    keep = ~np.isnan(distance)
+    if accept is not None:
+        keep &= accept(rows)
+    if radius_km is not None:
+        keep &= distance <= radius_km
+    rows, distance = rows[keep], distance[keep]
+    order = np.lexsort((rows, distance))[:k]
+    return rows[order]
+
+
+def median_ms(func, queries):
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        func(*query)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 250000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--cell-degrees", type=float, default=0.01)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    centers = list(hotel_catalog.CITY_CENTERS.items())
+    queries = []
+    for _ in range(args.queries):
+        city, (lat, lng) = rng.choice(centers)
+        queries.append((city, lat + rng.uniform(-0.1, 0.1), lng + rng.uniform(-0.1, 0.1)))
+
+    print(f"{'hotels':>8}  {'query':<34}{'scan ms':>10}{'index ms':>10}{'page ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            catalog = build(n, os.path.join(tmp, f"catalog_{n}.npy"))
+            started = time.perf_counter()
+            geo = GridIndex(catalog.rows["lat"], catalog.rows["lng"], cell_degrees=args.cell_degrees)
+            print(f"{len(catalog.rows):>8}  {'(index build)':<34}{'':>10}{(time.perf_counter() - started) * 1000:>10.3f}")
+
+            cases = [
+                ("radius 1 km", dict(radius_km=1.0)),
+                (f"radius 5 km, first {args.limit}", dict(radius_km=5.0, k=args.limit)),
+                (f"nearest {args.limit}", dict(k=args.limit)),
+                (f"nearest {args.limit} in city", dict(k=args.limit, city=True)),
+                (f"nearest {args.limit}, <= $150, >= 4.5", dict(k=args.limit, filters=dict(max_price=150, min_rating=4.5))),
+                ("nearest 200 in city", dict(k=200, city=True)),
+            ]
+            for label, case in cases:
+                radius_km, k = case.get("radius_km"), case.get("k")
+
+                def accept(city):
+                    return catalog.matcher(city if case.get("city") else None, **case.get("filters", {}))
+
+                def indexed(city, lat, lng):
+                    return geo.search(lat, lng, radius_km, k, accept(city))[0]
+
+                def page(city, lat, lng):
+                    rows, distances, _ = geo.search(lat, lng, radius_km, k, accept(city))
+                    return [{**hotel, "distance_km": round(float(distance), 3)}
+                            for hotel, distance in zip(catalog.hotels(rows), distances)]
+
+                for city, lat, lng in queries:
+                    assert np.array_equal(indexed(city, lat, lng), scan(catalog, lat, lng, radius_km, k, accept(city))), label
+                scan_ms = median_ms(lambda city, lat, lng: scan(catalog, lat, lng, radius_km, k, accept(city)), queries)
+                print(f"{len(catalog.rows):>8}  {label:<34}{scan_ms:>10.3f}"
+                      f"{median_ms(indexed, queries):>10.3f}{median_ms(page, queries):>10.3f}")
+            del catalog
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Per-request CPU time and response size of /hotels as a city's catalog grows.
+
+Compares the old behaviour (copy and return every hotel in the city) with
+pages from hotel_index.CityIndex: the first page in catalog order, the top
+page by rating and by price, a later page by price, and budget/rating
+filters, which are also timed with a per-request scan that parses every
+price_range string. Index build time is reported separately.
+
+    python benchmarks/hotel_page_benchmark.py --sizes 200 2000 10000 50000 --limit 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import codec
+from hotel_index import CityIndex, parse_price_range
+
+STAY = {"checkin_date": "2025-06-01", "checkout_date": "2025-06-04", "num_of_rooms": 2}
+
+
+def make_city(n, seed=7):
+    """Hotels shaped like hotel_catalog.generate_hotels produces, for one city."""
+    rng = random.Random(seed)
+    hotels = []
+    for _ in range(n):
+        base_price = rng.randint(50, 500)
+        hotels.append({
+            "name": f"{rng.choice(['Grand', 'Comfort', 'Elite', 'Royal'])} {rng.choice(['Hotel', 'Inn', 'Suites'])} {rng.randint(1, 100)}",
+            "rating": round(rng.uniform(3.0, 5.0), 1),
+            "address": f"{rng.randint(100, 9999)} {rng.choice(['Main', 'Oak', 'Pine'])} St, Chicago",
+            "price_range": f"${base_price - rng.randint(0, 40)} - ${base_price + rng.randint(50, 150)}",
+        })
+    return hotels
+
+
+def copy_all(hotels):
+    """The loop /hotels used before pagination."""
+    results = []
+    for hotel in hotels:
+        hotel_copy = hotel.copy()
+        hotel_copy.update(STAY)
+        results.append(hotel_copy)
+    return {"hotels": results}
+
+
+def one_page(index, limit, offset=0, sort=None, **filters):
+    page, total = index.page(offset, limit, sort, **filters)
+    return {"hotels": [{**hotel, **STAY} for hotel in page], "total": total}
+
+
+def scan_filter(hotels, limit, max_price, min_rating):
+    """Budget and rating filter by parsing price_range on every request."""
+    matches = [hotel for hotel in hotels
+               if parse_price_range(hotel["price_range"])[0] <= max_price and hotel["rating"] >= min_rating]
+    return {"hotels": [{**hotel, **STAY} for hotel in matches[:limit]], "total": len(matches)}
+
+
+def cpu_ms(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.process_time()
+        result = func()
+        samples.append((time.process_time() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 2000, 10000, 50000])
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    print(f"{'hotels':>8}  {'request':<30}{'cpu ms':>10}{'bytes':>12}")
+    for n in args.sizes:
+        hotels = make_city(n)
+        index, build_ms = cpu_ms(lambda: CityIndex(hotels), 1)
+        print(f"{n:>8}  {'(index build)':<30}{build_ms:>10.3f}")
+        cases = [
+            ("all (before)", lambda: copy_all(hotels)),
+            (f"first {args.limit}", lambda: one_page(index, args.limit)),
+            (f"top {args.limit} by rating", lambda: one_page(index, args.limit, sort="rating")),
+            (f"top {args.limit} by price", lambda: one_page(index, args.limit, sort="price")),
+            ("page 5 by price", lambda: one_page(index, args.limit, 4 * args.limit, "price")),
+            ("max_price 100 (scan)", lambda: scan_filter(hotels, args.limit, 100, 0)),
+            ("max_price 100", lambda: one_page(index, args.limit, max_price=100)),
+            ("price<=150, rating>=4.8 (scan)", lambda: scan_filter(hotels, args.limit, 150, 4.8)),
+            ("price<=150, rating>=4.8", lambda: one_page(index, args.limit, max_price=150, min_rating=4.8)),
+        ]
+        for label, func in cases:
+            body, ms = cpu_ms(lambda: codec.dumps_json(func()), args.repeat)
+            print(f"{n:>8}  {label:<30}{ms:>10.3f}{len(body):>12}")
+
+
+if __name__ == "__main__":
+    main()
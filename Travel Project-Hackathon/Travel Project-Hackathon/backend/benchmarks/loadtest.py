@@ -0,0 +1,297 @@
+"""
+End-to-end load test for /travel/plan.
+
+Starts local stand-ins for aviationstack and Gemini (benchmarks/stubs.py),
+launches the hotel, flight, cab and controller services against them,
+drives /travel/plan at a target concurrency with payloads shaped like
+frontend/replan_data.json, and reports latency percentiles, throughput and
+the per-stage breakdown returned by the controller.
+
+    python benchmarks/loadtest.py --requests 500 --concurrency 16 \\
+        --stub-latency-ms 150 --stub-error-rate 0.01 --json report.json
+
+With --offline the flight agent answers from a local flight store seeded
+with the same stub flights (FLIGHT_AGENT_OFFLINE=1), so the flight stage
+makes no network calls and runs are repeatable.
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flight_store import FlightStore
+from stubs import StubConfig, make_flights, start_stub_server
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPLAN_DATA = os.path.join(os.path.dirname(BACKEND_DIR), "frontend", "replan_data.json")
+
+# Airports the controller can map to a cab pickup location
+# (controller_agent.IATA_TO_FULL_AIRPORT_NAME / cab_agent.MOCK_LOCATIONS).
+AIRPORTS = ["HYD", "DEL", "LAX", "LAS", "BOS", "SFO", "JFK", "LGA", "ABE", "ABQ", "ACY"]
+CITIES = ["New York", "Los Angeles", "Chicago", "Boston", "San Francisco", "Las Vegas", "Seattle", "Miami"]
+AIRLINES = ["", "", "american airlines", "delta", "united airlines", "jetblue"]
+RIDE_TYPES = ["uberX", "uberXL", "uberBlack", "uberComfort"]
+STAGES = ["flight", "hotel", "optimize", "cab"]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def load_templates():
+    """Plan requests from replan_data.json that use the current nested shape."""
+    with open(REPLAN_DATA) as f:
+        entries = json.load(f)
+    templates = [e for e in entries if isinstance(e, dict) and "userdetails" in e and "cabdetails" in e]
+    if not templates:
+        raise SystemExit(f"No plan-shaped entries in {REPLAN_DATA}")
+    return templates
+
+
+def make_payloads(n, seed):
+    rng = random.Random(seed)
+    templates = load_templates()
+    today = date.today()
+    payloads = []
+    for i in range(n):
+        plan = copy.deepcopy(rng.choice(templates))
+        source, destination = rng.sample(AIRPORTS, 2)
+        checkin = today + timedelta(days=rng.randint(1, 14))
+        plan["userdetails"]["email"] = f"loadtest{i % 50}@example.com"
+        plan["flightdetails"].update({
+            "source": source,
+            "destination": destination,
+            "until_date": (today + timedelta(days=30)).isoformat(),
+            "airline": rng.choice(AIRLINES),
+        })
+        plan["hoteldetails"].update({
+            "cityname": rng.choice(CITIES),
+            "num_of_rooms": rng.randint(1, 3),
+            "checkin_date": checkin.isoformat(),
+            "checkout_date": (checkin + timedelta(days=rng.randint(1, 5))).isoformat(),
+        })
+        plan["cabdetails"].update({
+            "num_passengers": rng.randint(1, 5),
+            "ride_type": rng.choice(RIDE_TYPES),
+        })
+        payloads.append(plan)
+    return payloads
+
+
+class Services:
+    """Run the four Flask services as subprocesses for the duration of a test."""
+    def __init__(self, base_port, stub_url, workdir, offline=False, aviationstack_rate=1000.0):
+        self.ports = {"hotel": base_port, "flight": base_port + 1, "cab": base_port + 2, "controller": base_port + 4}
+        self.modules = {"hotel": "hotel_agent", "flight": "flight_agent", "cab": "cab_agent", "controller": "controller_agent"}
+        self.workdir = workdir
+        self.env = dict(
+            os.environ,
+            AVIATIONSTACK_BASE_URL=f"{stub_url}/v1",
+            GEMINI_STUB_URL=f"{stub_url}/gemini",
+            FLIGHT_AGENT_URL=f"http://127.0.0.1:{self.ports['flight']}/flights/search",
+            HOTEL_AGENT_URL=f"http://127.0.0.1:{self.ports['hotel']}/hotels",
+            CAB_AGENT_URL=f"http://127.0.0.1:{self.ports['cab']}/cabs/book",
+            ITINERARY_DB_PATH=os.path.join(workdir, "itineraries.db"),
+            FLIGHT_STORE_PATH=os.path.join(workdir, "flights.db"),
+            FLIGHT_AGENT_OFFLINE="1" if offline else "0",
+            # The stub has no quota; only throttle when asked to.
+            AVIATIONSTACK_QUOTA_PATH=os.path.join(workdir, "aviationstack_quota.db"),
+            AVIATIONSTACK_RATE_PER_SECOND=str(aviationstack_rate),
+            AVIATIONSTACK_BURST=str(max(10, int(aviationstack_rate))),
+            AGENT_TRANSPORT="http",
+        )
+        self.processes = []
+
+    def url(self, service, path):
+        return f"http://127.0.0.1:{self.ports[service]}{path}"
+
+    def start(self, timeout=120):
+        for service, module in self.modules.items():
+            log = open(os.path.join(self.workdir, f"{service}.log"), "w")
+            cmd = [sys.executable, "-m", "flask", "--app", module, "run",
+                   "--host", "127.0.0.1", "--port", str(self.ports[service]), "--no-reload", "--with-threads"]
+            self.processes.append(subprocess.Popen(cmd, cwd=BACKEND_DIR, env=self.env, stdout=log, stderr=subprocess.STDOUT))
+        deadline = time.time() + timeout
+        # The first /ready probe starts each service's warm-up; wait until the
+        # lazily built datasets are loaded so no measured request pays for them.
+        for service in self.modules:
+            while True:
+                try:
+                    if requests.get(self.url(service, "/ready"), timeout=1).status_code == 200:
+                        break
+                except requests.exceptions.RequestException:
+                    pass
+                if time.time() > deadline:
+                    self.stop()
+                    raise SystemExit(f"{service} did not start; see logs in {self.workdir}")
+                time.sleep(0.25)
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def seed_flight_store(path, flights_per_route):
+    """Record the stub's flights for every airport pair, as live runs would have."""
+    store = FlightStore(path)
+    for source in AIRPORTS:
+        for destination in AIRPORTS:
+            if source != destination:
+                store.record(make_flights(source, destination, flights_per_route))
+    return store.stats()
+
+
+def drive(url, payloads, concurrency):
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=concurrency))
+    samples = []
+    lock = threading.Lock()
+
+    def one(payload):
+        started = time.perf_counter()
+        try:
+            response = session.post(url, json=payload, timeout=180)
+            status = response.status_code
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+        except requests.exceptions.RequestException as e:
+            status, body = "connection_error", {"error": str(e)}
+        sample = {"latency_ms": (time.perf_counter() - started) * 1000, "status": status,
+                  "timings": body.get("timings") or {}}
+        with lock:
+            samples.append(sample)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, payloads))
+    return samples, time.perf_counter() - started
+
+
+def summarize(values):
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 2),
+        "p50_ms": round(percentile(values, 50), 2),
+        "p95_ms": round(percentile(values, 95), 2),
+        "p99_ms": round(percentile(values, 99), 2),
+        "max_ms": round(values[-1], 2),
+    }
+
+
+def build_report(samples, wall_seconds, args):
+    statuses = {}
+    for sample in samples:
+        statuses[str(sample["status"])] = statuses.get(str(sample["status"]), 0) + 1
+    ok = [s for s in samples if s["status"] == 200]
+    return {
+        "config": vars(args),
+        "requests": len(samples),
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(len(samples) / wall_seconds, 2) if wall_seconds else None,
+        "success_rate": round(len(ok) / len(samples), 4) if samples else None,
+        "statuses": statuses,
+        "latency": summarize([s["latency_ms"] for s in samples]),
+        "latency_success": summarize([s["latency_ms"] for s in ok]),
+        "stages": {
+            stage: summarize([s["timings"][stage]["duration_ms"] for s in samples if stage in s["timings"]])
+            for stage in STAGES
+        },
+    }
+
+
+def print_report(report):
+    print(f"\nrequests={report['requests']}  wall={report['wall_seconds']}s  "
+          f"throughput={report['throughput_rps']} req/s  success={report['success_rate']}")
+    print(f"statuses: {report['statuses']}")
+    print(f"\n{'':<12}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    rows = [("end-to-end", report["latency"]), ("successful", report["latency_success"])]
+    rows += [(stage, stats) for stage, stats in report["stages"].items()]
+    for name, stats in rows:
+        if not stats.get("count"):
+            print(f"{name:<12}{0:>8}")
+            continue
+        print(f"{name:<12}{stats['count']:>8}{stats['mean_ms']:>10}{stats['p50_ms']:>10}"
+              f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['max_ms']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--base-port", type=int, default=6100)
+    parser.add_argument("--stub-port", type=int, default=0)
+    parser.add_argument("--stub-latency-ms", type=float, default=100.0)
+    parser.add_argument("--stub-jitter-ms", type=float, default=25.0)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--gemini-latency-ms", type=float, default=400.0)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--aviationstack-rate", type=float, default=1000.0,
+                        help="aviationstack calls per second the flight agent's limiter allows")
+    parser.add_argument("--offline", action="store_true",
+                        help="Serve flights from a seeded local store instead of the aviationstack stub")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    stub_config = StubConfig(args.stub_latency_ms, args.stub_jitter_ms, args.stub_error_rate,
+                             args.gemini_latency_ms, args.gemini_error_rate)
+    stub = start_stub_server(stub_config, port=args.stub_port)
+    stub_url = f"http://127.0.0.1:{stub.server_port}"
+
+    workdir = tempfile.mkdtemp(prefix="voyage-loadtest-")
+    if args.offline:
+        stats = seed_flight_store(os.path.join(workdir, "flights.db"), stub_config.flights_per_route)
+        print(f"Seeded flight store with {stats['flights']} flights on {stats['routes']} routes")
+    services = Services(args.base_port, stub_url, workdir, offline=args.offline,
+                        aviationstack_rate=args.aviationstack_rate)
+    print(f"Starting services (logs in {workdir})...")
+    services.start()
+    try:
+        url = services.url("controller", "/travel/plan")
+        payloads = make_payloads(args.warmup + args.requests, args.seed)
+        if args.warmup:
+            drive(url, payloads[:args.warmup], min(args.concurrency, args.warmup))
+        print(f"Driving {args.requests} requests at concurrency {args.concurrency}...")
+        samples, wall_seconds = drive(url, payloads[args.warmup:], args.concurrency)
+    finally:
+        services.stop()
+        stub.shutdown()
+
+    report = build_report(samples, wall_seconds, args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Time itinerary_optimizer.rank_itineraries on synthetic candidate lists.
+
+Flights and hotels are shaped like the flight and hotel agents' responses
+(hotels with coordinates, so the cab distance term is exercised). Each size
+reports the pruned ranking time, how many pairs were scored, and checks the
+result against the full score matrix.
+
+    python benchmarks/optimizer_benchmark.py --sizes 100x100 500x500 2000x2000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import itinerary_optimizer
+from itinerary_optimizer import rank_itineraries
+
+AIRPORT = {"lat": 33.9416, "lng": -118.4009}  # Los Angeles International
+
+
+def make_flights(n, rng):
+    start = datetime(2030, 5, 20)
+    flights = []
+    for i in range(n):
+        departure = start + timedelta(minutes=rng.randint(0, 5 * 24 * 60))
+        arrival = departure + timedelta(minutes=rng.randint(60, 15 * 60))
+        flights.append({
+            "flight_number": f"AA{i}",
+            "departure": {"airport": "JFK", "time": departure.isoformat() + "+00:00"},
+            "arrival": {"airport": "LAX", "time": arrival.isoformat() + "+00:00"},
+        })
+    return flights
+
+
+def make_hotels(n, rng):
+    hotels = []
+    for i in range(n):
+        low = rng.randint(50, 500)
+        hotels.append({
+            "name": f"Hotel {i}",
+            "rating": round(rng.uniform(3.0, 5.0), 1),
+            "price_range": f"${low} - ${low + rng.randint(50, 150)}",
+            "lat": AIRPORT["lat"] + rng.uniform(-0.4, 0.4),
+            "lng": AIRPORT["lng"] + rng.uniform(-0.4, 0.4),
+        })
+    return hotels
+
+
+def full_matrix_top(flights, hotels, k):
+    """Reference: score every pair, no pruning."""
+    w = itinerary_optimizer.DEFAULT_WEIGHTS
+    checkin_at = datetime(2030, 5, 22, itinerary_optimizer.CHECKIN_HOUR)
+    _, price, hours, slack, surge = itinerary_optimizer.flight_features(flights, checkin_at)
+    nightly, rating, distance = itinerary_optimizer.hotel_features(hotels, AIRPORT)
+    pair_slack = slack[:, None] - (distance / itinerary_optimizer.CAB_SPEED_KMH)[None, :]
+    timing = np.where(pair_slack >= 0, w["wait_hour"] * pair_slack, -w["late_hour"] * pair_slack)
+    fare = surge[:, None] * (itinerary_optimizer.CAB_BASE_FARE + itinerary_optimizer.CAB_PER_KM * distance)[None, :]
+    scores = ((price + w["flight_hour"] * hours)[:, None] + (nightly * 3 - w["rating"] * rating)[None, :]
+              + w["cost"] * fare + timing)
+    return np.round(np.sort(scores, axis=None)[:k], 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["100x100", "500x500", "2000x2000"])
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    print(f"{'flights x hotels':<18}{'pairs':>12}{'scored':>10}{'median ms':>12}{'full matrix ms':>16}  match")
+    for size in args.sizes:
+        n_flights, n_hotels = (int(part) for part in size.split("x"))
+        flights, hotels = make_flights(n_flights, rng), make_hotels(n_hotels, rng)
+
+        samples = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            ranked, stats = rank_itineraries(flights, hotels, "2030-05-22", "2030-05-25", num_rooms=1,
+                                             airport=AIRPORT, top_k=args.top_k)
+            samples.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        reference = full_matrix_top(flights, hotels, args.top_k)
+        full_ms = (time.perf_counter() - started) * 1000
+        match = np.allclose([entry["score"] for entry in ranked], reference, atol=0.01)
+        print(f"{size:<18}{stats['pairs']:>12}{stats['evaluated_pairs']:>10}"
+              f"{statistics.median(samples):>12.2f}{full_ms:>16.2f}  {'yes' if match else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Guard how long each service takes to import.
+
+Every run imports one service module in a fresh interpreter, then warms its
+lazily built resources (lazy_init) and reports both. The median import time
+is checked against a per-service budget and the script exits with status 1
+when any service is over, so it can run in CI:
+
+    python benchmarks/startup_benchmark.py --runs 5
+    python benchmarks/startup_benchmark.py --budget cab_agent=400 --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Median import time in milliseconds. Importing a service must not build
+# datasets or clients; that work belongs to the warm-up.
+DEFAULT_BUDGETS_MS = {
+    "hotel_agent": 500,
+    "flight_agent": 500,
+    "cab_agent": 600,
+    "controller_agent": 800,
+}
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+import_ms = (time.perf_counter() - started) * 1000
+import lazy_init
+started = time.perf_counter()
+lazy_init.warm_up()
+warm_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({{
+    "import_ms": import_ms,
+    "warm_ms": warm_ms,
+    "resources": {{r.name: r.status() for r in lazy_init.all_resources()}},
+}}))
+"""
+
+
+def probe(module, env):
+    result = subprocess.run([sys.executable, "-c", PROBE.format(module=module)], cwd=BACKEND_DIR,
+                            env=env, capture_output=True, text=True, timeout=300)
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr}")
+    # The modules print while loading; the probe's report is the last line.
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def parse_budgets(values):
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    for value in values or []:
+        module, ms = value.split("=")
+        budgets[module.strip()] = float(ms)
+    return budgets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget", action="append", metavar="MODULE=MS",
+                        help="Override an import budget, e.g. cab_agent=400")
+    parser.add_argument("--no-guard", action="store_true", help="Report only; never fail")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    budgets = parse_budgets(args.budget)
+    env = dict(os.environ, ITINERARY_DB_PATH=os.path.join(tempfile.mkdtemp(), "itineraries.db"))
+    report = {}
+    print(f"{'service':<18}{'import p50':>12}{'budget':>10}{'warm-up p50':>14}  resources")
+    for module in DEFAULT_BUDGETS_MS:
+        runs = [probe(module, env) for _ in range(args.runs)]
+        import_ms = statistics.median(run["import_ms"] for run in runs)
+        warm_ms = statistics.median(run["warm_ms"] for run in runs)
+        resources = {name: status["load_ms"] for name, status in runs[-1]["resources"].items()}
+        budget = budgets.get(module)
+        report[module] = {
+            "import_ms": round(import_ms, 1),
+            "warm_ms": round(warm_ms, 1),
+            "budget_ms": budget,
+            "over_budget": budget is not None and import_ms > budget,
+            "resources_load_ms": resources,
+        }
+        flag = "  OVER BUDGET" if report[module]["over_budget"] else ""
+        print(f"{module:<18}{import_ms:>12.1f}{budget or '-':>10}{warm_ms:>14.1f}  {resources}{flag}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    over = [module for module, entry in report.items() if entry["over_budget"]]
+    if over and not args.no_guard:
+        raise SystemExit(f"Import time over budget: {', '.join(over)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Local stand-ins for aviationstack and Gemini, with configurable latency and
+error rates. Used by loadtest.py; can also be run on its own:
+
+    python benchmarks/stubs.py --port 8900 --latency-ms 150 --error-rate 0.02
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+AIRLINES = ["American Airlines", "Delta Air Lines", "United Airlines", "JetBlue Airways",
+            "Alaska Airlines", "Southwest Airlines", "Air India", "Emirates"]
+STATUSES = ["scheduled", "scheduled", "scheduled", "active", "landed", "cancelled", "diverted"]
+
+
+class StubConfig:
+    def __init__(self, latency_ms=100.0, jitter_ms=25.0, error_rate=0.0,
+                 gemini_latency_ms=400.0, gemini_error_rate=0.0, flights_per_route=60):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.gemini_latency_ms = gemini_latency_ms
+        self.gemini_error_rate = gemini_error_rate
+        self.flights_per_route = flights_per_route
+
+
+def make_flights(dep_iata, arr_iata, count, airline_filter=""):
+    """Aviationstack-shaped flight records, stable for a given route."""
+    rng = random.Random(f"{dep_iata}-{arr_iata}")
+    start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    flights = []
+    for i in range(count):
+        airline = rng.choice(AIRLINES)
+        departure = start + timedelta(minutes=rng.randint(0, 14 * 24 * 60))
+        arrival = departure + timedelta(minutes=rng.randint(60, 16 * 60))
+        code = "".join(word[0] for word in airline.split()[:2]).upper()
+        flights.append({
+            "flight_date": departure.date().isoformat(),
+            "flight_status": rng.choice(STATUSES),
+            "departure": {"airport": dep_iata, "iata": dep_iata, "terminal": str(rng.randint(1, 8)),
+                          "gate": f"{rng.choice('ABCD')}{rng.randint(1, 40)}", "scheduled": departure.isoformat()},
+            "arrival": {"airport": arr_iata, "iata": arr_iata, "terminal": str(rng.randint(1, 8)),
+                        "gate": f"{rng.choice('ABCD')}{rng.randint(1, 40)}", "scheduled": arrival.isoformat()},
+            "airline": {"name": airline, "iata": code},
+            "flight": {"number": str(100 + i), "iata": f"{code}{100 + i}"},
+            "aircraft": {"iata": rng.choice(["B738", "A320", "B77W", "A21N", "E175"])},
+        })
+    if airline_filter:
+        flights = [f for f in flights if airline_filter.lower() in f["airline"]["name"].lower()]
+    return flights
+
+
+def make_handler(config):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _delay(self, latency_ms):
+            time.sleep(max(0.0, random.gauss(latency_ms, config.jitter_ms)) / 1000)
+
+        def _send(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if not url.path.endswith("/flights"):
+                return self._send(404, {"error": "not found"})
+            self._delay(config.latency_ms)
+            if random.random() < config.error_rate:
+                return self._send(random.choice([429, 500, 503]), {"error": {"code": "stub_error"}})
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            flights = make_flights(params.get("dep_iata", ""), params.get("arr_iata", ""),
+                                   config.flights_per_route, params.get("airline_name", ""))
+            limit = int(params.get("limit", 100))
+            offset = int(params.get("offset", 0))
+            page = flights[offset:offset + limit]
+            self._send(200, {
+                "pagination": {"limit": limit, "offset": offset, "count": len(page), "total": len(flights)},
+                "data": page,
+            })
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.path != "/gemini":
+                return self._send(404, {"error": "not found"})
+            self._delay(config.gemini_latency_ms)
+            if random.random() < config.gemini_error_rate:
+                return self._send(500, {"error": "stub_error"})
+            recommendation = random.choice(["uberX", "uberXL", "uberComfort", "uberBlack"])
+            self._send(200, {"text": json.dumps({
+                "recommendation": recommendation,
+                "reason": "Stub recommendation for load testing.",
+            })})
+
+    return StubHandler
+
+
+def start_stub_server(config, host="127.0.0.1", port=0):
+    """Start the stub server in a background thread and return it."""
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--jitter-ms", type=float, default=25.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--gemini-latency-ms", type=float, default=400.0)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency_ms, args.jitter_ms, args.error_rate,
+                        args.gemini_latency_ms, args.gemini_error_rate)
+    server = start_stub_server(config, port=args.port)
+    print(f"aviationstack stub: http://127.0.0.1:{args.port}/v1/flights")
+    print(f"Gemini stub:        http://127.0.0.1:{args.port}/gemini")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
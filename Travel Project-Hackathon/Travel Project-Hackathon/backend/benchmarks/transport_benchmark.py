@@ -0,0 +1,126 @@
+"""
+Compare the HTTP and in-process agent transports per request.
+
+Starts the hotel, flight and cab agents on local ports, then sends the same
+payloads through HttpTransport and InProcessTransport and prints latency
+percentiles. The flight agent reads aviationstack from the stub server
+(benchmarks/stubs.py); its page cache serves every call after the warm-up,
+so the numbers are the transport and the agent, not the upstream.
+
+    python benchmarks/transport_benchmark.py --requests 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+import cab_agent
+import hotel_agent
+from agent_client import AgentClient
+from stubs import StubConfig, start_stub_server
+from transport import HttpTransport, InProcessTransport
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def serve(app):
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_flight_agent(workdir):
+    """
+    Point the flight agent at a stub aviationstack before importing it (it
+    reads its settings at import), with its quota and store under workdir.
+    """
+    stub = start_stub_server(StubConfig(latency_ms=0, jitter_ms=0))
+    os.environ.update(
+        AVIATIONSTACK_BASE_URL=f"http://127.0.0.1:{stub.server_port}/v1",
+        AVIATIONSTACK_QUOTA_PATH=os.path.join(workdir, "aviationstack_quota.db"),
+        FLIGHT_STORE_PATH=os.path.join(workdir, "flights.db"),
+        FLIGHT_AGENT_OFFLINE="0",
+    )
+    import flight_agent
+    return stub, serve(flight_agent.app)
+
+
+def cab_payload():
+    # Pick a ride type that has drivers at the airport so the agent never
+    # falls back to Gemini, which would dominate the measurement.
+    airport = "Los Angeles International"
+    drivers = cab_agent.mock_drivers_by_location.value[airport]
+    ride_type = next(rt.value for rt, available in drivers.items() if available)
+    return {
+        "scheduled": "2025-05-23T19:15:00+00:00",
+        "airport": airport,
+        "num_passengers": 2,
+        "cab_drop_location": "Four Seasons Hotel, Doheny Dr, Los Angeles, CA 90048",
+        "ride_type": ride_type,
+        "user_prefs": "",
+    }
+
+
+def measure(transport, agent, payload, n):
+    transport.call(agent, payload)  # warm up connections and caches
+    samples = []
+    for _ in range(n):
+        started = time.perf_counter()
+        transport.call(agent, payload)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "mean": statistics.mean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[int(len(samples) * 0.95) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory()
+    stub, flight_server = start_flight_agent(workdir.name)
+    hotel_server = serve(hotel_agent.app)
+    cab_server = serve(cab_agent.app)
+    clients = {
+        "hotel": AgentClient("hotel", f"http://127.0.0.1:{hotel_server.server_port}/hotels"),
+        "flight": AgentClient("flight", f"http://127.0.0.1:{flight_server.server_port}/flights/search"),
+        "cab": AgentClient("cab", f"http://127.0.0.1:{cab_server.server_port}/cabs/book"),
+    }
+    transports = [HttpTransport(clients), InProcessTransport()]
+    payloads = {
+        "hotel": {"cityname": "Los Angeles", "num_of_rooms": 1,
+                  "checkin_date": "2025-05-24", "checkout_date": "2025-05-25"},
+        "flight": {"source": "JFK", "destination": "LAX", "until_date": "2099-12-31", "max_results": 20},
+        "cab": cab_payload(),
+    }
+
+    print(f"{'agent':<8}{'transport':<12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for agent, payload in payloads.items():
+        for transport in transports:
+            stats = measure(transport, agent, payload, args.requests)
+            print(f"{agent:<8}{transport.name:<12}{stats['mean']:>10.3f}{stats['p50']:>10.3f}{stats['p95']:>10.3f}")
+
+    hotel_server.shutdown()
+    flight_server.shutdown()
+    cab_server.shutdown()
+    stub.shutdown()
+    workdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
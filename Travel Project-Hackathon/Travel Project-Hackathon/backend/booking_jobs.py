@@ -0,0 +1,172 @@
+import queue
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+# Errors that mean the job itself is broken (e.g. a missing itinerary key);
+# retrying them would only fail again.
+NON_RETRYABLE_ERRORS = (KeyError, TypeError, ValueError)
+
+UNFINISHED = ("queued", "running", "retrying")
+JOB_COLUMNS = ("job_id", "provider", "itinerary_id", "status", "attempts", "error", "created_at", "finished_at")
+
+
+class BookingJobQueue:
+    """
+    Runs booking automations (prompt generation plus the handle_*_prompt
+    hooks) in the background so /travel/plan can return as soon as planning
+    is done.
+
+    Every provider ("hotel", "flight", "cab") has its own queue and worker
+    threads, and the number of workers is that provider's concurrency limit,
+    so a slow provider never holds up the others. Failed jobs are retried
+    with exponential backoff unless the error is not retryable.
+
+    Job status is kept in the `booking_jobs` table of a local SQLite file
+    (the itinerary store's database), so every controller worker can report
+    on any job and status survives a restart. The jobs themselves run on the
+    worker that queued them and are not resumed after a restart: their
+    prompts need the user's password, which is never stored. A job left
+    unfinished for `stale_after` seconds is marked failed when a queue
+    starts. Only the most recent `max_retained` jobs are kept.
+    """
+    def __init__(self, concurrency, path, max_attempts=3, retry_backoff=1.0, max_retained=10000,
+                 stale_after=3600.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.max_retained = max_retained
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS booking_jobs (
+                job_id TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                itinerary_id TEXT,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                error TEXT,
+                created_at REAL NOT NULL,
+                finished_at REAL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_booking_jobs_itinerary ON booking_jobs (itinerary_id, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_booking_jobs_created ON booking_jobs (created_at)")
+        now = time.time()
+        conn.execute(
+            f"UPDATE booking_jobs SET status = 'failed', error = ?, finished_at = ?, updated_at = ? "
+            f"WHERE status IN ({', '.join('?' * len(UNFINISHED))}) AND updated_at < ?",
+            ("Booking worker stopped before the job finished.", now, now, *UNFINISHED, now - stale_after)
+        )
+        conn.commit()
+
+        self._queues = {}
+        for provider, workers in concurrency.items():
+            self._queues[provider] = queue.Queue()
+            for i in range(workers):
+                threading.Thread(target=self._work, args=(provider,), daemon=True,
+                                 name=f"booking-{provider}-{i}").start()
+
+    def _conn(self):
+        # sqlite3 connections must not be shared across threads.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def submit(self, provider, func, *args, itinerary_id=None):
+        """Queue `func(*args)` for `provider` and return the job ID."""
+        if provider not in self._queues:
+            raise ValueError(f"Unknown booking provider: {provider}")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO booking_jobs (job_id, provider, itinerary_id, status, attempts, error, created_at, "
+                "finished_at, updated_at) VALUES (?, ?, ?, 'queued', 0, NULL, ?, NULL, ?)",
+                (job_id, provider, itinerary_id, now, now)
+            )
+            conn.execute(
+                "DELETE FROM booking_jobs WHERE created_at < "
+                "(SELECT created_at FROM booking_jobs ORDER BY created_at DESC LIMIT 1 OFFSET ?)",
+                (self.max_retained - 1,)
+            )
+        self._queues[provider].put((job_id, func, args))
+        return job_id
+
+    def get(self, job_id):
+        row = self._conn().execute(
+            f"SELECT {', '.join(JOB_COLUMNS)} FROM booking_jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return dict(zip(JOB_COLUMNS, row)) if row else None
+
+    def for_itinerary(self, itinerary_id):
+        rows = self._conn().execute(
+            f"SELECT {', '.join(JOB_COLUMNS)} FROM booking_jobs WHERE itinerary_id = ? ORDER BY created_at",
+            (itinerary_id,)
+        ).fetchall()
+        return [dict(zip(JOB_COLUMNS, row)) for row in rows]
+
+    def stats(self):
+        """Job counts by provider and status across every worker; "queued" is this worker's backlog."""
+        counts = self._conn().execute(
+            "SELECT provider, status, COUNT(*) FROM booking_jobs GROUP BY provider, status"
+        ).fetchall()
+        return {
+            provider: {
+                "queued": self._queues[provider].qsize(),
+                **{status: n for p, status, n in counts if p == provider},
+            }
+            for provider in self._queues
+        }
+
+    def _update(self, job_id, **changes):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                f"UPDATE booking_jobs SET {', '.join(f'{name} = ?' for name in changes)}, updated_at = ? "
+                f"WHERE job_id = ?",
+                (*changes.values(), time.time(), job_id)
+            )
+
+    def _work(self, provider):
+        jobs = self._queues[provider]
+        while True:
+            job_id, func, args = jobs.get()
+            job = self.get(job_id)
+            attempt = (job["attempts"] if job else 0) + 1
+            self._update(job_id, status="running", attempts=attempt)
+            try:
+                func(*args)
+            except Exception as e:
+                retryable = not isinstance(e, NON_RETRYABLE_ERRORS) and attempt < self.max_attempts
+                print(f"Booking job {job_id} ({provider}) attempt {attempt} failed: {e}")
+                if retryable:
+                    self._update(job_id, status="retrying", error=str(e))
+                    delay = self.retry_backoff * (2 ** (attempt - 1))
+                    threading.Timer(delay, jobs.put, args=((job_id, func, args),)).start()
+                else:
+                    traceback.print_exc()
+                    self._update(job_id, status="failed", error=f"{type(e).__name__}: {e}", finished_at=time.time())
+            else:
+                self._update(job_id, status="succeeded", error=None, finished_at=time.time())
+            finally:
+                jobs.task_done()
+
+
+def parse_concurrency(spec):
+    """Parse "hotel=2,flight=1,cab=2" into {"hotel": 2, "flight": 1, "cab": 2}."""
+    limits = {}
+    for part in spec.split(","):
+        if part.strip():
+            provider, workers = part.split("=")
+            limits[provider.strip()] = int(workers)
+    return limits
@@ -1,21 +1,27 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request
 from flask_cors import CORS
 from pydantic import BaseModel, ValidationError, Field
 from enum import Enum
 import random
 import os
-import google.generativeai as genai
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import json
 from typing import List, Dict, Optional, Any, Union
 import re
+import threading
+import requests
+import telemetry
+import lazy_init
+from codec import respond
+from lazy_init import LazyResource
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
+telemetry.install(app, "cab")
 
 # ----------------------------
 # 1. Data Models
@@ -36,6 +42,11 @@ class CabBookingRequest(BaseModel):
     cab_drop_location: str # e.g., "Hotel Name, Hotel Address" or "Some City, Some Street"
     ride_type: Optional[RideType] = None # User preference for cab type
     user_prefs: Optional[str] = None # Detailed user preferences for AI advisor
+    # Optional pickup window (ISO format). When given, the driver and pickup
+    # time are chosen so that pickup falls inside it, in a single call.
+    earliest_pickup: Optional[str] = None
+    latest_pickup: Optional[str] = None
+    deplaning_buffer_minutes: Optional[int] = Field(None, ge=0) # Time from landing to the curb; random 15-30 if omitted
 
 class RideEstimate(BaseModel):
     low: float
@@ -66,57 +77,12 @@ class BookingResponse(BaseModel):
     recommendation_details: Dict
     chosen_ride_type: str
     estimates: List[Dict]
+    pickup_window: Optional[Dict] = None
 
 # ----------------------------
 # 2. Mock Database & Locations
 # ----------------------------
 
-# --- Helper function to generate mock hotel data (copied from hotel_agent.py for consistency) ---
-def generate_mock_hotels_for_cab_agent(num_hotels_per_city=200):
-    cities = [
-        "New York", "Los Angeles", "Chicago", "Houston", "Phoenix",
-        "Philadelphia", "San Antonio", "San Diego", "Dallas", "San Jose",
-        "Austin", "Jacksonville", "Fort Worth", "Columbus", "Charlotte",
-        "San Francisco", "Indianapolis", "Seattle", "Denver", "Washington",
-        "Boston", "El Paso", "Nashville", "Detroit", "Oklahoma City",
-        "Portland", "Las Vegas", "Memphis", "Louisville", "Baltimore",
-        "Milwaukee", "Albuquerque", "Tucson", "Fresno", "Sacramento",
-        "Kansas City", "Mesa", "Atlanta", "Omaha", "Colorado Springs",
-        "Raleigh", "Miami", "Virginia Beach", "Long Beach", "Oakland",
-        "Minneapolis", "Tulsa", "Wichita", "New Orleans", "Arlington"
-    ]
-
-    hotel_prefixes = ["Grand", "Comfort", "Elite", "Royal", "City", "Star", "Prime", "Luxury", "Inn", "Suite"]
-    hotel_suffixes = ["Hotel", "Resort", "Inn", "Suites", "Place", "Lodge", "Manor", "House", "Gardens"]
-    street_types = ["St", "Ave", "Blvd", "Rd", "Ln", "Dr"]
-
-    all_hotels_data = {}
-
-    for city in cities:
-        city_hotels = []
-        for i in range(num_hotels_per_city):
-            name = f"{random.choice(hotel_prefixes)} {random.choice(hotel_suffixes)} {random.randint(1, 100)}"
-            rating = round(random.uniform(3.0, 5.0), 1)
-            address = f"{random.randint(100, 9999)} {random.choice(['Main', 'Oak', 'Pine', 'Elm', 'Maple'])} {random.choice(street_types)}, {city}"
-            
-            # Generate price range (not used in cab_agent, but kept for consistency)
-            base_price = random.randint(50, 500)
-            price_range_low = base_price - random.randint(0, 40)
-            price_range_high = base_price + random.randint(50, 150)
-            price_range = f"${price_range_low} - ${price_range_high}"
-
-            city_hotels.append({
-                "name": name,
-                "rating": rating,
-                "address": address,
-                "price_range": price_range
-            })
-        all_hotels_data[city] = city_hotels
-    return all_hotels_data
-
-# Generate the mock hotel data for use in MOCK_HOTEL_LOCATIONS
-generated_hotels_data = generate_mock_hotels_for_cab_agent(num_hotels_per_city=200)
-
 # Mock location mapping for Airports
 MOCK_LOCATIONS = {
     "Hyderabad Airport (HYD)": {"lat": 17.2366, "lng": 78.4294},
@@ -245,13 +211,21 @@ US_CITIES_AS_AIRPORTS = [
     "Minneapolis-Saint Paul Airport", "Tulsa Airport", "Wichita Dwight D. Eisenhower Airport", "New Orleans Airport", "Arlington Municipal Airport"
 ]
 
-for city_airport_name in US_CITIES_AS_AIRPORTS:
-    if city_airport_name not in MOCK_LOCATIONS:
-        # Assign approximate coordinates for new city airports
-        MOCK_LOCATIONS[city_airport_name] = {
-            "lat": random.uniform(25.0, 49.0), # Latitude range for contiguous USA
-            "lng": random.uniform(-125.0, -67.0) # Longitude range for contiguous USA
-        }
+
+
+def city_airport_locations():
+    """
+    Coordinates of the US_CITIES_AS_AIRPORTS pickups, each on its city
+    centre from the hotel catalog so rides to that city's hotels have a
+    sensible length. Names without a catalog city are left out.
+    """
+    import hotel_catalog
+    locations = {}
+    for city_airport_name in US_CITIES_AS_AIRPORTS:
+        center = hotel_catalog.city_center(city_airport_name)
+        if city_airport_name not in MOCK_LOCATIONS and center is not None:
+            locations[city_airport_name] = {"lat": center[0], "lng": center[1]}
+    return locations
 
 # Mock Hotel Locations (for drop-off): Name + Address string mapped to mock coordinates
 MOCK_HOTEL_LOCATIONS = {
@@ -274,19 +248,19 @@ MOCK_HOTEL_LOCATIONS = {
     "Novotel Hyderabad Airport, Airport Rd, Shamshabad, Hyderabad, Telangana 500108": {"lat": 17.2435, "lng": 78.4325},
 }
 
-# Add hotels from generated_hotels_data to MOCK_HOTEL_LOCATIONS
-for city, hotels in generated_hotels_data.items():
-    for hotel in hotels:
-        full_address = f"{hotel['name']}, {hotel['address']}"
-        if full_address not in MOCK_HOTEL_LOCATIONS:
-            # Assign approximate coordinates for new hotels based on city center
-            # These are very rough approximations for demonstration purposes
-            city_lat = MOCK_LOCATIONS.get(f"{city} Airport", {}).get("lat", random.uniform(25.0, 49.0))
-            city_lng = MOCK_LOCATIONS.get(f"{city} Airport", {}).get("lng", random.uniform(-125.0, -67.0))
-            MOCK_HOTEL_LOCATIONS[full_address] = {
-                "lat": city_lat + random.uniform(-0.05, 0.05), # Small offset from city/airport
-                "lng": city_lng + random.uniform(-0.05, 0.05)
-            }
+# Every other hotel comes from the catalog shared with the hotel agent (see
+# hotel_catalog), so the hotel the controller picks has coordinates here.
+def load_hotel_locations():
+    import hotel_catalog
+    return hotel_catalog.load()
+
+
+hotel_locations = LazyResource("hotel_locations", load_hotel_locations)
+
+
+def locate_hotel(drop_off):
+    """{"lat", "lng"} for a "Hotel Name, Hotel Address" drop-off, or None if it is not a known hotel."""
+    return MOCK_HOTEL_LOCATIONS.get(drop_off) or hotel_locations.value.locate(drop_off)
 
 
 def generate_mock_drivers(num_drivers_per_location: int = 15) -> Dict[str, Dict[RideType, List[Driver]]]:
@@ -358,8 +332,14 @@ def generate_mock_drivers(num_drivers_per_location: int = 15) -> Dict[str, Dict[
             )
     return all_drivers
 
-# Initialize mock drivers with 15 drivers per location
-mock_drivers_by_location = generate_mock_drivers(num_drivers_per_location=15)
+def load_mock_drivers():
+    """The city airport pickups join MOCK_LOCATIONS here, with their drivers."""
+    MOCK_LOCATIONS.update(city_airport_locations())
+    return generate_mock_drivers(num_drivers_per_location=15)
+
+
+# Mock drivers, 15 per location, generated on first use
+mock_drivers_by_location = LazyResource("drivers", load_mock_drivers)
 
 # ----------------------------
 # 3. AI Recommendation Service
@@ -367,8 +347,21 @@ mock_drivers_by_location = generate_mock_drivers(num_drivers_per_location=15)
 
 class AICabAdvisor:
     def __init__(self):
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-        self.model = genai.GenerativeModel('gemini-1.5-pro-latest')
+        # GEMINI_STUB_URL swaps Gemini for a local HTTP stand-in that answers
+        # {"prompt": ...} with {"text": ...} (see benchmarks/stubs.py).
+        self.stub_url = os.getenv("GEMINI_STUB_URL")
+        if not self.stub_url:
+            # Imported here because the SDK alone takes most of a second to load.
+            import google.generativeai as genai
+            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+            self.model = genai.GenerativeModel('gemini-1.5-pro-latest')
+
+    def _generate(self, prompt: str) -> str:
+        if self.stub_url:
+            response = requests.post(self.stub_url, json={"prompt": prompt}, timeout=30)
+            response.raise_for_status()
+            return response.json()["text"]
+        return self.model.generate_content(prompt).text
     
     def recommend_ride(self, user_prefs: str, estimates: List[Dict], start_loc_name: str, end_loc_display: str, num_passengers: int) -> Dict:
         prompt = f"""
@@ -403,8 +396,9 @@ class AICabAdvisor:
         """
 
         try:
-            response = self.model.generate_content(prompt)
-            clean_text = response.text.strip().replace('```json', '').replace('```', '')
+            with telemetry.span("gemini_recommend"):
+                response_text = self._generate(prompt)
+            clean_text = response_text.strip().replace('```json', '').replace('```', '')
             return json.loads(clean_text)
         except Exception as e:
             print(f"AI recommendation error: {e}")
@@ -429,17 +423,75 @@ class AICabAdvisor:
                 "error": str(e)
             }
 
-# Initialize AI service
-ai_advisor = AICabAdvisor()
+# Initialize AI service on first use
+ai_advisor = LazyResource("gemini_client", AICabAdvisor)
 
 # ----------------------------
-# 4. API Endpoints
+# 4. Pickup Window Scheduling
 # ----------------------------
 
-@app.route('/cabs/book', methods=['POST'])
-def book_cab_unified():
+# How often a requested pickup window could not be met by any driver.
+pickup_window_stats = {"requests": 0, "unmet": 0}
+pickup_window_lock = threading.Lock()
+PICKUP_WINDOW_REQUESTS = telemetry.register(telemetry.Counter(
+    "cab_pickup_window_requests_total", "Bookings that asked for a pickup window."))
+PICKUP_WINDOW_UNMET = telemetry.register(telemetry.Counter(
+    "cab_pickup_window_unmet_total", "Bookings whose pickup window no driver could meet."))
+
+def record_pickup_window(constraints_met: bool):
+    with pickup_window_lock:
+        pickup_window_stats["requests"] += 1
+        if not constraints_met:
+            pickup_window_stats["unmet"] += 1
+    PICKUP_WINDOW_REQUESTS.inc()
+    if not constraints_met:
+        PICKUP_WINDOW_UNMET.inc()
+
+def parse_pickup_bound(value: Optional[str], flight_arrival_dt: datetime) -> Optional[datetime]:
     """
-    Unified endpoint to analyze user needs, recommend, and book a cab.
+    Parse a pickup window bound so it compares with the arrival time. A bound
+    without an offset is in the arrival's zone; with a naive arrival (taken
+    as UTC), an offset bound is converted to UTC before the offset is dropped.
+    """
+    if not value:
+        return None
+    bound = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if bound.tzinfo is None:
+        bound = bound.replace(tzinfo=flight_arrival_dt.tzinfo)
+    elif flight_arrival_dt.tzinfo is None:
+        bound = bound.astimezone(timezone.utc).replace(tzinfo=None)
+    return bound
+
+def choose_driver_in_window(drivers: List[Driver], curb_time: datetime, earliest: Optional[datetime], latest: Optional[datetime]):
+    """
+    Pick the driver whose pickup lands inside [earliest, latest].
+
+    A driver can reach the curb `eta` minutes after the passenger is ready,
+    and a ride is never scheduled before `earliest`. Among drivers that fit,
+    the earliest pickup wins (ties go to the higher rating). If none fit, the
+    earliest possible pickup is returned with constraints_met=False.
+    Returns (driver, pickup_time, constraints_met).
+    """
+    def pickup_for(driver):
+        pickup = curb_time + timedelta(minutes=driver.eta)
+        return max(pickup, earliest) if earliest else pickup
+
+    candidates = sorted(drivers, key=lambda d: (pickup_for(d), -d.rating))
+    for driver in candidates:
+        pickup = pickup_for(driver)
+        if latest is None or pickup <= latest:
+            return driver, pickup, True
+    driver = candidates[0]
+    return driver, pickup_for(driver), False
+
+# ----------------------------
+# 5. API Endpoints
+# ----------------------------
+
+def book_cab(req_data):
+    """
+    Analyze user needs, recommend, and book a cab. Used by both the
+    /cabs/book view and in-process callers; returns (response_body, status_code).
     It uses hardcoded/temporary flight data for demonstration.
     Input example:
     {
@@ -452,8 +504,6 @@ def book_cab_unified():
     }
     """
     try:
-        req_data = request.get_json()
-        
         cab_request = CabBookingRequest(**req_data)
 
         flight_arrival_dt_str = cab_request.scheduled
@@ -462,12 +512,22 @@ def book_cab_unified():
         try:
             flight_arrival_dt = datetime.fromisoformat(flight_arrival_dt_str.replace('Z', '+00:00'))
         except ValueError:
-            return jsonify({"error": f"Invalid scheduled time format: {flight_arrival_dt_str}. Use ISO 8601 format."}), 400
+            return {"error": f"Invalid scheduled time format: {flight_arrival_dt_str}. Use ISO 8601 format."}, 400
+
+        try:
+            earliest_pickup = parse_pickup_bound(cab_request.earliest_pickup, flight_arrival_dt)
+            latest_pickup = parse_pickup_bound(cab_request.latest_pickup, flight_arrival_dt)
+        except ValueError:
+            return {"error": "Invalid pickup window. Use ISO 8601 format for earliest_pickup and latest_pickup."}, 400
+        if earliest_pickup and latest_pickup and earliest_pickup > latest_pickup:
+            return {"error": "earliest_pickup must not be after latest_pickup."}, 400
 
         # --- Determine Cab Pickup Location (Airport) ---
+        # Loading the drivers also adds the city airports to MOCK_LOCATIONS.
+        drivers_by_location = mock_drivers_by_location.value
         start_loc_coords = MOCK_LOCATIONS.get(arrival_airport_full_name)
         if not start_loc_coords:
-            return jsonify({"error": f"Coordinates for arrival airport '{arrival_airport_full_name}' are not mapped. Please use one of the predefined airport names from MOCK_LOCATIONS."}), 400
+            return {"error": f"Coordinates for arrival airport '{arrival_airport_full_name}' are not mapped. Please use one of the predefined airport names from MOCK_LOCATIONS."}, 400
         
         start_lat = start_loc_coords['lat']
         start_lng = start_loc_coords['lng']
@@ -476,13 +536,13 @@ def book_cab_unified():
         # The cab_drop_location is a string. We attempt to find its coordinates.
         drop_off_address_string = cab_request.cab_drop_location.strip()
         
-        end_loc_coords = MOCK_HOTEL_LOCATIONS.get(drop_off_address_string)
+        end_loc_coords = locate_hotel(drop_off_address_string)
         
         if not end_loc_coords:
             # If the exact string isn't found in mock hotel locations,
             # we'll approximate coordinates for demonstration.
             # In a real system, you'd integrate a geocoding API here.
-            print(f"Warning: Drop-off location '{drop_off_address_string}' not found in MOCK_HOTEL_LOCATIONS. Approximating coordinates near the airport.")
+            print(f"Warning: Drop-off location '{drop_off_address_string}' not found in MOCK_HOTEL_LOCATIONS or the hotel catalog. Approximating coordinates near the airport.")
             end_lat = start_lat + random.uniform(-0.1, 0.1) # Simulate nearby
             end_lng = start_lng + random.uniform(-0.1, 0.1)
             drop_off_display_name = f"{drop_off_address_string} (Approximated)"
@@ -511,31 +571,32 @@ def book_cab_unified():
             RideType.UBER_BLACK: 2.5
         }
         
-        for ride_type_enum in RideType:
-            base_price = (3.0 + (base_distance * 1.5)) * pricing[ride_type_enum]
-            surge = random.choice([1.0, 1.2, 1.5, 2.0])
+        with telemetry.span("cab_estimates"):
+            for ride_type_enum in RideType:
+                base_price = (3.0 + (base_distance * 1.5)) * pricing[ride_type_enum]
+                surge = random.choice([1.0, 1.2, 1.5, 2.0])
             
-            estimates.append(RideEstimate(
-                low=round(base_price * 0.9, 2),
-                high=round(base_price * 1.1, 2),
-                duration=int(base_duration * random.uniform(0.9, 1.1)),
-                distance=round(base_distance, 1),
-                surge=surge,
-                ride_type=ride_type_enum
-            ).dict())
+                estimates.append(RideEstimate(
+                    low=round(base_price * 0.9, 2),
+                    high=round(base_price * 1.1, 2),
+                    duration=int(base_duration * random.uniform(0.9, 1.1)),
+                    distance=round(base_distance, 1),
+                    surge=surge,
+                    ride_type=ride_type_enum
+                ).dict())
         
         # --- 4. Determine chosen ride type (user preference or AI recommendation) ---
         chosen_ride_type = None
         recommendation_details = {}
 
         if user_preferred_ride_type:
-            available_drivers_for_pref = mock_drivers_by_location.get(arrival_airport_full_name, {}).get(user_preferred_ride_type, [])
+            available_drivers_for_pref = drivers_by_location.get(arrival_airport_full_name, {}).get(user_preferred_ride_type, [])
             if available_drivers_for_pref:
                 chosen_ride_type = user_preferred_ride_type
                 recommendation_details = {"reason": f"User preferred {user_preferred_ride_type.value} and drivers are available at {arrival_airport_full_name}."}
             else:
                 print(f"User preferred {user_preferred_ride_type.value} but no drivers available at {arrival_airport_full_name}. Falling back to AI recommendation.")
-                recommendation_details = ai_advisor.recommend_ride(
+                recommendation_details = ai_advisor.value.recommend_ride(
                     user_prefs=f"{user_prefs} (Preferred {user_preferred_ride_type.value} but none available at arrival airport).",
                     estimates=estimates,
                     start_loc_name=arrival_airport_full_name,
@@ -546,7 +607,7 @@ def book_cab_unified():
                 chosen_ride_type = RideType(ai_rec_type) if ai_rec_type in [rt.value for rt in RideType] else RideType.UBERX
         else:
             # If no preference, ask AI to recommend
-            recommendation_details = ai_advisor.recommend_ride(
+            recommendation_details = ai_advisor.value.recommend_ride(
                 user_prefs=user_prefs,
                 estimates=estimates,
                 start_loc_name=arrival_airport_full_name,
@@ -557,22 +618,36 @@ def book_cab_unified():
             chosen_ride_type = RideType(ai_rec_type) if ai_rec_type in [rt.value for rt in RideType] else RideType.UBERX
 
         # --- 5. Book the ride ---
-        available_drivers = mock_drivers_by_location.get(arrival_airport_full_name, {}).get(chosen_ride_type, [])
+        available_drivers = drivers_by_location.get(arrival_airport_full_name, {}).get(chosen_ride_type, [])
         
         # Fallback if recommended type has no drivers at the specific airport
         if not available_drivers:
             print(f"No drivers for chosen {chosen_ride_type.value} at {arrival_airport_full_name}. Trying any available uberX at this airport.")
-            available_drivers = mock_drivers_by_location.get(arrival_airport_full_name, {}).get(RideType.UBERX, [])
+            available_drivers = drivers_by_location.get(arrival_airport_full_name, {}).get(RideType.UBERX, [])
             if available_drivers:
                 chosen_ride_type = RideType.UBERX # Update chosen type to fallback
             else:
-                return jsonify({"error": f"No drivers available for {chosen_ride_type.value} or uberX at {arrival_airport_full_name}. Booking failed."}), 404
-        
-        driver = random.choice(available_drivers)
+                return {"error": f"No drivers available for {chosen_ride_type.value} or uberX at {arrival_airport_full_name}. Booking failed."}, 404
         
         # Calculate pickup time relative to flight arrival time
-        deplaning_buffer_minutes = random.randint(15, 30) 
-        pickup_time = flight_arrival_dt + timedelta(minutes=deplaning_buffer_minutes + driver.eta)
+        deplaning_buffer_minutes = cab_request.deplaning_buffer_minutes
+        if deplaning_buffer_minutes is None:
+            deplaning_buffer_minutes = random.randint(15, 30)
+        curb_time = flight_arrival_dt + timedelta(minutes=deplaning_buffer_minutes)
+
+        pickup_window = None
+        if earliest_pickup or latest_pickup:
+            driver, pickup_time, constraints_met = choose_driver_in_window(available_drivers, curb_time, earliest_pickup, latest_pickup)
+            record_pickup_window(constraints_met)
+            pickup_window = {
+                "earliest_pickup": earliest_pickup.isoformat() if earliest_pickup else None,
+                "latest_pickup": latest_pickup.isoformat() if latest_pickup else None,
+                "deplaning_buffer_minutes": deplaning_buffer_minutes,
+                "constraints_met": constraints_met
+            }
+        else:
+            driver = random.choice(available_drivers)
+            pickup_time = curb_time + timedelta(minutes=driver.eta)
         
         # Get the duration for the chosen ride type from the estimates
         chosen_ride_duration_seconds = next((e['duration'] for e in estimates if e['ride_type'] == chosen_ride_type.value), 1200) # Default 20 mins if not found
@@ -591,17 +666,28 @@ def book_cab_unified():
             estimated_arrival=estimated_arrival_at_dropoff.isoformat(),
             recommendation_details=recommendation_details,
             chosen_ride_type=chosen_ride_type.value,
-            estimates=estimates
+            estimates=estimates,
+            pickup_window=pickup_window
         )
         
-        return jsonify(booking_response.dict())
+        return booking_response.dict(), 200
     
     except ValidationError as ve:
         print(f"Validation Error: {ve.errors()}")
-        return jsonify({"error": "Invalid request data", "details": ve.errors()}), 400
+        return {"error": "Invalid request data", "details": ve.errors()}, 400
     except Exception as e:
         print(f"Error in /cabs/book: {e}")
-        return jsonify({"error": f"Internal server error: {e}"}), 500
+        return {"error": f"Internal server error: {e}"}, 500
+
+@app.route('/cabs/book', methods=['POST'])
+def book_cab_unified():
+    """
+    Unified endpoint to analyze user needs, recommend, and book a cab.
+    See book_cab for the expected payload.
+    """
+    data = request.get_json(silent=True) or {}
+    body, status = book_cab(data)
+    return respond(body, status, payload=data)
 
 def handle_cab_prompt(prompt: str):
     """
@@ -611,16 +697,27 @@ def handle_cab_prompt(prompt: str):
     print(prompt)
 
 # ----------------------------
-# 5. Health Check
+# 6. Health Check & Stats
 # ----------------------------
 
+# GET /ready and POST /warmup for the datasets and client built on first use
+lazy_init.install(app, "cab", [hotel_locations, mock_drivers_by_location, ai_advisor])
+
+@app.route('/cabs/stats', methods=['GET'])
+def cab_stats():
+    with pickup_window_lock:
+        stats = dict(pickup_window_stats)
+    stats["unmet_ratio"] = round(stats["unmet"] / stats["requests"], 4) if stats["requests"] else 0.0
+    return respond({"pickup_window": stats})
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "timestamp": datetime.now().isoformat()})
+    return respond({"status": "healthy", "timestamp": datetime.now().isoformat()})
 
 # ----------------------------
-# 6. Main Application Run
+# 7. Main Application Run
 # ----------------------------
 
 if __name__ == '__main__':
+    lazy_init.warm_up([hotel_locations, mock_drivers_by_location, ai_advisor], background=True)
     app.run(port=5002, debug=True)
@@ -0,0 +1,111 @@
+import re
+import unicodedata
+
+# Largest `limit` a suggestion request may ask for; every prefix keeps this
+# many ranked suggestions.
+MAX_SUGGESTIONS = 20
+
+# Other names people type for catalog cities: nicknames, "City"/"D.C."
+# forms and airport codes (the flight form asks for IATA codes). Aliases of
+# cities missing from the catalog are ignored.
+CITY_ALIASES = {
+    "New York": ["NYC", "New York City", "NY", "Manhattan", "JFK", "LGA", "EWR"],
+    "Los Angeles": ["LA", "L.A.", "LAX"],
+    "San Francisco": ["SF", "San Fran", "SFO"],
+    "Las Vegas": ["Vegas", "LAS"],
+    "Washington": ["DC", "Washington DC", "Washington D.C.", "DCA", "IAD"],
+    "Philadelphia": ["Philly", "PHL"],
+    "Chicago": ["ORD", "MDW"],
+    "Boston": ["BOS"],
+    "New Orleans": ["NOLA", "MSY"],
+    "Oklahoma City": ["OKC"],
+    "Kansas City": ["KC", "MCI"],
+    "Minneapolis": ["Twin Cities", "MSP"],
+    "Atlanta": ["ATL"], "Dallas": ["DFW"], "Houston": ["IAH", "HOU"], "Miami": ["MIA"],
+    "Seattle": ["SEA"], "Denver": ["DEN"], "Phoenix": ["PHX"], "Detroit": ["DTW"],
+    "Nashville": ["BNA"], "Austin": ["AUS"], "Portland": ["PDX"], "Baltimore": ["BWI"],
+    "San Jose": ["SJC"], "Raleigh": ["RDU"], "Sacramento": ["SMF"], "Albuquerque": ["ABQ"],
+    "Tucson": ["TUS"], "Memphis": ["MEM"], "Louisville": ["SDF"], "Milwaukee": ["MKE"],
+    "Indianapolis": ["IND"], "Charlotte": ["CLT"], "Columbus": ["CMH"], "Jacksonville": ["JAX"],
+    "San Antonio": ["SAT"], "El Paso": ["ELP"], "Omaha": ["OMA"], "Tulsa": ["TUL"],
+    "Wichita": ["ICT"], "Oakland": ["OAK"], "Fresno": ["FAT"], "Long Beach": ["LGB"],
+    "Colorado Springs": ["COS"],
+}
+
+_DROPPED = re.compile(r"[.'\u2019]")
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize(text):
+    """
+    Lookup form of a city name: accents removed, case folded, periods and
+    apostrophes dropped ("D.C." -> "dc"), other punctuation and runs of
+    whitespace turned into one space, and the ends trimmed.
+    """
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(char for char in text if not unicodedata.combining(char)).casefold()
+    return " ".join(_SEPARATORS.sub(" ", _DROPPED.sub("", text)).split())
+
+
+class CityLookup:
+    """
+    Catalog city names and their aliases, for exact lookups and
+    autocomplete.
+
+    Exact lookups are one dict access on the normalized text. For
+    suggestions, every prefix of every normalized name and alias is stored,
+    starting from each of its words ("york" finds New York), with that
+    prefix's best MAX_SUGGESTIONS cities already ranked. A suggestion request
+    is then one dict access, whatever the number of cities. Ranking: an exact
+    name or alias first, then matches at the start of a name before matches
+    on a later word, city names before aliases, then cities with more
+    hotels, then by name.
+    """
+    def __init__(self, hotel_counts, aliases=None):
+        aliases = CITY_ALIASES if aliases is None else aliases
+        self.hotel_counts = dict(hotel_counts)
+        self._exact = {}
+        labels = [(city, city, False) for city in self.hotel_counts]
+        for city, names in aliases.items():
+            if city in self.hotel_counts:
+                labels.extend((city, name, True) for name in names)
+
+        best = {}
+        for city, label, is_alias in labels:
+            key = normalize(label)
+            if not key:
+                continue
+            self._exact.setdefault(key, city)
+            words = key.split(" ")
+            for position in range(len(words)):
+                suffix = " ".join(words[position:])
+                for end in range(len(suffix) + 1):
+                    prefix = suffix[:end]
+                    rank = (not (position == 0 and end == len(suffix)), position > 0, is_alias,
+                            -self.hotel_counts[city], city)
+                    entries = best.setdefault(prefix, {})
+                    if city not in entries or rank < entries[city][0]:
+                        entries[city] = (rank, label)
+
+        self._prefixes = {
+            prefix: [{"city": city, "match": label, "hotels": self.hotel_counts[city]}
+                     for city, (_rank, label) in sorted(entries.items(), key=lambda item: item[1][0])[:MAX_SUGGESTIONS]]
+            for prefix, entries in best.items()
+        }
+
+    def __len__(self):
+        return len(self.hotel_counts)
+
+    def resolve(self, text):
+        """
+        Catalog city for a name or alias typed any way ("new york ", "NYC",
+        "Chicago, IL"), or None.
+        """
+        city = self._exact.get(normalize(text))
+        if city is None and "," in str(text or ""):
+            city = self._exact.get(normalize(str(text).split(",", 1)[0]))
+        return city
+
+    def suggest(self, prefix, limit=10):
+        """Up to `limit` {"city", "match", "hotels"} suggestions for what has been typed so far."""
+        return self._prefixes.get(normalize(prefix), [])[:limit]
@@ -0,0 +1,195 @@
+import gzip
+import json
+import os
+from datetime import date, datetime
+
+from flask import Response, request
+
+# orjson and msgpack are optional: without orjson bodies go through the
+# standard json module, and without msgpack every response is JSON.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+# Bodies smaller than this are sent uncompressed even when gzip is accepted;
+# below about a kilobyte the gzip header and CPU time are not worth it.
+GZIP_MIN_BYTES = int(os.getenv("RESPONSE_GZIP_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "5"))
+
+
+def _default(value):
+    # Datetimes as ISO strings; anything else (enums, exceptions in
+    # validation details) as its string form, as jsonify would fail on them.
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def dumps_json(body):
+    if orjson is not None:
+        return orjson.dumps(body, default=_default)
+    return json.dumps(body, separators=(",", ":"), default=_default).encode()
+
+
+def loads_json(content):
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _accepts(header, media_types):
+    """True if an Accept header lists one of `media_types` with a non-zero q."""
+    for part in (header or "").split(","):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        if media_type.lower() not in media_types:
+            continue
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def encode(body, accept="", accept_encoding="", gzip_min_bytes=GZIP_MIN_BYTES):
+    """
+    Serialize `body` for a client. Returns (payload, content_type,
+    content_encoding): MessagePack when the client accepts it and msgpack is
+    installed, JSON otherwise, gzipped when the client accepts gzip and the
+    payload is at least `gzip_min_bytes`. content_encoding is None when the
+    payload is not compressed.
+    """
+    if msgpack is not None and _accepts(accept, MSGPACK_TYPES):
+        payload, content_type = msgpack.packb(body, use_bin_type=True, default=_default), MSGPACK
+    else:
+        payload, content_type = dumps_json(body), JSON
+    if len(payload) >= gzip_min_bytes and _accepts(accept_encoding, ("gzip",)):
+        return gzip.compress(payload, compresslevel=GZIP_LEVEL), content_type, "gzip"
+    return payload, content_type, None
+
+
+def decode(content, content_type):
+    """Parse an (already decompressed) agent response body."""
+    if (content_type or "").split(";")[0].strip().lower() in MSGPACK_TYPES:
+        return msgpack.unpackb(content, raw=False)
+    return loads_json(content)
+
+
+def accept_header():
+    """Accept header for agent calls: MessagePack first when it can be decoded here."""
+    return f"{MSGPACK}, {JSON};q=0.9" if msgpack is not None else JSON
+
+
+# --- Field projection ---
+def parse_fields(value):
+    """
+    Field paths from a `fields` value: "a,b.c", ["a", "b.c"] or already
+    parsed tuples.
+    Returns None when no projection was asked for.
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    paths = [path if isinstance(path, tuple) else tuple(part for part in str(path).strip().split(".") if part)
+             for path in value]
+    return [path for path in paths if path] or None
+
+
+def _field_tree(paths):
+    # {"arrival": {"time": {}}}; an empty dict means "the whole value".
+    tree = {}
+    for path in paths:
+        node = tree
+        for i, key in enumerate(path):
+            if key in node and not node[key]:
+                break
+            node = node.setdefault(key, {})
+            if i == len(path) - 1:
+                node.clear()
+    return tree
+
+
+def _project(value, tree):
+    if isinstance(value, list):
+        return [_project(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {key: (_project(value[key], subtree) if subtree else value[key])
+            for key, subtree in tree.items() if key in value}
+
+
+def project(records, fields):
+    """
+    Keep only the dotted `fields` of each record (or of a single dict).
+    Lists are projected element-wise at any depth; missing fields are skipped.
+    """
+    paths = parse_fields(fields)
+    if paths is None:
+        return records
+    return _project(records, _field_tree(paths))
+
+
+def project_collection(body, collection, fields):
+    """Project the records under the dotted `collection` key of `body`, leaving the envelope as is."""
+    paths = parse_fields(fields)
+    if paths is None or not isinstance(body, dict):
+        return body
+    keys = collection.split(".")
+    parent = body
+    for key in keys[:-1]:
+        if not isinstance(parent.get(key), dict):
+            return body
+        parent = parent[key]
+    if keys[-1] not in parent:
+        return body
+    # Copy only the path down to the collection so the caller's dicts are untouched.
+    projected = dict(body)
+    node = projected
+    for key in keys[:-1]:
+        node[key] = dict(node[key])
+        node = node[key]
+    node[keys[-1]] = project(parent[keys[-1]], paths)
+    return projected
+
+
+def requested_fields(payload=None):
+    """`fields` from the query string, or else from the JSON request body."""
+    fields = request.args.get("fields")
+    if fields is None and isinstance(payload, dict):
+        fields = payload.get("fields")
+    return fields
+
+
+def respond(body, status=200, collection=None, payload=None):
+    """
+    Build a Flask response for `body`, negotiated from the request's Accept
+    and Accept-Encoding headers. When the request asks for `fields`, the
+    records under `collection` (or the whole body when collection is None)
+    are projected to them. `payload` is the parsed request body, for
+    POST endpoints that take `fields` there.
+    """
+    fields = requested_fields(payload)
+    if fields:
+        body = project_collection(body, collection, fields) if collection else project(body, fields)
+    content, content_type, content_encoding = encode(
+        body, request.headers.get("Accept", ""), request.headers.get("Accept-Encoding", "")
+    )
+    response = Response(content, status=status, content_type=content_type)
+    if content_encoding:
+        response.headers["Content-Encoding"] = content_encoding
+    response.headers["Vary"] = "Accept, Accept-Encoding"
+    return response
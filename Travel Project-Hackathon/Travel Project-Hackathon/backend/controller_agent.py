@@ -1,15 +1,31 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+import contextvars
+import json
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
 from datetime import datetime, timedelta
+from pipeline import Stage, StageFailed, run_stages, make_executor
+from agent_client import AgentClient
+from transport import make_transport
+from itinerary_store import ItineraryStore
+from booking_jobs import BookingJobQueue, parse_concurrency
+from itinerary_optimizer import rank_itineraries
+from city_lookup import normalize as normalize_city
+import telemetry
+import lazy_init
 from hotel_agent import handle_prompt
 from flight_agent import handle_flight_prompt
-from cab_agent import handle_cab_prompt
+from cab_agent import handle_cab_prompt, MOCK_LOCATIONS
 
 app = Flask(__name__)
+telemetry.install(app, "controller")
 
-FLIGHT_AGENT_URL = "http://localhost:5001/flights/search"
-HOTEL_AGENT_URL = "http://localhost:5000/hotels"
-CAB_AGENT_URL = "http://localhost:5002/cabs/book"
+FLIGHT_AGENT_URL = os.getenv("FLIGHT_AGENT_URL", "http://localhost:5001/flights/search")
+HOTEL_AGENT_URL = os.getenv("HOTEL_AGENT_URL", "http://localhost:5000/hotels")
+CITY_SUGGEST_URL = os.getenv("CITY_SUGGEST_URL", HOTEL_AGENT_URL.rstrip("/") + "/cities/suggest")
+CAB_AGENT_URL = os.getenv("CAB_AGENT_URL", "http://localhost:5002/cabs/book")
 
 IATA_TO_FULL_AIRPORT_NAME = {
     "HYD": "Hyderabad Airport (HYD)",
@@ -28,104 +44,580 @@ IATA_TO_FULL_AIRPORT_NAME = {
     "ADD": "Bole International",
 }
 
-latest_itinerary = {}
+# "concurrent" overlaps the flight and hotel lookups, "sequential" runs the
+# stages one after another (useful when debugging a single agent).
+PLAN_EXECUTION_MODE = os.getenv("PLAN_EXECUTION_MODE", "concurrent")
+stage_executor = make_executor(max_workers=int(os.getenv("PLAN_STAGE_WORKERS", "8")))
+# Batch itineraries and streamed plans wait on stages running in
+# stage_executor, so they get their own pool to avoid starving it.
+batch_executor = ThreadPoolExecutor(max_workers=int(os.getenv("PLAN_BATCH_WORKERS", "8")),
+                                    thread_name_prefix="plan-batch")
+# How many ranked flight + hotel combinations to return under "alternatives".
+PLAN_TOP_K = int(os.getenv("PLAN_TOP_K", "5"))
+# How many hotels the hotel agent returns for the optimizer to rank.
+PLAN_HOTEL_CANDIDATES = int(os.getenv("PLAN_HOTEL_CANDIDATES", "200"))
+# Ask for the hotels nearest the arrival airport (when its coordinates are
+# known) rather than the first in catalog order. hoteldetails.radius_km, when
+# given, also drops hotels farther than that from the airport.
+PLAN_HOTELS_NEAR_AIRPORT = os.getenv("PLAN_HOTELS_NEAR_AIRPORT", "1") == "1"
+
+# --- Agent clients ---
+# One keep-alive pool per agent, with connect/read timeouts so a slow agent
+# cannot hang a controller worker. Read timeouts leave room for the agent's
+# own upstream calls (aviationstack for flights, Gemini for cabs).
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "10"))
+AGENT_CONNECT_TIMEOUT = float(os.getenv("AGENT_CONNECT_TIMEOUT", "3.05"))
+AGENT_MAX_RETRIES = int(os.getenv("AGENT_MAX_RETRIES", "2"))
+
+agent_clients = {
+    "flight": AgentClient("flight", FLIGHT_AGENT_URL, pool_size=AGENT_POOL_SIZE,
+                          connect_timeout=AGENT_CONNECT_TIMEOUT,
+                          read_timeout=float(os.getenv("FLIGHT_AGENT_READ_TIMEOUT", "35")),
+                          max_retries=AGENT_MAX_RETRIES),
+    "hotel": AgentClient("hotel", HOTEL_AGENT_URL, pool_size=AGENT_POOL_SIZE,
+                         connect_timeout=AGENT_CONNECT_TIMEOUT,
+                         read_timeout=float(os.getenv("HOTEL_AGENT_READ_TIMEOUT", "10")),
+                         max_retries=AGENT_MAX_RETRIES),
+    "city_suggest": AgentClient("city_suggest", CITY_SUGGEST_URL, pool_size=AGENT_POOL_SIZE,
+                                connect_timeout=AGENT_CONNECT_TIMEOUT,
+                                read_timeout=float(os.getenv("HOTEL_AGENT_READ_TIMEOUT", "10")),
+                                max_retries=AGENT_MAX_RETRIES),
+    "cab": AgentClient("cab", CAB_AGENT_URL, pool_size=AGENT_POOL_SIZE,
+                       connect_timeout=AGENT_CONNECT_TIMEOUT,
+                       read_timeout=float(os.getenv("CAB_AGENT_READ_TIMEOUT", "60")),
+                       max_retries=AGENT_MAX_RETRIES),
+}
+
+class AgentPoolMetrics:
+    """Publishes the agent connection pool stats on /metrics."""
+    def render(self):
+        lines = [
+            "# HELP agent_pool_connections Connections per agent pool by state.",
+            "# TYPE agent_pool_connections gauge",
+        ]
+        stats = {name: client.metrics() for name, client in agent_clients.items()}
+        for name, m in stats.items():
+            lines.append(f'agent_pool_connections{{agent="{name}",state="in_use"}} {m["in_use"]}')
+            lines.append(f'agent_pool_connections{{agent="{name}",state="idle"}} {m["idle"]}')
+        lines += [
+            "# HELP agent_pool_wait_seconds_total Time spent waiting for a pooled connection.",
+            "# TYPE agent_pool_wait_seconds_total counter",
+        ]
+        for name, m in stats.items():
+            lines.append(f'agent_pool_wait_seconds_total{{agent="{name}"}} {m["wait_time_total_ms"] / 1000}')
+        lines += [
+            "# HELP agent_pool_retries_total Retried agent calls.",
+            "# TYPE agent_pool_retries_total counter",
+        ]
+        for name, m in stats.items():
+            lines.append(f'agent_pool_retries_total{{agent="{name}"}} {m["retries"]}')
+        return lines
+
+
+telemetry.register(AgentPoolMetrics())
+
+# Only the fields the controller reads (optimizer, cab stage, prompts and
+# the itinerary shown in the UI) are requested from the flight and hotel
+# agents. Set either to an empty string to receive every field.
+FLIGHT_RESULT_FIELDS = os.getenv(
+    "FLIGHT_RESULT_FIELDS",
+    "flight_number,airline,status,duration,price,departure.airport,departure.time,arrival.airport,arrival.time"
+)
+HOTEL_RESULT_FIELDS = os.getenv(
+    "HOTEL_RESULT_FIELDS",
+    "name,address,rating,price_range,checkin_date,checkout_date,lat,lng,distance_km"
+)
+
+# Cab pickup window relative to flight arrival, in minutes.
+CAB_DEPLANING_BUFFER_MINUTES = int(os.getenv("CAB_DEPLANING_BUFFER_MINUTES", "20"))
+CAB_MIN_PICKUP_DELAY_MINUTES = int(os.getenv("CAB_MIN_PICKUP_DELAY_MINUTES", "10"))
+CAB_MAX_PICKUP_DELAY_MINUTES = int(os.getenv("CAB_MAX_PICKUP_DELAY_MINUTES", "60"))
+
+# "http" reaches the agents over the pools above; "inprocess" calls the agent
+# functions directly, for single-node deployments and tests.
+AGENT_TRANSPORT = os.getenv("AGENT_TRANSPORT", "http")
+transport = make_transport(AGENT_TRANSPORT, agent_clients)
+
+# With the in-process transport the controller serves agent calls itself, so
+# its readiness covers the agents' lazily built datasets and Gemini client.
+warm_resources = lazy_init.all_resources() if AGENT_TRANSPORT == "inprocess" else []
+lazy_init.install(app, "controller", warm_resources)
+
+# Itineraries are kept in a local SQLite file (WAL mode) so every controller
+# worker sees them and they survive restarts.
+ITINERARY_DB_PATH = os.getenv("ITINERARY_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "itineraries.db"))
+itinerary_store = ItineraryStore(ITINERARY_DB_PATH, cache_size=int(os.getenv("ITINERARY_CACHE_SIZE", "1024")))
+
+# Booking automations run off the request path; BOOKING_CONCURRENCY caps how
+# many jobs run at once per provider. Job status is kept next to the
+# itineraries, so any worker can report it.
+booking_jobs = BookingJobQueue(
+    parse_concurrency(os.getenv("BOOKING_CONCURRENCY", "hotel=2,flight=2,cab=2")),
+    ITINERARY_DB_PATH,
+    max_attempts=int(os.getenv("BOOKING_MAX_ATTEMPTS", "3")),
+    retry_backoff=float(os.getenv("BOOKING_RETRY_BACKOFF", "1.0")),
+    stale_after=float(os.getenv("BOOKING_JOB_STALE_SECONDS", "3600"))
+)
+
+class PlanningError(Exception):
+    """A planning failure that should be reported to the caller as-is."""
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def call_agent(agent, payload, idempotent=False):
+    """
+    Send `payload` to an agent over the configured transport and return the
+    response body. Searches are idempotent and may be retried; bookings are not.
+    """
+    try:
+        with telemetry.span(f"{agent}_agent"):
+            return transport.call(agent, payload, idempotent=idempotent)
+    except requests.exceptions.Timeout:
+        raise PlanningError(f"The {agent} agent timed out.", 504)
+    except requests.exceptions.RequestException as e:
+        raise PlanningError(f"The {agent} agent is unavailable: {str(e)}", 502)
+
+
+# --- Plan stages ---
+# Each stage takes the results of the stages it depends on. Flight and hotel
+# lookups are independent, so in concurrent mode they run side by side; the
+# optimizer ranks their combined candidates and the cab stage books the ride
+# for the winning pair.
+def flight_stage(flight_details):
+    flight_payload = {
+        "source": flight_details["source"],
+        "destination": flight_details["destination"],
+        "until_date": flight_details["until_date"],
+        "airline": flight_details.get("airline", "")
+    }
+    if FLIGHT_RESULT_FIELDS:
+        flight_payload["fields"] = FLIGHT_RESULT_FIELDS
+
+    flight_response = call_agent("flight", flight_payload, idempotent=True)
+    if flight_response.get("status") != "success" or not flight_response.get("flights"):
+        raise PlanningError("No valid flights found.")
+
+    return flight_response["flights"]
+
+
+def hotel_filters(hotel_details):
+    """
+    Budget and rating filters for the hotel agent. The Re-Plan form's
+    hotel_budget_range is a nightly maximum.
+    """
+    filters = {name: hotel_details[name] for name in ("min_price", "max_price", "min_rating")
+               if hotel_details.get(name) not in (None, "")}
+    if "max_price" not in filters and hotel_details.get("hotel_budget_range") not in (None, ""):
+        filters["max_price"] = hotel_details["hotel_budget_range"]
+    return filters
+
+
+def arrival_airport(flight_details):
+    """{"lat", "lng"} of the destination airport, or None when it is not mapped."""
+    airport_name = IATA_TO_FULL_AIRPORT_NAME.get(flight_details["destination"].strip().upper())
+    return MOCK_LOCATIONS.get(airport_name)
+
+
+def hotel_location(hotel_details, flight_details):
+    """`near` and `radius_km` for the hotel agent: the arrival airport, when it is known."""
+    airport = arrival_airport(flight_details) if PLAN_HOTELS_NEAR_AIRPORT else None
+    if not airport:
+        return {}
+    location = {"near": f"{airport['lat']},{airport['lng']}"}
+    if hotel_details.get("radius_km") not in (None, ""):
+        location["radius_km"] = hotel_details["radius_km"]
+    return location
+
+
+def hotel_stage(hotel_details, location=None):
+    hotel_payload = {
+        "cityname": hotel_details["cityname"],
+        "num_of_rooms": hotel_details["num_of_rooms"],
+        "checkin_date": hotel_details["checkin_date"],
+        "checkout_date": hotel_details["checkout_date"],
+        "limit": PLAN_HOTEL_CANDIDATES,
+        **hotel_filters(hotel_details),
+        **(location or {})
+    }
+    if HOTEL_RESULT_FIELDS:
+        hotel_payload["fields"] = HOTEL_RESULT_FIELDS
+
+    hotel_response = call_agent("hotel", hotel_payload, idempotent=True)
+    if hotel_response.get("error"):
+        raise PlanningError(f"Hotel search failed: {hotel_response['error']}")
+    if not hotel_response.get("hotels"):
+        if location and "radius_km" in location:
+            raise PlanningError(f"No hotels in the selected city within {location['radius_km']} km of the arrival airport.")
+        if hotel_filters(hotel_details):
+            raise PlanningError("No hotels in the selected city match the budget or rating.")
+        raise PlanningError("No hotels found for the selected city.")
+
+    return hotel_response["hotels"]
+
+
+def optimize_stage(flights, hotels, flight_details, hotel_details, top_k=PLAN_TOP_K):
+    """
+    Rank flight × hotel combinations (see itinerary_optimizer) and return the
+    best pair plus the top-k alternatives with their scores.
+    """
+    try:
+        ranked, stats = rank_itineraries(
+            flights, hotels,
+            checkin_date=hotel_details["checkin_date"],
+            checkout_date=hotel_details.get("checkout_date"),
+            num_rooms=hotel_details.get("num_of_rooms") or 1,
+            airport=arrival_airport(flight_details),
+            top_k=top_k
+        )
+    except ValueError:
+        raise PlanningError("Invalid check-in or check-out date. Use YYYY-MM-DD.")
+    if not ranked:
+        raise PlanningError("No flights with a scheduled arrival time.")
+
+    # Batch plans share hotel searches, so the room count comes from this plan.
+    def pick(entry):
+        return {
+            "flight": flights[entry["flight_index"]],
+            "hotel": {**hotels[entry["hotel_index"]], "num_of_rooms": hotel_details["num_of_rooms"]},
+        }
+
+    alternatives = [
+        {"rank": rank, "score": entry["score"], "breakdown": entry["breakdown"], **pick(entry)}
+        for rank, entry in enumerate(ranked, start=1)
+    ]
+    return {**pick(ranked[0]), "alternatives": alternatives, "optimizer": stats}
+
+
+def cab_stage(selected_flight, selected_hotel, cab_details):
+    flight_arrival_time = selected_flight["arrival"]["time"]
+    destination_airport_iata = selected_flight["arrival"]["airport"]
+    destination_airport_for_cab = IATA_TO_FULL_AIRPORT_NAME.get(destination_airport_iata, destination_airport_iata)
+
+    hotel_name = selected_hotel.get("name", "Hotel Near Destination")
+    hotel_address = selected_hotel.get("address", "Some Street, Some City")
+
+    # The cab agent picks a driver whose pickup lands inside this window, so
+    # there is no second booking round-trip when the first pickup is too early.
+    arrival_time = datetime.fromisoformat(flight_arrival_time.replace("Z", "+00:00"))
+    cab_payload = {
+        "scheduled": flight_arrival_time,
+        "airport": destination_airport_for_cab,
+        "num_passengers": cab_details["num_passengers"],
+        "cab_drop_location": f"{hotel_name}, {hotel_address}",
+        "ride_type": cab_details.get("ride_type"),
+        "user_prefs": cab_details.get("user_prefs"),
+        "deplaning_buffer_minutes": CAB_DEPLANING_BUFFER_MINUTES,
+        "earliest_pickup": (arrival_time + timedelta(minutes=CAB_MIN_PICKUP_DELAY_MINUTES)).isoformat(),
+        "latest_pickup": (arrival_time + timedelta(minutes=CAB_MAX_PICKUP_DELAY_MINUTES)).isoformat()
+    }
+
+    cab_response = call_agent("cab", cab_payload)
+    if cab_response.get("error"):
+        raise PlanningError(f"Cab booking failed: {cab_response['error']}")
+    if not cab_response.get("pickup_time"):
+        raise PlanningError("No cab pickup could be scheduled.")
+
+    return cab_response
+
+
+def build_plan_stages(flight_details, hotel_details, cab_details, top_k=PLAN_TOP_K):
+    return [
+        Stage("flight", lambda _: flight_stage(flight_details)),
+        Stage("hotel", lambda _: hotel_stage(hotel_details, hotel_location(hotel_details, flight_details))),
+        Stage("optimize", lambda deps: optimize_stage(deps["flight"], deps["hotel"], flight_details,
+                                                      hotel_details, top_k),
+              depends_on=("flight", "hotel")),
+        Stage("cab", lambda deps: cab_stage(deps["optimize"]["flight"], deps["optimize"]["hotel"], cab_details),
+              depends_on=("optimize",)),
+    ]
+
+
+def assemble_itinerary(user_details, results):
+    selection = results["optimize"]
+    return {
+        "user": user_details,
+        "flight": selection["flight"],
+        "hotel": selection["hotel"],
+        "cab": results["cab"],
+        "alternatives": selection["alternatives"],
+        "optimizer": selection["optimizer"]
+    }
+
 
 @app.route('/travel/plan', methods=['POST'])
 def plan_travel():
     try:
         data = request.get_json()
-        print(data)
         user_details = data.get("userdetails")
         flight_details = data.get("flightdetails")
         hotel_details = data.get("hoteldetails")
         cab_details = data.get("cabdetails")
+        execution_mode = data.get("execution_mode", PLAN_EXECUTION_MODE)
+        top_k = int(data.get("top_k", PLAN_TOP_K))
+
+        try:
+            results, timings = run_stages(
+                build_plan_stages(flight_details, hotel_details, cab_details, top_k),
+                mode=execution_mode,
+                executor=stage_executor
+            )
+        except StageFailed as failure:
+            if isinstance(failure.error, PlanningError):
+                return jsonify({"error": failure.error.message, "timings": failure.timings}), failure.error.status_code
+            raise failure.error
 
-        # --- Step 1: Flight Agent ---
-        flight_payload = {
-            "source": flight_details["source"],
-            "destination": flight_details["destination"],
-            "until_date": flight_details["until_date"],
-            "airline": flight_details.get("airline", "")
-        }
+        # Final itinerary response
+        itinerary = assemble_itinerary(user_details, results)
+        itinerary_id, job_ids = finalize_itinerary(itinerary, cab_details)
+        return jsonify({"itinerary_id": itinerary_id, **itinerary, "timings": timings,
+                        "booking_jobs": job_ids}), 200
 
-        flight_response = requests.post(FLIGHT_AGENT_URL, json=flight_payload).json()
-        if flight_response.get("status") != "success" or not flight_response.get("flights"):
-            return jsonify({"error": "No valid flights found."}), 400
-
-        selected_flight = flight_response["flights"][0]
-        flight_arrival_time = selected_flight["arrival"]["time"]
-        destination_airport_iata = selected_flight["arrival"]["airport"]
-        destination_airport_for_cab = IATA_TO_FULL_AIRPORT_NAME.get(destination_airport_iata, destination_airport_iata)
-
-        # --- Step 2: Hotel Agent ---
-        hotel_payload = {
-            "cityname": hotel_details["cityname"],
-            "num_of_rooms": hotel_details["num_of_rooms"],
-            "checkin_date": hotel_details["checkin_date"],
-            "checkout_date": hotel_details["checkout_date"]
-        }
+    except Exception as e:
+        return jsonify({"error": f"Failed to process travel plan: {str(e)}"}), 500
 
-        hotel_response = requests.post(HOTEL_AGENT_URL, json=hotel_payload).json()
-        if not hotel_response.get("hotels"):
-            return jsonify({"error": "No hotels found for the selected city."}), 400
-
-        selected_hotel = hotel_response["hotels"][0]
-        hotel_name = selected_hotel.get("hotelname", "Hotel Near Destination")
-        hotel_address = selected_hotel.get("address", "Some Street, Some City")
-        drop_location = selected_hotel.get("location", {"lat": 34.0522, "lng": -118.2437})
-
-        # --- Step 3: Cab Agent ---
-        cab_payload = {
-            "scheduled": flight_arrival_time,
-            "airport": destination_airport_for_cab,
-            "num_passengers": cab_details["num_passengers"],
-            "cab_drop_location": f"{hotel_name}, {hotel_address}",
-            "ride_type": cab_details.get("ride_type"),
-            "user_prefs": cab_details.get("user_prefs")
-        }
 
-        cab_response = requests.post(CAB_AGENT_URL, json=cab_payload).json()
-        pickup_time_str = cab_response.get("pickup_time")
+def finalize_itinerary(itinerary, cab_details):
+    """
+    Store the itinerary and queue its booking automations.
+    Returns (itinerary_id, booking_job_ids). The user's password is only
+    needed for the prompts and is never written to the store.
+    """
+    user = {k: v for k, v in (itinerary.get("user") or {}).items() if k != "password"}
+    itinerary_id = itinerary_store.save({**itinerary, "user": user})
 
-        if not pickup_time_str:
-            pickup_time_str = (datetime.fromisoformat(flight_arrival_time.replace("Z", "+00:00")) + timedelta(minutes=15)).isoformat()
+    job_ids = [
+        booking_jobs.submit("hotel", run_hotel_booking, itinerary, itinerary_id=itinerary_id),
+        booking_jobs.submit("flight", run_flight_booking, itinerary, cab_details, itinerary_id=itinerary_id),
+        booking_jobs.submit("cab", run_cab_booking, itinerary, itinerary_id=itinerary_id),
+    ]
+    return itinerary_id, job_ids
 
-        pickup_time = datetime.fromisoformat(pickup_time_str)
-        arrival_time = datetime.fromisoformat(flight_arrival_time.replace("Z", "+00:00"))
 
-        if pickup_time < arrival_time + timedelta(minutes=10):
-            cab_payload["scheduled"] = (arrival_time + timedelta(minutes=20)).isoformat()
-            cab_response = requests.post(CAB_AGENT_URL, json=cab_payload).json()
+def run_hotel_booking(itinerary):
+    handle_prompt(generate_hotel_prompt(itinerary))
 
-        # Final itinerary response
-        itinerary = {
-            "user": user_details,
-            "flight": selected_flight,
-            "hotel": selected_hotel,
-            "cab": cab_response
-        }
-        json_=jsonify({
 
-            "user": user_details,
+def run_flight_booking(itinerary, cab_details):
+    handle_flight_prompt(generate_flight_prompt(itinerary, cab_details))
+
 
-            "flight": selected_flight,
+def run_cab_booking(itinerary):
+    handle_cab_prompt(generate_cab_prompt(itinerary))
 
-            "hotel": selected_hotel,
 
-            "cab": cab_response
+# --- Batch planning ---
+# Group and cohort trips usually share routes and cities. Identical flight
+# and hotel searches are run once, in parallel, and every itinerary that
+# needs them waits on the shared result.
+def flight_search_key(flight_details):
+    return (
+        flight_details["source"].strip().upper(),
+        flight_details["destination"].strip().upper(),
+        flight_details.get("airline", "").strip().lower(),
+        flight_details["until_date"].strip()
+    )
 
-        })
-        handle_prompt(generate_hotel_prompt(itinerary))
-        handle_flight_prompt(generate_flight_prompt(itinerary, cab_details))
-        handle_cab_prompt(generate_cab_prompt(itinerary))
 
-        global latest_itinerary
-        latest_itinerary = itinerary
-        print(itinerary)
-        return jsonify(itinerary), 200
+def city_resolver():
+    """
+    A function mapping a typed city name to the hotel agent's catalog city
+    ("NYC" and "new york " both give "New York"), asked once per distinct
+    normalized name through the city_suggest call. Cities the agent does not
+    know, or cannot be asked about, map to their normalized name.
+    """
+    cities = {}
+
+    def resolve(cityname):
+        key = normalize_city(cityname)
+        if key not in cities:
+            try:
+                body = call_agent("city_suggest", {"q": cityname, "limit": 1}, idempotent=True)
+            except PlanningError:
+                body = {}
+            cities[key] = body.get("city") or key
+        return cities[key]
+    return resolve
+
+
+def hotel_search_key(hotel_details, location=None, resolve_city=normalize_city):
+    return (
+        resolve_city(hotel_details["cityname"]),
+        hotel_details["checkin_date"],
+        hotel_details["checkout_date"],
+        tuple(sorted(hotel_filters(hotel_details).items())),
+        tuple(sorted((location or {}).items()))
+    )
+
 
+def plan_from_shared_lookups(plan, flight_lookup, hotel_lookup):
+    """Assemble one batch itinerary once its shared lookups are done."""
+    cab_details = plan.get("cabdetails")
+    top_k = int(plan.get("top_k", PLAN_TOP_K))
+    stages = [
+        Stage("flight", lambda _: flight_lookup.result()),
+        Stage("hotel", lambda _: hotel_lookup.result()),
+        Stage("optimize", lambda deps: optimize_stage(deps["flight"], deps["hotel"], plan["flightdetails"],
+                                                      plan["hoteldetails"], top_k),
+              depends_on=("flight", "hotel")),
+        Stage("cab", lambda deps: cab_stage(deps["optimize"]["flight"], deps["optimize"]["hotel"], cab_details),
+              depends_on=("optimize",)),
+    ]
+    results, timings = run_stages(stages, mode="sequential")
+    itinerary = assemble_itinerary(plan.get("userdetails"), results)
+    itinerary_id, job_ids = finalize_itinerary(itinerary, cab_details)
+    return {"itinerary_id": itinerary_id, **itinerary, "timings": timings, "booking_jobs": job_ids}
+
+
+def describe_failure(failure):
+    """Return (message, status_code) for a failed stage run."""
+    if isinstance(failure.error, PlanningError):
+        return failure.error.message, failure.error.status_code
+    return f"Failed to process travel plan: {str(failure.error)}", 500
+
+
+def batch_result_line(index, future):
+    try:
+        return {"index": index, "status": "success", "itinerary": future.result()}
+    except StageFailed as failure:
+        error, _status = describe_failure(failure)
+        return {"index": index, "status": "error", "error": error, "timings": failure.timings}
     except Exception as e:
-        return jsonify({"error": f"Failed to process travel plan: {str(e)}"}), 500
+        return {"index": index, "status": "error", "error": f"Failed to process travel plan: {str(e)}"}
+
+
+@app.route('/travel/plan/batch', methods=['POST'])
+def plan_travel_batch():
+    """
+    Plan several itineraries in one call. Body: {"plans": [<plan>, ...]} where
+    each plan has the same shape as a /travel/plan request. Results are
+    streamed back as NDJSON, one line per itinerary in completion order,
+    followed by a summary line.
+    """
+    data = request.get_json(silent=True) or {}
+    plans = data.get("plans") if isinstance(data, dict) else data
+    if not isinstance(plans, list) or not plans:
+        return jsonify({"error": "Expected a non-empty list of plans under 'plans'."}), 400
+
+    flight_lookups, hotel_lookups = {}, {}
+    pending, rejected = {}, []
+    resolve_city = city_resolver()
+    for index, plan in enumerate(plans):
+        try:
+            flight_key = flight_search_key(plan["flightdetails"])
+            hotel_location_params = hotel_location(plan["hoteldetails"], plan["flightdetails"])
+            hotel_key = hotel_search_key(plan["hoteldetails"], hotel_location_params, resolve_city)
+        except (KeyError, TypeError, AttributeError) as e:
+            rejected.append({"index": index, "status": "error", "error": f"Invalid plan request: missing {str(e)}"})
+            continue
+        if flight_key not in flight_lookups:
+            flight_lookups[flight_key] = stage_executor.submit(contextvars.copy_context().run, flight_stage, plan["flightdetails"])
+        if hotel_key not in hotel_lookups:
+            hotel_lookups[hotel_key] = stage_executor.submit(contextvars.copy_context().run, hotel_stage, plan["hoteldetails"],
+                                                             hotel_location_params)
+        future = batch_executor.submit(contextvars.copy_context().run, plan_from_shared_lookups, plan,
+                                       flight_lookups[flight_key], hotel_lookups[hotel_key])
+        pending[future] = index
+
+    def generate():
+        succeeded = 0
+        for line in rejected:
+            yield json.dumps(line) + "\n"
+        for future in as_completed(pending):
+            line = batch_result_line(pending[future], future)
+            succeeded += line["status"] == "success"
+            yield json.dumps(line) + "\n"
+        yield json.dumps({
+            "done": True,
+            "count": len(plans),
+            "succeeded": succeeded,
+            "unique_flight_searches": len(flight_lookups),
+            "unique_hotel_searches": len(hotel_lookups)
+        }) + "\n"
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
+
+# --- Streaming plan progress ---
+def stage_events(name, result, timing):
+    """
+    Progress events for a finished stage. The lookups report how many
+    candidates they found; the optimizer's pick is announced as
+    flight_selected and hotel_selected.
+    """
+    if name in ("flight", "hotel"):
+        return [{"event": f"{name}s_found", "stage": name, "count": len(result), "timing": timing}]
+    if name == "optimize":
+        return [
+            {"event": "flight_selected", "stage": name, "result": result["flight"], "timing": timing},
+            {"event": "hotel_selected", "stage": name, "result": result["hotel"], "timing": timing},
+        ]
+    return [{"event": "cab_booked", "stage": name, "result": result, "timing": timing}]
+
+
+def format_event(event, sse):
+    if sse:
+        return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+    return json.dumps(event) + "\n"
+
+
+@app.route('/travel/plan/stream', methods=['POST'])
+def plan_travel_stream():
+    """
+    Same input as /travel/plan, but each stage result is streamed as soon as
+    it is ready: flights_found, hotels_found, flight_selected, hotel_selected,
+    cab_booked, then a final itinerary event (or an error event naming the failed stage). Responds
+    with Server-Sent Events when the client accepts text/event-stream and
+    NDJSON otherwise.
+    """
+    data = request.get_json(silent=True) or {}
+    sections = ("userdetails", "flightdetails", "hoteldetails", "cabdetails")
+    if not all(data.get(section) for section in sections):
+        return jsonify({"error": f"Missing one of: {', '.join(sections)}"}), 400
+
+    sse = "text/event-stream" in request.headers.get("Accept", "")
+    cab_details = data["cabdetails"]
+    events = queue.Queue()
+
+    def stage_done(name, result, timing):
+        for event in stage_events(name, result, timing):
+            events.put(event)
+
+    def run():
+        try:
+            results, timings = run_stages(
+                build_plan_stages(data["flightdetails"], data["hoteldetails"], cab_details,
+                                  int(data.get("top_k", PLAN_TOP_K))),
+                mode=data.get("execution_mode", PLAN_EXECUTION_MODE),
+                executor=stage_executor,
+                on_stage_done=stage_done
+            )
+            itinerary = assemble_itinerary(data["userdetails"], results)
+            itinerary_id, job_ids = finalize_itinerary(itinerary, cab_details)
+            events.put({"event": "itinerary", "itinerary": {"itinerary_id": itinerary_id, **itinerary},
+                        "timings": timings, "booking_jobs": job_ids})
+        except StageFailed as failure:
+            error, status_code = describe_failure(failure)
+            events.put({"event": "error", "stage": failure.stage, "error": error,
+                        "status_code": status_code, "timings": failure.timings})
+        except Exception as e:
+            events.put({"event": "error", "error": f"Failed to process travel plan: {str(e)}", "status_code": 500})
+        finally:
+            events.put(None)
+
+    batch_executor.submit(contextvars.copy_context().run, run)
+
+    def generate():
+        while True:
+            event = events.get()
+            if event is None:
+                return
+            yield format_event(event, sse)
+
+    return Response(generate(), mimetype="text/event-stream" if sse else "application/x-ndjson")
+
 
 def generate_hotel_prompt(data):
     hotel = data['hotel']
@@ -193,10 +685,68 @@ def generate_cab_prompt(data):
 
 @app.route('/travel/itinerary/latest', methods=['GET'])
 def get_latest_itinerary():
-    if not latest_itinerary:
+    """Most recent itinerary overall, or for one user with ?email=."""
+    itinerary = itinerary_store.latest(request.args.get("email"))
+    if not itinerary:
         return jsonify({"message": "No itinerary generated yet."}), 404
-    return jsonify(latest_itinerary)
+    return jsonify(itinerary)
+
+
+@app.route('/travel/itinerary/<itinerary_id>', methods=['GET'])
+def get_itinerary(itinerary_id):
+    itinerary = itinerary_store.get(itinerary_id)
+    if not itinerary:
+        return jsonify({"message": f"Itinerary '{itinerary_id}' not found."}), 404
+    return jsonify(itinerary)
+
+
+@app.route('/travel/itineraries', methods=['GET'])
+def list_itineraries():
+    """Page through a user's itineraries: ?email=...&limit=20&cursor=..."""
+    email = request.args.get("email")
+    if not email:
+        return jsonify({"error": "The 'email' query parameter is required."}), 400
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), 100)
+        itineraries, next_cursor = itinerary_store.list_for_user(email, limit=limit, cursor=request.args.get("cursor"))
+    except ValueError:
+        return jsonify({"error": "Invalid 'limit' or 'cursor'."}), 400
+    return jsonify({"itineraries": itineraries, "next_cursor": next_cursor})
+
+
+
+@app.route('/travel/jobs/<job_id>', methods=['GET'])
+def get_booking_job(job_id):
+    job = booking_jobs.get(job_id)
+    if not job:
+        return jsonify({"message": f"Booking job '{job_id}' not found."}), 404
+    return jsonify(job)
+
+
+@app.route('/travel/itinerary/<itinerary_id>/jobs', methods=['GET'])
+def get_itinerary_jobs(itinerary_id):
+    return jsonify({"itinerary_id": itinerary_id, "jobs": booking_jobs.for_itinerary(itinerary_id)})
+
+
+@app.route('/travel/jobs', methods=['GET'])
+def booking_job_stats():
+    return jsonify(booking_jobs.stats())
+
+
+@app.route('/travel/cities/suggest', methods=['GET'])
+def suggest_cities():
+    """City autocomplete from the hotel agent, so the frontend only talks to the controller."""
+    try:
+        body = call_agent("city_suggest", {"q": request.args.get("q", ""), "limit": request.args.get("limit", 10)},
+                          idempotent=True)
+    except PlanningError as e:
+        return jsonify({"error": e.message}), e.status_code
+    return jsonify(body), (400 if body.get("error") else 200)
+
 
+@app.route('/travel/agents/pools', methods=['GET'])
+def agent_pool_metrics():
+    return jsonify({name: client.metrics() for name, client in agent_clients.items()})
 
 
 @app.route('/travel/health', methods=['GET'])
@@ -205,6 +755,7 @@ def health():
 
 
 if __name__ == '__main__':
+    lazy_init.warm_up(warm_resources, background=True)
     app.run(port=5004, debug=True)
 
 
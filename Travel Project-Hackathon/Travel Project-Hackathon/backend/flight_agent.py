@@ -1,61 +1,361 @@
-from flask import Flask, request, jsonify
-from datetime import datetime
+from flask import Flask, request
+from datetime import datetime, timezone
+import os
+import contextvars
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+import sqlite3
 import requests
+import telemetry
+import lazy_init
+from codec import respond
+from ttl_cache import TTLCache
+from single_flight import SingleFlight
+from flight_store import FlightStore
+from rate_limiter import QuotaLimiter, QuotaExceeded
  
 app = Flask(__name__)
+telemetry.install(app, "flight")
+# Nothing to build up front; /ready is here so every service answers it.
+lazy_init.install(app, "flight", [])
  
-API_KEY = "98393e02b2422dc99abf81520b7e36db"
+API_KEY = os.getenv("AVIATIONSTACK_API_KEY", "98393e02b2422dc99abf81520b7e36db")
+# Point at a local stand-in for load tests (see benchmarks/loadtest.py).
+AVIATIONSTACK_BASE_URL = os.getenv("AVIATIONSTACK_BASE_URL", "http://api.aviationstack.com/v1")
+# aviationstack pages results with limit/offset (at most 100 per page).
+AVIATIONSTACK_PAGE_SIZE = int(os.getenv("AVIATIONSTACK_PAGE_SIZE", "100"))
+AVIATIONSTACK_MAX_PAGES = int(os.getenv("AVIATIONSTACK_MAX_PAGES", "10"))
+# Orders a sorted search accepts (flight_batch.SORT_KEYS). flight_batch and
+# numpy are imported by the first sorted search, not when the agent starts.
+SORT_KEYS = ("departure", "duration", "arrival")
+# /flights/search stops paging once this many matching flights are found,
+# unless the request sets max_results.
+FLIGHT_DEFAULT_MAX_RESULTS = int(os.getenv("FLIGHT_DEFAULT_MAX_RESULTS", "100"))
+# Connect/read timeout of one aviationstack call. Multi-route searches lower
+# it to FLIGHT_MULTI_ROUTE_TIMEOUT for their routes.
+AVIATIONSTACK_TIMEOUT = float(os.getenv("AVIATIONSTACK_TIMEOUT", "30"))
+aviationstack_timeout = contextvars.ContextVar("aviationstack_timeout", default=AVIATIONSTACK_TIMEOUT)
+
+# --- aviationstack response cache ---
+# Pages are cached per (dep_iata, arr_iata, airline, offset, limit). Fresh entries are
+# served for FLIGHT_CACHE_TTL seconds; for FLIGHT_CACHE_STALE_TTL seconds
+# after that they are still served while one background refresh runs.
+FLIGHT_CACHE_EVENTS = telemetry.register(telemetry.Counter(
+    "flight_cache_events_total", "aviationstack cache hits, misses, stale reads, refreshes and evictions.",
+    ("event",)))
+flight_cache = TTLCache(
+    max_entries=int(os.getenv("FLIGHT_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("FLIGHT_CACHE_TTL", "300")),
+    stale_ttl=float(os.getenv("FLIGHT_CACHE_STALE_TTL", "600")),
+    on_event=FLIGHT_CACHE_EVENTS.inc
+)
+
+# Concurrent misses for the same upstream URL (a group booking together)
+# share one aviationstack call and its parsed body; each caller then applies
+# its own until_date/airline filters. Calls are only shared within a quota
+# priority, so an interactive search never inherits a bulk scan's refusal.
+FLIGHT_CALLS_COLLAPSED = telemetry.register(telemetry.Counter(
+    "flight_upstream_calls_collapsed_total", "aviationstack calls avoided by joining an identical in-flight call."))
+upstream_calls = SingleFlight(on_collapse=FLIGHT_CALLS_COLLAPSED.inc)
+
+# --- Local flight store ---
+# Every page fetched from aviationstack is recorded in a local SQLite store.
+# Searches are answered from it when aviationstack fails, or always with
+# FLIGHT_AGENT_OFFLINE=1 (network-free benchmarks and tests).
+FLIGHT_STORE_PATH = os.getenv("FLIGHT_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "flights.db"))
+FLIGHT_AGENT_OFFLINE = os.getenv("FLIGHT_AGENT_OFFLINE", "0").lower() in ("1", "true", "yes")
+FLIGHT_STORE_READS = telemetry.register(telemetry.Counter(
+    "flight_store_reads_total", "Flight searches answered from the local store, by reason (offline or fallback).",
+    ("reason",)))
+flight_store = FlightStore(FLIGHT_STORE_PATH)
+
+# --- aviationstack quota ---
+# A token bucket in a local SQLite file, shared by every flight-agent worker
+# on the host, keeps us under aviationstack's per-second and monthly limits.
+# Interactive /flights/search calls may drain it; bulk /flights/search/all
+# scans leave a reserve and are refused (429) rather than queued.
+aviationstack_quota = QuotaLimiter(
+    os.getenv("AVIATIONSTACK_QUOTA_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "aviationstack_quota.db")),
+    rate_per_second=float(os.getenv("AVIATIONSTACK_RATE_PER_SECOND", "5")),
+    burst=int(os.getenv("AVIATIONSTACK_BURST", "10")),
+    monthly_quota=int(os.getenv("AVIATIONSTACK_MONTHLY_QUOTA", "0")),
+    bulk_bucket_reserve=float(os.getenv("AVIATIONSTACK_BULK_BUCKET_RESERVE", "0.5")),
+    bulk_monthly_reserve=float(os.getenv("AVIATIONSTACK_BULK_MONTHLY_RESERVE", "0.1")),
+    max_wait={
+        "interactive": float(os.getenv("AVIATIONSTACK_INTERACTIVE_MAX_WAIT", "2")),
+        "bulk": float(os.getenv("AVIATIONSTACK_BULK_MAX_WAIT", "0")),
+    }
+)
+# How long every worker backs off after aviationstack answers 429 without a Retry-After.
+AVIATIONSTACK_THROTTLE_SECONDS = float(os.getenv("AVIATIONSTACK_THROTTLE_SECONDS", "60"))
+
+
+class QuotaMetrics:
+    """Publishes the shared aviationstack budget on /metrics."""
+    def render(self):
+        stats = aviationstack_quota.stats()
+        lines = [
+            "# HELP aviationstack_quota_remaining aviationstack calls left in the token bucket and this month.",
+            "# TYPE aviationstack_quota_remaining gauge",
+            f'aviationstack_quota_remaining{{window="bucket"}} {stats["tokens"]}',
+        ]
+        if stats["monthly_remaining"] is not None:
+            lines.append(f'aviationstack_quota_remaining{{window="month"}} {stats["monthly_remaining"]}')
+        lines += [
+            "# HELP aviationstack_quota_calls_total aviationstack calls granted or refused by the limiter in this process.",
+            "# TYPE aviationstack_quota_calls_total counter",
+        ]
+        for priority, outcomes in stats["calls"].items():
+            for outcome, count in outcomes.items():
+                lines.append(f'aviationstack_quota_calls_total{{priority="{priority}",outcome="{outcome}"}} {count}')
+        return lines
+
+
+telemetry.register(QuotaMetrics())
+
+
+def record_flights(flights_data):
+    # A store problem must not fail a search that aviationstack answered.
+    try:
+        with telemetry.span("flight_store_write"):
+            flight_store.record(flights_data)
+    except sqlite3.Error as e:
+        print(f"Recording flights failed: {e}")
+
+
+def stored_page(source, destination, airline="", offset=0, limit=AVIATIONSTACK_PAGE_SIZE, until_date=None):
+    """One page of stored flights for a route, shaped like an aviationstack response."""
+    with telemetry.span("flight_store"):
+        flights_data = flight_store.query(source, destination, until_date, airline, limit, offset)
+        total = flight_store.count(source, destination, until_date, airline)
+    return {
+        "pagination": {"limit": limit, "offset": offset, "count": len(flights_data), "total": total},
+        "data": flights_data
+    }
+
+
+def fetch_aviationstack(source, destination, airline="", offset=0, limit=AVIATIONSTACK_PAGE_SIZE,
+                        priority="interactive"):
+    """
+    One page of aviationstack results for a route, from flight_cache when
+    possible. Upstream calls first take a token from aviationstack_quota
+    for `priority` ("interactive" or "bulk"). Raises requests exceptions on
+    failure (QuotaExceeded when the budget is spent); error bodies are never
+    cached.
+    """
+    api_url = (
+        f"{AVIATIONSTACK_BASE_URL}/flights?access_key={API_KEY}"
+        f"&dep_iata={source}&arr_iata={destination}&limit={limit}&offset={offset}"
+    )
+    if airline:
+        api_url += f"&airline_name={airline}"
+
+    def call():
+        with telemetry.span("aviationstack_quota"):
+            aviationstack_quota.acquire(priority)
+        with telemetry.span("aviationstack"):
+            response = requests.get(api_url, timeout=aviationstack_timeout.get())
+            if response.status_code == 429:
+                aviationstack_quota.throttle(retry_after_seconds(response))
+            response.raise_for_status()
+        api_data = response.json()
+        if isinstance(api_data, dict) and api_data.get("error"):
+            error_code = (api_data["error"] or {}).get("code") if isinstance(api_data["error"], dict) else None
+            if error_code == "usage_limit_reached":
+                aviationstack_quota.exhaust_month()
+            elif error_code == "rate_limit_reached":
+                aviationstack_quota.throttle(AVIATIONSTACK_THROTTLE_SECONDS)
+            raise requests.exceptions.RequestException(f"aviationstack error: {api_data['error']}")
+        if isinstance(api_data, dict) and isinstance(api_data.get("data"), list):
+            record_flights(api_data["data"])
+        return api_data
+
+    return flight_cache.get_or_load((source, destination, airline, offset, limit),
+                                    lambda: upstream_calls.do((api_url, priority), call))
+
+
+def retry_after_seconds(response):
+    try:
+        return float(response.headers.get("Retry-After", AVIATIONSTACK_THROTTLE_SECONDS))
+    except ValueError:
+        return AVIATIONSTACK_THROTTLE_SECONDS
+
+
+def iter_aviationstack_pages(source, destination, airline="", page_stats=None, fetch_page=fetch_aviationstack):
+    """
+    Yield the flight records of each aviationstack page in turn, fetching a
+    page only when the previous one has been consumed. Stops at the last
+    page or after AVIATIONSTACK_MAX_PAGES. `page_stats["pages"]` counts the
+    pages fetched. `fetch_page` is fetch_aviationstack or, to read the local
+    store instead, stored_page.
+    """
+    offset = 0
+    for _ in range(AVIATIONSTACK_MAX_PAGES):
+        api_data = fetch_page(source, destination, airline, offset)
+        flights_data = api_data.get("data", [])
+        if not isinstance(flights_data, list):
+            raise ValueError("Unexpected API response structure.")
+        if page_stats is not None:
+            page_stats["pages"] = page_stats.get("pages", 0) + 1
+        yield flights_data
+
+        pagination = api_data.get("pagination") or {}
+        offset += len(flights_data)
+        if not flights_data or offset >= pagination.get("total", 0):
+            return
+
+
+def filter_flight(flight, preferred_airline, until_date):
+    """
+    The search result for one aviationstack record, or None when it has
+    landed, is from another airline or departs after `until_date`.
+    """
+    flight_status = (flight.get("flight_status") or "").lower()
+    if flight_status == "landed":
+        return None
+
+    airline_info = flight.get("airline") or {}
+    airline_name = (airline_info.get("name") or "").lower()
+    if preferred_airline and preferred_airline not in airline_name:
+        return None
+
+    dep_info = flight.get("departure") or {}
+    arr_info = flight.get("arrival") or {}
+    dep_time = dep_info.get("scheduled")
+    arr_time = arr_info.get("scheduled")
+
+    if dep_time:
+        try:
+            dep_dt = datetime.fromisoformat(dep_time.replace("Z", "+00:00"))
+            if dep_dt.date() > until_date.date():
+                return None
+        except Exception:
+            return None
+
+    duration = None
+    if dep_time and arr_time:
+        try:
+            arr_dt = datetime.fromisoformat(arr_time.replace("Z", "+00:00"))
+            duration_min = int((arr_dt - dep_dt).total_seconds() / 60)
+            duration = f"{duration_min // 60}h {duration_min % 60}m"
+        except Exception:
+            pass
+
+    return {
+        "flight_number": flight.get("flight", {}).get("iata", ""),
+        "airline": airline_info.get("name", ""),
+        "departure": {
+            "airport": dep_info.get("iata", ""),
+            "time": dep_time,
+            "terminal": dep_info.get("terminal", ""),
+            "gate": dep_info.get("gate", "")
+        },
+        "arrival": {
+            "airport": arr_info.get("iata", ""),
+            "time": arr_time,
+            "terminal": arr_info.get("terminal", ""),
+            "gate": arr_info.get("gate", "")
+        },
+        "duration": duration,
+        "status": flight_status,
+        "aircraft": (flight.get("aircraft") or {}).get("iata", "")
+    }
+
+
+def iter_matching_flights(source, destination, preferred_airline, until_date, page_stats=None,
+                          fetch_page=fetch_aviationstack):
+    """
+    Filter each page as it arrives; the next page is fetched only if the
+    caller keeps reading. Records are filtered one at a time, which is
+    quicker than building a FlightBatch when nothing needs sorting.
+    """
+    for flights_data in iter_aviationstack_pages(source, destination, preferred_airline, page_stats, fetch_page):
+        with telemetry.span("flight_filter"):
+            matches = [match for match in (filter_flight(f, preferred_airline, until_date) for f in flights_data) if match]
+        yield from matches
+
+
+def collect_flights(source, destination, preferred_airline, until_date, sort, max_results, page_stats,
+                    fetch_page=fetch_aviationstack):
+    if sort:
+        # The first max_results by departure/duration/arrival can be on
+        # any page, so read them all (up to AVIATIONSTACK_MAX_PAGES).
+        records = [flight for flights_data in iter_aviationstack_pages(source, destination, preferred_airline,
+                                                                       page_stats, fetch_page)
+                   for flight in flights_data]
+        from flight_batch import FlightBatch
+        with telemetry.span("flight_filter"):
+            return FlightBatch(records).select(preferred_airline, until_date, sort, max_results)
+    return list(islice(
+        iter_matching_flights(source, destination, preferred_airline, until_date, page_stats, fetch_page),
+        max_results
+    ))
+
  
 @app.route('/flights/search/all', methods=['POST'])
 def search_all_flights():
     try:
         data = request.get_json()
         if not data:
-            return jsonify({
+            return respond({
                 "status": "error",
                 "message": "No JSON payload provided."
-            }), 400
+            }, 400)
 
         required_fields = ['source', 'destination']
         if not all(field in data for field in required_fields):
-            return jsonify({
+            return respond({
                 "status": "error",
                 "message": "Missing required fields: source, destination"
-            }), 400
+            }, 400)
 
         source = data['source'].strip().upper()
         destination = data['destination'].strip().upper()
 
-        api_url = (
-            f"http://api.aviationstack.com/v1/flights?access_key={API_KEY}"
-            f"&dep_iata={source}&arr_iata={destination}"
-        )
-
-        response = requests.get(api_url, timeout=30)
-        response.raise_for_status()
+        if FLIGHT_AGENT_OFFLINE:
+            FLIGHT_STORE_READS.inc("offline")
+            api_data = stored_page(source, destination)
+        else:
+            try:
+                api_data = fetch_aviationstack(source, destination, priority="bulk")
+            except requests.exceptions.RequestException as e:
+                if not flight_store.has_route(source, destination):
+                    raise
+                print(f"aviationstack failed ({e}); answering from the flight store.")
+                FLIGHT_STORE_READS.inc("fallback")
+                api_data = stored_page(source, destination)
 
-        api_data = response.json()
-        
-        return jsonify({
+        # Return the complete API response, projected to `fields` if asked
+        return respond({
             "status": "success",
-            "data": api_data  # Return the complete API response
-        }), 200
+            "data": api_data
+        }, 200, collection="data.data", payload=data)
 
+    except QuotaExceeded as e:
+        return respond({
+            "status": "error",
+            "message": str(e),
+            "retry_after": e.retry_after
+        }, 429)
     except requests.exceptions.Timeout:
-        return jsonify({
+        return respond({
             "status": "error",
             "message": "Flight API request timed out."
-        }), 504
+        }, 504)
     except requests.exceptions.RequestException as e:
-        return jsonify({
+        return respond({
             "status": "error",
             "message": f"Flight API request failed: {str(e)}"
-        }), 502
+        }, 502)
     except Exception as e:
-        return jsonify({
+        return respond({
             "status": "error",
             "message": f"Internal server error: {str(e)}"
-        }), 500
+        }, 500)
 
 def handle_flight_prompt(prompt: str):
     """
@@ -64,22 +364,24 @@ def handle_flight_prompt(prompt: str):
     print("Received prompt:")
     print(prompt)
   
-@app.route('/flights/search', methods=['POST'])
-def search_flights():
+def find_flights(data):
+    """
+    Flight search used by both the Flask view and in-process callers.
+    Returns (response_body, status_code).
+    """
     try:
-        data = request.get_json()
         if not data:
-            return jsonify({
+            return {
                 "status": "error",
                 "message": "No JSON payload provided."
-            }), 400
+            }, 400
  
         required_fields = ['source', 'destination', 'until_date']
         if not all(field in data for field in required_fields):
-            return jsonify({
+            return {
                 "status": "error",
                 "message": "Missing required fields: source, destination, until_date"
-            }), 400
+            }, 400
  
         source = data['source'].strip().upper()
         destination = data['destination'].strip().upper()
@@ -89,109 +391,314 @@ def search_flights():
         try:
             until_date = datetime.strptime(until_date_str, "%Y-%m-%d")
         except ValueError:
-            return jsonify({
+            return {
                 "status": "error",
                 "message": "Invalid date format. UseYYYY-MM-DD."
-            }), 400
- 
-        api_url = (
-            f"http://api.aviationstack.com/v1/flights?access_key={API_KEY}"
-            f"&dep_iata={source}&arr_iata={destination}"
-        )
-        if preferred_airline:
-            api_url += f"&airline_name={preferred_airline}"
- 
-        response = requests.get(api_url, timeout=30)
-        response.raise_for_status()
- 
-        api_data = response.json()
-        flights_data = api_data.get("data", [])
+            }, 400
  
-        if not isinstance(flights_data, list):
-            return jsonify({
+        try:
+            max_results = data.get('max_results')
+            max_results = FLIGHT_DEFAULT_MAX_RESULTS if max_results is None else int(max_results)
+            if max_results < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            return {
                 "status": "error",
-                "message": "Unexpected API response structure."
-            }), 500
- 
-        results = []
-        for flight in flights_data:
-            flight_status = flight.get("flight_status", "").lower()
-            if flight_status == "landed":
-                continue
- 
-            airline_info = flight.get("airline") or {}
-            airline_name = airline_info.get("name", "").lower()
-            if preferred_airline and preferred_airline not in airline_name:
-                continue
- 
-            dep_info = flight.get("departure") or {}
-            arr_info = flight.get("arrival") or {}
-            dep_time = dep_info.get("scheduled")
-            arr_time = arr_info.get("scheduled")
+                "message": "max_results must be a positive integer."
+            }, 400
  
-            if dep_time:
-                try:
-                    dep_dt = datetime.fromisoformat(dep_time.replace("Z", "+00:00"))
-                    if dep_dt.date() > until_date.date():
-                        continue
-                except Exception:
-                    continue
- 
-            duration = None
-            if dep_time and arr_time:
-                try:
-                    arr_dt = datetime.fromisoformat(arr_time.replace("Z", "+00:00"))
-                    duration_min = int((arr_dt - dep_dt).total_seconds() / 60)
-                    duration = f"{duration_min // 60}h {duration_min % 60}m"
-                except Exception:
-                    pass
+        sort = (data.get('sort') or '').strip().lower()
+        if sort and sort not in SORT_KEYS:
+            return {
+                "status": "error",
+                "message": f"sort must be one of: {', '.join(SORT_KEYS)}"
+            }, 400
  
-            results.append({
-                "flight_number": flight.get("flight", {}).get("iata", ""),
-                "airline": airline_info.get("name", ""),
-                "departure": {
-                    "airport": dep_info.get("iata", ""),
-                    "time": dep_time,
-                    "terminal": dep_info.get("terminal", ""),
-                    "gate": dep_info.get("gate", "")
-                },
-                "arrival": {
-                    "airport": arr_info.get("iata", ""),
-                    "time": arr_time,
-                    "terminal": arr_info.get("terminal", ""),
-                    "gate": arr_info.get("gate", "")
-                },
-                "duration": duration,
-                "status": flight_status,
-                "aircraft": (flight.get("aircraft") or {}).get("iata", "")
-            })
+        page_stats = {"pages": 0}
+        read_store = partial(stored_page, until_date=until_date)
+        if FLIGHT_AGENT_OFFLINE:
+            FLIGHT_STORE_READS.inc("offline")
+            source_name = "store"
+            results = collect_flights(source, destination, preferred_airline, until_date, sort, max_results,
+                                      page_stats, read_store)
+        else:
+            try:
+                source_name = "aviationstack"
+                results = collect_flights(source, destination, preferred_airline, until_date, sort, max_results,
+                                          page_stats)
+            except requests.exceptions.RequestException as e:
+                if not flight_store.has_route(source, destination):
+                    raise
+                print(f"aviationstack failed ({e}); answering from the flight store.")
+                FLIGHT_STORE_READS.inc("fallback")
+                source_name = "store"
+                page_stats = {"pages": 0}
+                results = collect_flights(source, destination, preferred_airline, until_date, sort, max_results,
+                                          page_stats, read_store)
  
-        return jsonify({
+        return {
             "status": "success",
+            "source": source_name,
             "count": len(results),
+            "pages_fetched": page_stats["pages"],
             "flights": results
-        }), 200
+        }, 200
  
+    except QuotaExceeded as e:
+        return {
+            "status": "error",
+            "message": str(e),
+            "retry_after": e.retry_after
+        }, 429
     except requests.exceptions.Timeout:
-        return jsonify({
+        return {
             "status": "error",
             "message": "Flight API request timed out."
-        }), 504
+        }, 504
     except requests.exceptions.RequestException as e:
-        return jsonify({
+        return {
             "status": "error",
             "message": f"Flight API request failed: {str(e)}"
-        }), 502
+        }, 502
+    except ValueError as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }, 500
     except Exception as e:
-        return jsonify({
+        return {
             "status": "error",
             "message": f"Internal server error: {str(e)}"
-        }), 500
+        }, 500
+
+
+@app.route('/flights/search', methods=['POST'])
+def search_flights():
+    data = request.get_json(silent=True)
+    body, status = find_flights(data)
+    return respond(body, status, collection="flights", payload=data)
  
  
+# --- Multi-route search ---
+# /flights/search/multi runs one find_flights per origin × destination pair
+# (so each route still goes through the cache, coalescing, quota and store
+# fallback) on a pool of at most FLIGHT_MULTI_WORKERS threads per request.
+# Each route gets FLIGHT_MULTI_ROUTE_TIMEOUT seconds from when it starts
+# running, and its aviationstack calls time out after that long too. Routes
+# still queued after FLIGHT_MULTI_TIMEOUT seconds are not started at all.
+FLIGHT_MULTI_MAX_ROUTES = int(os.getenv("FLIGHT_MULTI_MAX_ROUTES", "16"))
+FLIGHT_MULTI_ROUTE_TIMEOUT = float(os.getenv("FLIGHT_MULTI_ROUTE_TIMEOUT", "10"))
+FLIGHT_MULTI_TIMEOUT = float(os.getenv("FLIGHT_MULTI_TIMEOUT", "30"))
+FLIGHT_MULTI_WORKERS = int(os.getenv("FLIGHT_MULTI_WORKERS", "4"))
+
+
+def parse_routes(data):
+    """
+    (source, destination) pairs from either "routes": [{"source", "destination"}, ...]
+    or "sources" × "destinations". Same-airport and repeated pairs are dropped.
+    """
+    if data.get("routes"):
+        pairs = [(route["source"], route["destination"]) for route in data["routes"]]
+    else:
+        pairs = [(source, destination) for source in data.get("sources") or []
+                 for destination in data.get("destinations") or []]
+    routes = []
+    for source, destination in pairs:
+        route = (source.strip().upper(), destination.strip().upper())
+        if route[0] != route[1] and route not in routes:
+            routes.append(route)
+    return routes
+
+
+def _instant(value):
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def _duration_minutes(value):
+    try:
+        hours, minutes = value.split()
+        return int(hours[:-1]) * 60 + int(minutes[:-1])
+    except (AttributeError, ValueError):
+        return None
+
+
+def rank_flights(flights, sort):
+    """Order merged /flights/search results by departure, duration or arrival; unknown values last."""
+    if sort == "duration":
+        key = lambda flight: _duration_minutes(flight.get("duration"))
+    else:
+        key = lambda flight: _instant((flight.get(sort) or {}).get("time"))
+
+    def order(flight):
+        value = key(flight)
+        return (value is None, value or 0)
+    return sorted(flights, key=order)
+
+
+def run_routes(routes, queries):
+    """
+    Run find_flights(queries[route]) for every route on a pool sized for
+    this request. Returns {route: (response_body, status_code)}, with
+    ("timeout", None) for a route still running FLIGHT_MULTI_ROUTE_TIMEOUT
+    seconds after it started and ("not_started", None) for one still queued
+    when FLIGHT_MULTI_TIMEOUT ran out.
+    """
+    events = queue.Queue()
+    starting = threading.Lock()
+    give_up = threading.Event()
+
+    def run_route(route):
+        with starting:
+            if give_up.is_set():
+                return None
+            events.put((route, time.monotonic()))
+        aviationstack_timeout.set(min(AVIATIONSTACK_TIMEOUT, FLIGHT_MULTI_ROUTE_TIMEOUT))
+        try:
+            return find_flights(queries[route])
+        finally:
+            events.put((route, None))
+
+    started, finished = {}, set()
+
+    def record(route, started_at):
+        if started_at is None:
+            finished.add(route)
+        else:
+            started[route] = started_at
+
+    pool = ThreadPoolExecutor(max_workers=min(len(routes), FLIGHT_MULTI_WORKERS), thread_name_prefix="flight-route")
+    futures = {route: pool.submit(contextvars.copy_context().run, run_route, route) for route in routes}
+    request_deadline = time.monotonic() + FLIGHT_MULTI_TIMEOUT
+    with telemetry.span("flight_multi_fanout"):
+        while True:
+            now = time.monotonic()
+            if now >= request_deadline and not give_up.is_set():
+                with starting:
+                    give_up.set()
+            while not events.empty():
+                record(*events.get_nowait())
+            deadlines = [started[route] + FLIGHT_MULTI_ROUTE_TIMEOUT for route in started
+                         if route not in finished and now < started[route] + FLIGHT_MULTI_ROUTE_TIMEOUT]
+            if not give_up.is_set() and len(started) < len(routes):
+                deadlines.append(request_deadline)
+            if not deadlines:
+                break
+            try:
+                record(*events.get(timeout=min(deadlines) - now))
+            except queue.Empty:
+                pass
+    give_up.set()
+    # Timed-out routes keep their thread until their aviationstack call
+    # times out; nothing waits for them.
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    outcomes = {}
+    for route, future in futures.items():
+        if route in finished:
+            try:
+                outcomes[route] = future.result()
+            except Exception as e:
+                outcomes[route] = {"status": "error", "message": f"Internal server error: {str(e)}"}, 500
+        else:
+            outcomes[route] = ("timeout" if route in started else "not_started"), None
+    return outcomes
+
+
+def find_flights_multi(data):
+    """
+    Search several routes at once and return one deduplicated, ranked list.
+    Takes the /flights/search fields (until_date, airline, max_results,
+    sort) plus the routes; each flight carries the "route" it came from and
+    "routes" reports per-route status. Returns (response_body, status_code).
+    """
+    if not data:
+        return {"status": "error", "message": "No JSON payload provided."}, 400
+    if not isinstance(data, dict):
+        return {"status": "error", "message": "JSON payload must be an object."}, 400
+    try:
+        routes = parse_routes(data)
+    except (KeyError, TypeError, AttributeError):
+        return {
+            "status": "error",
+            "message": "routes must be a list of {source, destination}, or give sources and destinations."
+        }, 400
+    if not routes:
+        return {"status": "error", "message": "No routes to search."}, 400
+    if len(routes) > FLIGHT_MULTI_MAX_ROUTES:
+        return {"status": "error", "message": f"At most {FLIGHT_MULTI_MAX_ROUTES} routes per request."}, 400
+
+    sort = (data.get('sort') or 'departure').strip().lower()
+    if sort not in SORT_KEYS:
+        return {"status": "error", "message": f"sort must be one of: {', '.join(SORT_KEYS)}"}, 400
+    max_results = data.get('max_results')
+    max_results = FLIGHT_DEFAULT_MAX_RESULTS if max_results is None else max_results
+    # Routes are searched unsorted so each stops paging at max_results;
+    # only the merged list is ranked.
+    route_query = {key: data[key] for key in ('until_date', 'airline') if key in data}
+    outcomes = run_routes(routes, {
+        (source, destination): {**route_query, "source": source, "destination": destination,
+                                "max_results": max_results}
+        for source, destination in routes
+    })
+
+    merged, seen, route_reports = [], set(), []
+    for (source, destination), (body, status) in outcomes.items():
+        report = {"source": source, "destination": destination}
+        if status is None:
+            route_reports.append({**report, "status": body})
+            continue
+        if status == 400:
+            # Validation errors are the same for every route.
+            return body, status
+        if status != 200:
+            route_reports.append({**report, "status": "error", "http_status": status, "message": body.get("message")})
+            continue
+        route_reports.append({**report, "status": "success", "source_name": body.get("source"), "count": body["count"]})
+        for flight in body["flights"]:
+            key = (flight.get("flight_number"), (flight.get("departure") or {}).get("time"))
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append({**flight, "route": f"{source}-{destination}"})
+
+    if not any(report["status"] == "success" for report in route_reports):
+        timed_out = all(report["status"] in ("timeout", "not_started") for report in route_reports)
+        return {"status": "error", "message": "No route could be searched.", "routes": route_reports}, (504 if timed_out else 502)
+
+    results = rank_flights(merged, sort)[:int(max_results)]
+    return {"status": "success", "count": len(results), "sort": sort, "routes": route_reports,
+            "flights": results}, 200
+
+
+@app.route('/flights/search/multi', methods=['POST'])
+def search_flights_multi():
+    data = request.get_json(silent=True)
+    body, status = find_flights_multi(data)
+    return respond(body, status, collection="flights", payload=data)
+
+
+@app.route('/flights/cache', methods=['GET'])
+def cache_stats():
+    return respond({**flight_cache.stats(), "single_flight": upstream_calls.stats()})
+
+
+@app.route('/flights/store', methods=['GET'])
+def store_stats():
+    return respond({**flight_store.stats(), "path": FLIGHT_STORE_PATH, "offline": FLIGHT_AGENT_OFFLINE})
+
+
+@app.route('/flights/quota', methods=['GET'])
+def quota_stats():
+    return respond(aviationstack_quota.stats())
+
+
 @app.route('/flights/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy"}), 200
+    return respond({"status": "healthy"})
  
  
 if __name__ == '__main__':
@@ -0,0 +1,179 @@
+import numpy as np
+
+SORT_KEYS = ("departure", "duration", "arrival")
+
+_WIDTH = 32  # longest ISO-8601 timestamp we expect, with fraction and offset
+
+
+def _to_datetime64(values):
+    """
+    ISO-8601 strings to (wall-clock datetime64[s], UTC offset in minutes,
+    whether a value was given).
+
+    The date and time (first 19 characters) are parsed in one numpy cast and
+    the offset ("Z", "+05:30", ...) is read from a character view, so no
+    Python datetime is created per record. Missing or unreadable values come
+    back as NaT; the third array tells the two apart.
+    """
+    strings = np.array([value or "" for value in values], dtype=f"U{_WIDTH}")
+    try:
+        local = strings.astype("U19").astype("datetime64[s]")
+    except ValueError:
+        local = np.array([_parse_one(value) for value in strings], dtype="datetime64[s]")
+
+    # The offset sign follows the seconds ("...:00+05:30") or, when there
+    # is a fraction, is the last '+' or '-' in the string.
+    chars = strings.view("U1").reshape(len(strings), _WIDTH)
+    sign_at = np.full(len(strings), -1, dtype=np.int64)
+    sign_at[np.isin(chars[:, 19], ["+", "-"])] = 19
+    fraction = np.flatnonzero(chars[:, 19] == ".")
+    if fraction.size:
+        sign_at[fraction] = np.maximum(np.char.rfind(strings[fraction], "+"), np.char.rfind(strings[fraction], "-"))
+    has_offset = (sign_at >= 19) & (sign_at + 5 < _WIDTH)
+    offset = np.zeros(len(strings), dtype=np.int64)
+    if has_offset.any():
+        rows = np.flatnonzero(has_offset)
+        at = sign_at[rows, None] + np.array([1, 2, 4, 5])
+        digits = chars[rows[:, None], at].view(np.uint32).astype(np.int64) - ord("0")
+        # A row whose offset is not four digits keeps offset 0.
+        valid = ((digits >= 0) & (digits <= 9)).all(axis=1)
+        rows, digits = rows[valid], digits[valid]
+        minutes = (digits[:, 0] * 10 + digits[:, 1]) * 60 + digits[:, 2] * 10 + digits[:, 3]
+        offset[rows] = np.where(chars[rows, sign_at[rows]] == "-", -minutes, minutes)
+    return local, offset, strings != ""
+
+
+def _parse_one(value):
+    try:
+        return np.datetime64(value[:19], "s")
+    except ValueError:
+        return np.datetime64("NaT")
+
+
+def _categories(values):
+    """(distinct values, per-row code) for a column of strings."""
+    index = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int64, count=len(values))
+    return list(index), codes
+
+
+class FlightBatch:
+    """
+    Columnar view of a list of aviationstack flight records.
+
+    Fields are pulled out once into numpy arrays: status codes and airline
+    IDs up front, and departure/arrival times (datetime64 plus UTC offsets)
+    for the rows that pass the status and airline filters. Date filtering,
+    durations and sorting run on those arrays; result dicts are only built
+    for the rows that are returned.
+    """
+    def __init__(self, records):
+        self.records = records
+        statuses, airlines, self._departures, self._arrivals = [], [], [], []
+        for r in records:
+            statuses.append(r.get("flight_status") or "")
+            airlines.append((r.get("airline") or {}).get("name") or "")
+            self._departures.append((r.get("departure") or {}).get("scheduled"))
+            self._arrivals.append((r.get("arrival") or {}).get("scheduled"))
+        statuses, self.status_codes = _categories(statuses)
+        self.statuses = [status.lower() for status in statuses]
+        self.airline_names, self.airline_ids = _categories(airlines)
+
+    def __len__(self):
+        return len(self.records)
+
+    def category_mask(self, preferred_airline=""):
+        """Rows that are not landed and match the airline."""
+        keep = ~np.isin(self.status_codes, [i for i, status in enumerate(self.statuses) if status == "landed"])
+        if preferred_airline:
+            preferred_airline = preferred_airline.lower()
+            wanted = [i for i, name in enumerate(self.airline_names) if preferred_airline in name.lower()]
+            keep &= np.isin(self.airline_ids, wanted)
+        return keep
+
+    def times(self, rows):
+        """
+        Time columns for `rows`: departure and arrival (wall-clock), their
+        UTC offsets in minutes, duration_minutes, has_duration and
+        departure_unreadable.
+        """
+        departure, dep_offset, dep_given = _to_datetime64([self._departures[row] for row in rows.tolist()])
+        arrival, arr_offset, _ = _to_datetime64([self._arrivals[row] for row in rows.tolist()])
+        has_duration = ~(np.isnat(departure) | np.isnat(arrival))
+        # Minutes between the two instants, truncated like int(seconds / 60).
+        elapsed = np.where(has_duration, (arrival - departure).astype("timedelta64[s]").astype(np.int64), 0)
+        elapsed = elapsed - (arr_offset - dep_offset) * 60
+        return {
+            "departure": departure,
+            "arrival": arrival,
+            "departure_offset": dep_offset,
+            "arrival_offset": arr_offset,
+            "duration_minutes": np.trunc(elapsed / 60).astype(np.int64),
+            "has_duration": has_duration,
+            "departure_unreadable": dep_given & np.isnat(departure),
+        }
+
+    @staticmethod
+    def sort_key(times, sort):
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of: {', '.join(SORT_KEYS)}")
+        if sort == "duration":
+            # Missing durations sort last, like NaT does for the times.
+            return np.where(times["has_duration"], times["duration_minutes"], np.iinfo(np.int64).max)
+        # Order by instant, as rank_flights does: wall-clock time minus its UTC offset.
+        return times[sort] - times[f"{sort}_offset"].astype("timedelta64[m]")
+
+    def select(self, preferred_airline="", until_date=None, sort=None, limit=None):
+        """
+        Result dicts for the rows that are not landed, match the airline and
+        depart on or before `until_date`, optionally ordered by departure,
+        duration or arrival, at most `limit` of them.
+        """
+        rows = np.flatnonzero(self.category_mask(preferred_airline))
+        times = self.times(rows)
+        if until_date is not None:
+            # Flights without a departure time are kept and ones with an
+            # unreadable time dropped, as the row-by-row filter did.
+            last_day = np.datetime64(until_date.strftime("%Y-%m-%d"), "D")
+            departure = times["departure"]
+            keep = (np.isnat(departure) | (departure.astype("datetime64[D]") <= last_day)) & ~times["departure_unreadable"]
+            rows, times = rows[keep], {name: column[keep] for name, column in times.items()}
+        order = np.arange(rows.size)
+        if sort:
+            order = np.argsort(self.sort_key(times, sort), kind="stable")
+        if limit is not None:
+            order = order[:limit]
+        return self.results(rows[order], times["duration_minutes"][order], times["has_duration"][order])
+
+    def results(self, rows, duration_minutes, has_duration):
+        """/flights/search result dicts for `rows`."""
+        statuses = [self.statuses[code] for code in self.status_codes[rows].tolist()]
+        durations = [f"{minutes // 60}h {minutes % 60}m" if known else None
+                     for minutes, known in zip(duration_minutes.tolist(), has_duration.tolist())]
+        return [self._result(self.records[row], status, duration)
+                for row, status, duration in zip(rows.tolist(), statuses, durations)]
+
+    @staticmethod
+    def _result(flight, status, duration):
+        airline_info = flight.get("airline") or {}
+        dep_info = flight.get("departure") or {}
+        arr_info = flight.get("arrival") or {}
+        return {
+            "flight_number": flight.get("flight", {}).get("iata", ""),
+            "airline": airline_info.get("name", ""),
+            "departure": {
+                "airport": dep_info.get("iata", ""),
+                "time": dep_info.get("scheduled"),
+                "terminal": dep_info.get("terminal", ""),
+                "gate": dep_info.get("gate", "")
+            },
+            "arrival": {
+                "airport": arr_info.get("iata", ""),
+                "time": arr_info.get("scheduled"),
+                "terminal": arr_info.get("terminal", ""),
+                "gate": arr_info.get("gate", "")
+            },
+            "duration": duration,
+            "status": status,
+            "aircraft": (flight.get("aircraft") or {}).get("iata", "")
+        }
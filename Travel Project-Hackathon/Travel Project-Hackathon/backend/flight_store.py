@@ -0,0 +1,117 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class FlightStore:
+    """
+    Local copy of the flight schedules aviationstack has returned.
+
+    Records are kept verbatim (so the normal filtering applies to them) in a
+    SQLite database in WAL mode, keyed by route, flight number and scheduled
+    departure and indexed by (dep_iata, arr_iata, departure date). The flight
+    agent writes every page it fetches and reads the store back when the
+    upstream call fails or when it runs offline.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS flights (
+                dep_iata TEXT NOT NULL,
+                arr_iata TEXT NOT NULL,
+                flight_iata TEXT NOT NULL,
+                departure_at TEXT NOT NULL,
+                dep_date TEXT,
+                airline TEXT NOT NULL,
+                recorded_at REAL NOT NULL,
+                body TEXT NOT NULL,
+                PRIMARY KEY (dep_iata, arr_iata, flight_iata, departure_at)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_flights_route_date ON flights (dep_iata, arr_iata, dep_date)")
+        conn.commit()
+
+    def _conn(self):
+        # sqlite3 connections must not be shared across threads.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(record, recorded_at):
+        dep_info = record.get("departure") or {}
+        arr_info = record.get("arrival") or {}
+        departure_at = dep_info.get("scheduled") or ""
+        return (
+            (dep_info.get("iata") or "").upper(),
+            (arr_info.get("iata") or "").upper(),
+            (record.get("flight") or {}).get("iata") or "",
+            departure_at,
+            departure_at[:10] or record.get("flight_date"),
+            ((record.get("airline") or {}).get("name") or "").lower(),
+            recorded_at,
+            json.dumps(record),
+        )
+
+    def record(self, records):
+        """Insert or refresh aviationstack flight records; returns how many were written."""
+        recorded_at = time.time()
+        rows = [self._row(record, recorded_at) for record in records if isinstance(record, dict)]
+        rows = [row for row in rows if row[0] and row[1]]
+        if not rows:
+            return 0
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO flights (dep_iata, arr_iata, flight_iata, departure_at, dep_date, airline, recorded_at, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    @staticmethod
+    def _where(source, destination, until_date, airline):
+        where = "WHERE dep_iata = ? AND arr_iata = ?"
+        params = [source.upper(), destination.upper()]
+        if until_date is not None:
+            where += " AND (dep_date IS NULL OR dep_date <= ?)"
+            params.append(until_date.strftime("%Y-%m-%d"))
+        if airline:
+            where += " AND instr(airline, ?) > 0"
+            params.append(airline.lower())
+        return where, params
+
+    def query(self, source, destination, until_date=None, airline="", limit=100, offset=0):
+        """
+        Stored records for a route, ordered by departure, that depart on or
+        before `until_date` (a datetime or None) and whose airline contains
+        `airline`. Flights without a departure time are always included.
+        """
+        where, params = self._where(source, destination, until_date, airline)
+        query = f"SELECT body FROM flights {where} ORDER BY departure_at, flight_iata LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        return [json.loads(row[0]) for row in self._conn().execute(query, params)]
+
+    def count(self, source, destination, until_date=None, airline=""):
+        where, params = self._where(source, destination, until_date, airline)
+        return self._conn().execute(f"SELECT COUNT(*) FROM flights {where}", params).fetchone()[0]
+
+    def has_route(self, source, destination):
+        row = self._conn().execute(
+            "SELECT 1 FROM flights WHERE dep_iata = ? AND arr_iata = ? LIMIT 1", (source.upper(), destination.upper())
+        ).fetchone()
+        return row is not None
+
+    def stats(self):
+        flights, routes, last_recorded = self._conn().execute(
+            "SELECT COUNT(*), COUNT(DISTINCT dep_iata || '-' || arr_iata), MAX(recorded_at) FROM flights"
+        ).fetchone()
+        return {"flights": flights, "routes": routes, "last_recorded_at": last_recorded}
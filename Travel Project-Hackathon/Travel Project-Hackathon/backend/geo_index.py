@@ -0,0 +1,144 @@
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# Boxes spanning more grid rows than this are answered by one scan of every
+# point, which is cheaper than a lookup per row at that size.
+MAX_BOX_ROWS = 256
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in km; any argument may be a numpy array."""
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def parse_point(value):
+    """(lat, lng) from "lat,lng", [lat, lng] or {"lat", "lng"}; raises ValueError when invalid."""
+    try:
+        if isinstance(value, dict):
+            lat, lng = float(value["lat"]), float(value["lng"])
+        else:
+            parts = value.split(",") if isinstance(value, str) else list(value)
+            if len(parts) != 2:
+                raise ValueError
+            lat, lng = float(parts[0]), float(parts[1])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("near must be \"lat,lng\"")
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("near must be \"lat,lng\" with -90 <= lat <= 90 and -180 <= lng <= 180")
+    return lat, lng
+
+
+class GridIndex:
+    """
+    Points bucketed into a uniform grid of `cell_degrees` latitude/longitude
+    cells.
+
+    Points are stored sorted by cell id (row-major: grid row by latitude,
+    then column by longitude), so the cells of one grid row that overlap a
+    search box are one contiguous slice, found with a binary search. A radius
+    query reads the slices of the box around the circle and keeps the points
+    whose haversine distance is inside it. A k-nearest query starts from a
+    box of about one cell and doubles the radius until k points fall inside
+    the circle. The per-query cost depends on the points near the query, not
+    on the size of the index.
+    """
+    def __init__(self, lat, lng, ids=None, cell_degrees=0.01):
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        ids = np.arange(len(lat)) if ids is None else np.asarray(ids)
+        known = ~np.isnan(lat) & ~np.isnan(lng)
+        lat, lng, ids = lat[known], lng[known], ids[known]
+
+        self.cell = float(cell_degrees)
+        self.columns = math.ceil(360 / self.cell)
+        cells = self._row(lat) * self.columns + self._column(lng)
+        order = np.argsort(cells, kind="stable")
+        self.cells = cells[order]
+        self.lat, self.lng, self.ids = lat[order], lng[order], ids[order]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _row(self, lat):
+        return np.floor((np.asarray(lat) + 90) / self.cell).astype(np.int64)
+
+    def _column(self, lng):
+        return np.minimum(np.floor((np.asarray(lng) + 180) / self.cell).astype(np.int64), self.columns - 1)
+
+    def _box(self, lat, lng, radius_km):
+        """Positions (into the sorted points) of every point in the grid cells around the circle."""
+        dlat = radius_km / KM_PER_DEGREE
+        south, north = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+        widest = max(abs(south), abs(north))
+        if widest >= 90 or radius_km >= math.pi * EARTH_RADIUS_KM / 2:
+            return np.arange(len(self.ids))
+        dlng = dlat / math.cos(math.radians(widest))
+        if dlng >= 180:
+            spans = [(0, self.columns - 1)]
+        else:
+            west, east = lng - dlng, lng + dlng
+            if west < -180:
+                spans = [(int(self._column(west + 360)), self.columns - 1), (0, int(self._column(east)))]
+            elif east >= 180:
+                spans = [(int(self._column(west)), self.columns - 1), (0, int(self._column(east - 360)))]
+            else:
+                spans = [(int(self._column(west)), int(self._column(east)))]
+
+        rows = np.arange(int(self._row(south)), int(self._row(north)) + 1)
+        if len(rows) * len(spans) > MAX_BOX_ROWS:
+            return np.arange(len(self.ids))
+        first = np.concatenate([rows * self.columns + start for start, _ in spans])
+        last = np.concatenate([rows * self.columns + end for _, end in spans])
+        starts = np.searchsorted(self.cells, first, side="left")
+        ends = np.searchsorted(self.cells, last, side="right")
+        return np.concatenate([np.arange(start, end) for start, end in zip(starts.tolist(), ends.tolist())])
+
+    def _within(self, lat, lng, radius_km, accept):
+        positions = self._box(lat, lng, radius_km)
+        if accept is not None and len(positions):
+            positions = positions[accept(self.ids[positions])]
+        distance = haversine_km(lat, lng, self.lat[positions], self.lng[positions])
+        inside = distance <= radius_km
+        return positions[inside], distance[inside]
+
+    def search(self, lat, lng, radius_km=None, k=None, accept=None):
+        """
+        (ids, distances in km, total) of the points nearest to (lat, lng),
+        closest first with ties in id order. `radius_km` keeps points inside
+        that distance, `k` keeps the nearest k, and at least one of them must
+        be given. `accept` is an optional vectorized predicate over ids that
+        a point must pass. `total` is the number of accepted points inside
+        radius_km, or None for a k-nearest query without a radius.
+        """
+        if radius_km is None and k is None:
+            raise ValueError("search needs radius_km or k")
+        if radius_km is not None:
+            positions, distance = self._within(lat, lng, radius_km, accept)
+            total = len(positions)
+        else:
+            # Grow the circle until it holds k points (or the whole earth).
+            # Points per area so far says roughly how far to go: the radius
+            # at least doubles, more when the circle holds few of the k.
+            radius, total = self.cell * KM_PER_DEGREE, None
+            while True:
+                positions, distance = self._within(lat, lng, radius, accept)
+                if len(positions) >= k or radius >= math.pi * EARTH_RADIUS_KM:
+                    break
+                radius *= max(2.0, math.sqrt(k / max(len(positions), 1)))
+
+        ids = self.ids[positions]
+        if k is not None and k < len(ids):
+            # Keep every point as close as the k-th, so ties at the cut-off
+            # resolve by id below rather than by partition order.
+            kth = np.partition(distance, k - 1)[k - 1] if k > 0 else -1.0
+            nearest = np.flatnonzero(distance <= kth)
+            ids, distance = ids[nearest], distance[nearest]
+        order = np.lexsort((ids, distance))
+        if k is not None:
+            order = order[:k]
+        return ids[order], distance[order], total
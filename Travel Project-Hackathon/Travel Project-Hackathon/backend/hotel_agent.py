@@ -1,83 +1,203 @@
-from flask import Flask, request, jsonify
-import json
-import random
+from flask import Flask, request
+import os
+import telemetry
+import hotel_catalog
+import lazy_init
+from codec import respond
+from lazy_init import LazyResource
+from hotel_index import SORTS as HOTEL_SORTS, build_indexes
+from geo_index import GridIndex, parse_point
+from city_lookup import MAX_SUGGESTIONS, CityLookup
 
 app = Flask(__name__)
+telemetry.install(app, "hotel")
 
-# --- Helper function to generate mock hotel data ---
-def generate_mock_hotels(num_hotels_per_city=2000):
-    cities = [
-        "New York", "Los Angeles", "Chicago", "Houston", "Phoenix",
-        "Philadelphia", "San Antonio", "San Diego", "Dallas", "San Jose",
-        "Austin", "Jacksonville", "Fort Worth", "Columbus", "Charlotte",
-        "San Francisco", "Indianapolis", "Seattle", "Denver", "Washington",
-        "Boston", "El Paso", "Nashville", "Detroit", "Oklahoma City",
-        "Portland", "Las Vegas", "Memphis", "Louisville", "Baltimore",
-        "Milwaukee", "Albuquerque", "Tucson", "Fresno", "Sacramento",
-        "Kansas City", "Mesa", "Atlanta", "Omaha", "Colorado Springs",
-        "Raleigh", "Miami", "Virginia Beach", "Long Beach", "Oakland",
-        "Minneapolis", "Tulsa", "Wichita", "New Orleans", "Arlington"
-    ]
-
-    hotel_prefixes = ["Grand", "Comfort", "Elite", "Royal", "City", "Star", "Prime", "Luxury", "Inn", "Suite"]
-    hotel_suffixes = ["Hotel", "Resort", "Inn", "Suites", "Place", "Lodge", "Manor", "House", "Gardens"]
-    street_types = ["St", "Ave", "Blvd", "Rd", "Ln", "Dr"]
-
-    all_hotels_data = {}
-
-    for city in cities:
-        city_hotels = []
-        for i in range(num_hotels_per_city):
-            name = f"{random.choice(hotel_prefixes)} {random.choice(hotel_suffixes)} {random.randint(1, 100)}"
-            rating = round(random.uniform(3.0, 5.0), 1)
-            address = f"{random.randint(100, 9999)} {random.choice(['Main', 'Oak', 'Pine', 'Elm', 'Maple'])} {random.choice(street_types)}, {city}"
-            
-            # Generate price range
-            base_price = random.randint(50, 500)
-            price_range_low = base_price - random.randint(0, 40)
-            price_range_high = base_price + random.randint(50, 150)
-            price_range = f"${price_range_low} - ${price_range_high}"
-
-            city_hotels.append({
-                "name": name,
-                "rating": rating,
-                "address": address,
-                "price_range": price_range
-            })
-        all_hotels_data[city] = city_hotels
-    return all_hotels_data
-
-# Load the hotel data
-# Generate a large dataset of hotels
-hotels_data = generate_mock_hotels(num_hotels_per_city=200) # Adjusted to generate 10,000 hotels (50 cities * 200 hotels/city)
-# If you need exactly 10,000, you can calculate num_hotels_per_city = 10000 / len(cities)
-# For example, with 50 cities, 10000 / 50 = 200 hotels per city.
+# The hotel catalog (hotels_data.json plus generated hotels, with
+# coordinates) is shared with the cab agent through a memory-mapped file;
+# see hotel_catalog. It is opened on first use rather than at import.
+hotels_data = LazyResource("hotels", hotel_catalog.load)
+# Parsed price and rating columns with sorted indexes, per city (see hotel_index).
+hotel_indexes = LazyResource("hotel_indexes", lambda: build_indexes(hotels_data.value))
+# Grid over every catalog hotel's coordinates, for `near` searches (see
+# geo_index). Cells are HOTEL_GEO_CELL_DEGREES on a side (0.01, about 1 km).
+HOTEL_GEO_CELL_DEGREES = float(os.getenv("HOTEL_GEO_CELL_DEGREES", "0.01"))
+hotel_geo = LazyResource("hotel_geo", lambda: GridIndex(
+    hotels_data.value.rows["lat"], hotels_data.value.rows["lng"], cell_degrees=HOTEL_GEO_CELL_DEGREES
+))
+# Normalized city names and aliases ("nyc", "Los Angeles ") with a prefix
+# table for /hotels/cities/suggest (see city_lookup).
+city_lookup = LazyResource("city_lookup", lambda: CityLookup(
+    {city: len(hotels) for city, hotels in hotels_data.value.items()}
+))
+lazy_init.install(app, "hotel", [hotels_data, hotel_indexes, hotel_geo, city_lookup])
 
-@app.route('/hotels', methods=['POST'])
-def get_hotels():
+# /hotels returns at most `limit` hotels per page (HOTEL_DEFAULT_LIMIT when
+# the request does not say, never more than HOTEL_MAX_LIMIT).
+HOTEL_DEFAULT_LIMIT = int(os.getenv("HOTEL_DEFAULT_LIMIT", "50"))
+HOTEL_MAX_LIMIT = int(os.getenv("HOTEL_MAX_LIMIT", "1000"))
+HOTEL_FILTERS = ("min_price", "max_price", "min_rating")
+
+
+def parse_filters(data):
+    """Numeric min_price, max_price and min_rating from a /hotels request; raises ValueError when invalid."""
+    filters = {}
+    for name in HOTEL_FILTERS:
+        value = data.get(name)
+        if value is None or value == "":
+            continue
+        try:
+            filters[name] = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be a number")
+    return filters
+
+
+def parse_page(data):
+    """(sort, offset, limit) from a /hotels request; raises ValueError when invalid."""
+    sort = (data.get("sort") or "").strip().lower()
+    if sort and sort not in HOTEL_SORTS:
+        raise ValueError(f"sort must be one of: {', '.join(HOTEL_SORTS)}")
+    try:
+        limit = data.get("limit")
+        limit = HOTEL_DEFAULT_LIMIT if limit is None else int(limit)
+    except (TypeError, ValueError):
+        limit = 0
+    if not 1 <= limit <= HOTEL_MAX_LIMIT:
+        raise ValueError(f"limit must be an integer between 1 and {HOTEL_MAX_LIMIT}")
+    # The cursor is the offset of the next page, as returned in next_cursor.
+    try:
+        offset = int(data.get("cursor") or 0)
+    except (TypeError, ValueError):
+        offset = -1
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    return sort, offset, limit
+
+
+def parse_near(data):
+    """(lat, lng, radius_km or None) from a /hotels request's `near` and `radius_km`, or None; raises ValueError when invalid."""
+    radius_km = data.get("radius_km")
+    if data.get("near") in (None, ""):
+        if radius_km not in (None, ""):
+            raise ValueError("radius_km needs near")
+        return None
+    lat, lng = parse_point(data["near"])
+    if radius_km in (None, ""):
+        return lat, lng, None
+    try:
+        radius_km = float(radius_km)
+    except (TypeError, ValueError):
+        radius_km = 0.0
+    if not radius_km > 0:
+        raise ValueError("radius_km must be a positive number")
+    return lat, lng, radius_km
+
+
+def nearby_hotels(city, near, offset, limit, filters):
+    """
+    (hotels on [offset, offset + limit) of the matches nearest to `near`,
+    number of matches), each with its `distance_km`. Without a radius the
+    matches are every hotel in the city (or catalog) passing the filters.
+    """
+    lat, lng, radius_km = near
+    catalog = hotels_data.value
+    rows, distances, total = hotel_geo.value.search(
+        lat, lng, radius_km, k=offset + limit, accept=catalog.matcher(city, **filters)
+    )
+    if total is None:
+        total = catalog.count(city, **filters)
+    page = [{**hotel, "distance_km": round(float(distance), 3)}
+            for hotel, distance in zip(catalog.hotels(rows[offset:]), distances[offset:])]
+    return page, total
+
+
+def find_hotels(data):
+    """
+    Hotel search used by both the Flask view and in-process callers.
+    Takes the city, dates and rooms plus optional `min_price`, `max_price`
+    and `min_rating` filters, `sort`, `limit` and `cursor`, and returns one
+    page of matching hotels with `total` (matches) and `next_cursor`.
+    With `near` ("lat,lng") the hotels come nearest first with their
+    `distance_km`, within `radius_km` when given; the city is then optional.
+    The city may be typed any way city_lookup resolves ("nyc", "new york");
+    the catalog name it resolved to is returned as `city`.
+    Returns (response_body, status_code).
+    """
     try:
-        data = request.get_json()
         city = data.get("cityname")
         num_of_rooms = data.get("num_of_rooms")
         checkin = data.get("checkin_date")
         checkout = data.get("checkout_date")
+        try:
+            sort, offset, limit = parse_page(data)
+            filters = parse_filters(data)
+            near = parse_near(data)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        if near and sort:
+            return {"error": "sort cannot be combined with near; nearby hotels come nearest first"}, 400
  
-        if city not in hotels_data:
-            return jsonify({"hotels": [], "message": "No hotels available for the selected city"}), 200
+        if city or not near:
+            city = city_lookup.value.resolve(city)
+            if city is None:
+                return {"hotels": [], "message": "No hotels available for the selected city"}, 200
  
-        results = []
-        # For large datasets, consider pagination or limiting results if needed in a real application
-        for hotel in hotels_data[city]:
-            hotel_copy = hotel.copy()
-            hotel_copy["checkin_date"] = checkin
-            hotel_copy["checkout_date"] = checkout
-            hotel_copy["num_of_rooms"] = num_of_rooms
-            results.append(hotel_copy)
+        if near:
+            with telemetry.span("hotel_geo"):
+                page, total = nearby_hotels(city, near, offset, limit, filters)
+        else:
+            with telemetry.span("hotel_scan"):
+                page, total = hotel_indexes.value[city].page(offset, limit, sort, **filters)
+        # Only the returned hotels are copied.
+        results = [{**hotel, "checkin_date": checkin, "checkout_date": checkout, "num_of_rooms": num_of_rooms}
+                   for hotel in page]
  
-        return jsonify({"hotels": results})
+        next_offset = offset + len(results)
+        return {
+            "city": city,
+            "hotels": results,
+            "count": len(results),
+            "total": total,
+            "next_cursor": str(next_offset) if next_offset < total else None
+        }, 200
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return {"error": str(e)}, 500
+
+@app.route('/hotels', methods=['POST'])
+def get_hotels():
+    # Query-string parameters (near=40.64,-73.78&radius_km=5) are accepted
+    # too; the JSON body wins when both are given.
+    data = {**request.args.to_dict(), **(request.get_json(silent=True) or {})}
+    body, status = find_hotels(data)
+    return respond(body, status, collection="hotels", payload=data)
  
+def find_city_suggestions(data):
+    """
+    Autocomplete for the city field: catalog cities whose name or alias
+    starts with `q` (or has a word starting with it), best first. Returns
+    (response_body, status_code).
+    """
+    query = str(data.get("q") or "")
+    try:
+        limit = int(data.get("limit", 10))
+    except (TypeError, ValueError):
+        limit = 0
+    if not 1 <= limit <= MAX_SUGGESTIONS:
+        return {"error": f"limit must be an integer between 1 and {MAX_SUGGESTIONS}"}, 400
+    return {
+        "query": query,
+        "city": city_lookup.value.resolve(query),
+        "suggestions": city_lookup.value.suggest(query, limit)
+    }, 200
+
+
+@app.route('/hotels/cities/suggest', methods=['GET', 'POST'])
+def suggest_cities():
+    # GET with ?q= from a browser, POST with a JSON body from the controller.
+    data = {**request.args.to_dict(), **(request.get_json(silent=True) or {})}
+    body, status = find_city_suggestions(data)
+    return respond(body, status)
+
 def handle_prompt(prompt: str):
     """
     Simulates handling the hotel booking prompt.
@@ -87,4 +207,5 @@ def handle_prompt(prompt: str):
     # Add more logic here, like interacting with a booking API or automating UI
 
 if __name__ == '__main__':
+    lazy_init.warm_up([hotels_data], background=True)
     app.run(debug=False,port=5000)
@@ -0,0 +1,289 @@
+import json
+import math
+import os
+import random
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+from hotel_index import parse_price_range
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+CURATED_HOTELS_PATH = os.path.join(BACKEND_DIR, "hotels_data.json")
+
+# The catalog is generated from HOTEL_CATALOG_SEED, so every process (and
+# every restart) sees the same hotels with the same coordinates. It is built
+# once, saved to HOTEL_CATALOG_PATH and memory-mapped read-only by the hotel
+# and cab agents. The default file name carries the format, seed and size, so
+# changing any of them builds a new file instead of reading a stale one.
+CATALOG_FORMAT = 1
+CATALOG_SEED = os.getenv("HOTEL_CATALOG_SEED", "voyage")
+HOTELS_PER_CITY = int(os.getenv("HOTEL_CATALOG_HOTELS_PER_CITY", "200"))
+CATALOG_PATH = os.getenv("HOTEL_CATALOG_PATH") or os.path.join(
+    BACKEND_DIR, f"hotel_catalog_v{CATALOG_FORMAT}_{CATALOG_SEED}_{HOTELS_PER_CITY}.npy"
+)
+
+# Approximate city centres (lat, lng). Generated hotels are scattered around
+# them, and the cab agent places its "<city> Airport" pickups on them.
+CITY_CENTERS = {
+    "New York": (40.7128, -74.0060), "Los Angeles": (34.0522, -118.2437),
+    "Chicago": (41.8781, -87.6298), "Houston": (29.7604, -95.3698),
+    "Phoenix": (33.4484, -112.0740), "Philadelphia": (39.9526, -75.1652),
+    "San Antonio": (29.4241, -98.4936), "San Diego": (32.7157, -117.1611),
+    "Dallas": (32.7767, -96.7970), "San Jose": (37.3382, -121.8863),
+    "Austin": (30.2672, -97.7431), "Jacksonville": (30.3322, -81.6557),
+    "Fort Worth": (32.7555, -97.3308), "Columbus": (39.9612, -82.9988),
+    "Charlotte": (35.2271, -80.8431), "San Francisco": (37.7749, -122.4194),
+    "Indianapolis": (39.7684, -86.1581), "Seattle": (47.6062, -122.3321),
+    "Denver": (39.7392, -104.9903), "Washington": (38.9072, -77.0369),
+    "Boston": (42.3601, -71.0589), "El Paso": (31.7619, -106.4850),
+    "Nashville": (36.1627, -86.7816), "Detroit": (42.3314, -83.0458),
+    "Oklahoma City": (35.4676, -97.5164), "Portland": (45.5152, -122.6784),
+    "Las Vegas": (36.1699, -115.1398), "Memphis": (35.1495, -90.0490),
+    "Louisville": (38.2527, -85.7585), "Baltimore": (39.2904, -76.6122),
+    "Milwaukee": (43.0389, -87.9065), "Albuquerque": (35.0844, -106.6504),
+    "Tucson": (32.2226, -110.9747), "Fresno": (36.7378, -119.7871),
+    "Sacramento": (38.5816, -121.4944), "Kansas City": (39.0997, -94.5786),
+    "Mesa": (33.4152, -111.8315), "Atlanta": (33.7490, -84.3880),
+    "Omaha": (41.2565, -95.9345), "Colorado Springs": (38.8339, -104.8214),
+    "Raleigh": (35.7796, -78.6382), "Miami": (25.7617, -80.1918),
+    "Virginia Beach": (36.8529, -75.9780), "Long Beach": (33.7701, -118.1937),
+    "Oakland": (37.8044, -122.2712), "Minneapolis": (44.9778, -93.2650),
+    "Tulsa": (36.1540, -95.9928), "Wichita": (37.6872, -97.3301),
+    "New Orleans": (29.9511, -90.0715), "Arlington": (32.7357, -97.1081),
+}
+# Hotels are placed up to this many degrees (about 3 miles) from the centre.
+HOTEL_SPREAD_DEGREES = 0.05
+
+HOTEL_PREFIXES = ["Grand", "Comfort", "Elite", "Royal", "City", "Star", "Prime", "Luxury", "Inn", "Suite"]
+HOTEL_SUFFIXES = ["Hotel", "Resort", "Inn", "Suites", "Place", "Lodge", "Manor", "House", "Gardens"]
+STREET_NAMES = ["Main", "Oak", "Pine", "Elm", "Maple"]
+STREET_TYPES = ["St", "Ave", "Blvd", "Rd", "Ln", "Dr"]
+
+
+def city_center(place):
+    """(lat, lng) of the catalog city that `place` ("Mesa Gateway Airport") starts with, or None."""
+    matches = [city for city in CITY_CENTERS if place.startswith(city)]
+    return CITY_CENTERS[max(matches, key=len)] if matches else None
+
+
+def generate_hotels(num_hotels_per_city=HOTELS_PER_CITY, seed=CATALOG_SEED, curated_path=CURATED_HOTELS_PATH):
+    """
+    {city: [hotel, ...]} with name, rating, address, price_range, lat and
+    lng. Each city starts with its hotels from hotels_data.json, followed by
+    `num_hotels_per_city` generated ones. Each city has its own random
+    stream derived from `seed`, so the output depends only on the arguments.
+    """
+    curated = {}
+    if curated_path and os.path.exists(curated_path):
+        with open(curated_path, encoding="utf-8") as f:
+            curated = json.load(f)
+
+    all_hotels_data = {}
+    for city in list(CITY_CENTERS) + [city for city in curated if city not in CITY_CENTERS]:
+        rng = random.Random(f"{seed}:{city}")
+        center = CITY_CENTERS.get(city)
+
+        def place(hotel):
+            if center is None:
+                return hotel
+            return {
+                **hotel,
+                "lat": round(center[0] + rng.uniform(-HOTEL_SPREAD_DEGREES, HOTEL_SPREAD_DEGREES), 6),
+                "lng": round(center[1] + rng.uniform(-HOTEL_SPREAD_DEGREES, HOTEL_SPREAD_DEGREES), 6),
+            }
+
+        city_hotels = [place(hotel) for hotel in curated.get(city, [])]
+        for _ in range(num_hotels_per_city):
+            base_price = rng.randint(50, 500)
+            city_hotels.append(place({
+                "name": f"{rng.choice(HOTEL_PREFIXES)} {rng.choice(HOTEL_SUFFIXES)} {rng.randint(1, 100)}",
+                "rating": round(rng.uniform(3.0, 5.0), 1),
+                "address": f"{rng.randint(100, 9999)} {rng.choice(STREET_NAMES)} {rng.choice(STREET_TYPES)}, {city}",
+                "price_range": f"${base_price - rng.randint(0, 40)} - ${base_price + rng.randint(50, 150)}",
+            }))
+        all_hotels_data[city] = city_hotels
+    return all_hotels_data
+
+
+def to_records(hotels_by_city):
+    """
+    One fixed-width numpy record per hotel, grouped by city: UTF-8 city,
+    name and address, the rating, low and high nightly price (inf when
+    price_range cannot be read), lat and lng (NaN when unknown). The
+    `by_key` column is the row order of "name, address" keys, so drop-off
+    lookups are a binary search over the file.
+    """
+    rows = []
+    for city, hotels in hotels_by_city.items():
+        for hotel in hotels:
+            low, high = parse_price_range(hotel.get("price_range"))
+            rows.append((
+                city.encode(), str(hotel.get("name", "")).encode(), str(hotel.get("address", "")).encode(),
+                float(hotel.get("rating") or 0.0), low, high,
+                float(hotel.get("lat", math.nan)), float(hotel.get("lng", math.nan)), 0,
+            ))
+
+    def width(column):
+        return max([len(row[column]) for row in rows] + [1])
+
+    dtype = np.dtype([
+        ("city", f"S{width(0)}"), ("name", f"S{width(1)}"), ("address", f"S{width(2)}"),
+        ("rating", "f8"), ("price_low", "f8"), ("price_high", "f8"),
+        ("lat", "f8"), ("lng", "f8"), ("by_key", "u4"),
+    ])
+    records = np.array(rows, dtype=dtype)
+    keys = np.char.add(np.char.add(records["name"], b", "), records["address"])
+    records["by_key"] = np.argsort(keys, kind="stable")
+    return records
+
+
+def save(records, path):
+    # Written under a per-process name and renamed, so workers building the
+    # catalog at the same time never read a half-written file.
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, records, allow_pickle=False)
+    os.replace(tmp_path, path)
+
+
+def _price(value):
+    return f"${value:.0f}" if float(value).is_integer() else f"${value:.2f}"
+
+
+def _to_hotel(record):
+    # `record` is one catalog row as a tuple, in the to_records column order.
+    _city, name, address, rating, low, high, lat, lng, _by_key = record
+    hotel = {
+        "name": name.decode(),
+        "rating": rating,
+        "address": address.decode(),
+        "price_range": f"{_price(low)} - {_price(high)}" if low < math.inf else "",
+    }
+    if not math.isnan(lat):
+        hotel["lat"], hotel["lng"] = lat, lng
+    return hotel
+
+
+class CityHotels(Sequence):
+    """One city's rows of the catalog, read as hotel dicts on access."""
+    def __init__(self, catalog, start, end):
+        self.catalog, self.start, self.end = catalog, start, end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.catalog.hotel(self.start + i)
+
+    @property
+    def columns(self):
+        """(low price, high price, rating) lists, for hotel_index.CityIndex."""
+        rows = self.catalog.rows[self.start:self.end]
+        return rows["price_low"].tolist(), rows["price_high"].tolist(), rows["rating"].tolist()
+
+
+class HotelCatalog(Mapping):
+    """
+    The saved catalog as a read-only {city: CityHotels} mapping. `rows` is
+    the memory-mapped record array; hotels are decoded only when read.
+    """
+    def __init__(self, rows):
+        self.rows = rows
+        self._cities = {}
+        if len(rows):
+            cities = rows["city"]
+            starts = np.flatnonzero(np.r_[True, cities[1:] != cities[:-1]]).tolist()
+            for start, end in zip(starts, starts[1:] + [len(rows)]):
+                self._cities[cities[start].decode()] = CityHotels(self, start, end)
+
+    def __getitem__(self, city):
+        return self._cities[city]
+
+    def __iter__(self):
+        return iter(self._cities)
+
+    def __len__(self):
+        return len(self._cities)
+
+    def hotel(self, row):
+        return _to_hotel(self.rows[row].tolist())
+
+    def hotels(self, rows):
+        """Hotel dicts for a list or array of row numbers, read from the file in one go."""
+        return [_to_hotel(record) for record in self.rows[np.asarray(rows, dtype=np.int64)].tolist()]
+
+    def _span(self, city):
+        if city is None:
+            return 0, len(self.rows)
+        hotels = self[city]
+        return hotels.start, hotels.end
+
+    @staticmethod
+    def _passes(column, size, min_price=None, max_price=None, min_rating=None):
+        # Same bounds as hotel_index.CityIndex.page. column(name) reads one
+        # column of the rows being checked, so unused columns are not read.
+        mask = np.ones(size, dtype=bool)
+        if max_price is not None:
+            mask &= column("price_low") <= max_price
+        if min_price is not None:
+            mask &= (column("price_high") >= min_price) & (column("price_low") < math.inf)
+        if min_rating is not None:
+            mask &= column("rating") >= min_rating
+        return mask
+
+    def matcher(self, city=None, **filters):
+        """
+        Vectorized predicate over row numbers: the row is in `city` and
+        passes the min_price, max_price and min_rating filters. None when
+        there is nothing to check.
+        """
+        if city is None and not filters:
+            return None
+        start, end = self._span(city)
+        return lambda rows: ((rows >= start) & (rows < end)
+                             & self._passes(lambda name: self.rows[name][rows], len(rows), **filters))
+
+    def count(self, city=None, **filters):
+        """Hotels with coordinates in `city` (or anywhere) that pass the filters."""
+        start, end = self._span(city)
+        records = self.rows[start:end]
+        return int((~np.isnan(records["lat"]) & self._passes(records.__getitem__, len(records), **filters)).sum())
+
+    def locate(self, drop_off):
+        """{"lat", "lng"} of the hotel whose "name, address" is `drop_off`, or None."""
+        key = drop_off.encode()
+        order, names, addresses = self.rows["by_key"], self.rows["name"], self.rows["address"]
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            row = int(order[mid])
+            if names[row] + b", " + addresses[row] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(order):
+            return None
+        row = int(order[lo])
+        if names[row] + b", " + addresses[row] != key or math.isnan(self.rows["lat"][row]):
+            return None
+        return {"lat": float(self.rows["lat"][row]), "lng": float(self.rows["lng"][row])}
+
+
+def load(path=CATALOG_PATH, num_hotels_per_city=HOTELS_PER_CITY, seed=CATALOG_SEED):
+    """
+    Memory-map the catalog at `path`, building and saving it first when the
+    file is missing or older than hotels_data.json.
+    """
+    stale = not os.path.exists(path) or (
+        os.path.exists(CURATED_HOTELS_PATH) and os.path.getmtime(path) < os.path.getmtime(CURATED_HOTELS_PATH)
+    )
+    if stale:
+        save(to_records(generate_hotels(num_hotels_per_city, seed)), path)
+    return HotelCatalog(np.load(path, mmap_mode="r", allow_pickle=False))
@@ -0,0 +1,106 @@
+import heapq
+import math
+import re
+from bisect import bisect_right
+
+SORTS = ("rating", "price")
+
+_PRICE_RE = re.compile(r"\$?\s*(\d+(?:\.\d+)?)")
+
+
+def parse_price_range(price_range):
+    """(low, high) nightly price from a "$120 - $260" display string, or (inf, inf) if unreadable."""
+    prices = [float(p) for p in _PRICE_RE.findall(str(price_range or ""))[:2]]
+    if not prices:
+        return math.inf, math.inf
+    return min(prices), max(prices)
+
+
+class CityIndex:
+    """
+    Numeric columns and sorted indexes over one city's hotels.
+
+    Prices are parsed out of `price_range` and ratings read once, when the
+    index is built. Two permutations of the hotels are kept, by low price
+    (cheapest first, unreadable prices last) and by rating (highest first),
+    each with its sort keys in a plain list. A max_price or min_rating bound
+    is then one bisect, and the hotels inside it are a prefix of that
+    permutation.
+
+    `columns` is (low prices, high prices, ratings) when the caller already
+    has them, as hotel_catalog does; `hotels` is then only read for the
+    hotels on a page.
+    """
+    def __init__(self, hotels, columns=None):
+        self.hotels = hotels
+        if columns is not None:
+            self.low, self.high, self.rating = columns
+        else:
+            self.low, self.high, self.rating = [], [], []
+            for hotel in hotels:
+                low, high = parse_price_range(hotel.get("price_range"))
+                self.low.append(low)
+                self.high.append(high)
+                self.rating.append(float(hotel.get("rating") or 0.0))
+
+        self.by_price = sorted(range(len(hotels)), key=lambda i: (self.low[i], i))
+        self._price_keys = [self.low[i] for i in self.by_price]
+        self.by_rating = sorted(range(len(hotels)), key=lambda i: (-self.rating[i], i))
+        self._rating_keys = [-self.rating[i] for i in self.by_rating]
+
+    def __len__(self):
+        return len(self.hotels)
+
+    def _candidates(self, max_price, min_rating, sort):
+        """
+        (rows, end, ordered, bound): the permutation whose first `end` rows
+        cover every match, whether it is already in `sort` order, and which
+        bound ("price", "rating" or None) it enforces. The shortest prefix
+        wins; one that also gives the order counts as a quarter of its length.
+        """
+        options = [(range(len(self.hotels)), len(self.hotels), not sort, None)]
+        if max_price is not None or sort == "price":
+            end = len(self.by_price) if max_price is None else bisect_right(self._price_keys, max_price)
+            options.append((self.by_price, end, sort == "price", "price"))
+        if min_rating is not None or sort == "rating":
+            end = len(self.by_rating) if min_rating is None else bisect_right(self._rating_keys, -min_rating)
+            options.append((self.by_rating, end, sort == "rating", "rating"))
+        return min(options, key=lambda option: option[1] / 4 if option[2] else option[1])
+
+    def page(self, offset=0, limit=50, sort=None, min_price=None, max_price=None, min_rating=None):
+        """
+        (hotels on [offset, offset + limit) of the matches, number of
+        matches). Hotels match when their price range overlaps [min_price,
+        max_price] and their rating is at least `min_rating`. They come in
+        catalog order or by `sort` ("price" cheapest first, "rating" highest
+        first), ties in catalog order.
+        """
+        if sort and sort not in SORTS:
+            raise ValueError(f"sort must be one of: {', '.join(SORTS)}")
+        rows, end, ordered, bound = self._candidates(max_price, min_rating, sort)
+        low, high, rating = self.low, self.high, self.rating
+
+        checks = []
+        if max_price is not None and bound != "price":
+            checks.append(lambda i: low[i] <= max_price)
+        if min_price is not None:
+            checks.append(lambda i: high[i] >= min_price and low[i] < math.inf)
+        if min_rating is not None and bound != "rating":
+            checks.append(lambda i: rating[i] >= min_rating)
+
+        if checks:
+            rows = [i for i in rows[:end] if all(check(i) for check in checks)]
+            end = len(rows)
+        if ordered:
+            selected = rows[offset:min(end, offset + limit)]
+        else:
+            # The candidates are not in the requested order (row numbers are
+            # catalog order): keep a heap of offset + limit.
+            keys = {None: None, "": None, "price": lambda i: (low[i], i), "rating": lambda i: (-rating[i], i)}
+            key = keys[sort]
+            selected = heapq.nsmallest(offset + limit, rows[:end], key=key)[offset:]
+        return [self.hotels[i] for i in selected], end
+
+
+def build_indexes(hotels_by_city):
+    return {city: CityIndex(hotels, getattr(hotels, "columns", None)) for city, hotels in hotels_by_city.items()}
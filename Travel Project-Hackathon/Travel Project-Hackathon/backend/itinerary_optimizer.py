@@ -0,0 +1,193 @@
+import math
+import re
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# Every term is expressed in dollars so the weights read as "what is an hour
+# (or a star) worth". Lower scores are better.
+DEFAULT_WEIGHTS = {
+    "cost": 1.0,           # per dollar of hotel + cab (+ flight, when priced)
+    "flight_hour": 25.0,   # per hour in the air
+    "wait_hour": 10.0,     # per hour between reaching the hotel and check-in
+    "late_hour": 60.0,     # per hour reaching the hotel after check-in time
+    "rating": 80.0,        # credit per hotel star
+}
+
+CHECKIN_HOUR = 15
+CAB_BASE_FARE = 3.0
+CAB_PER_KM = 1.5
+CAB_SPEED_KMH = 40.0
+NIGHT_SURGE = 1.5  # arrivals between 22:00 and 06:00
+
+_PRICE_RE = re.compile(r"\$?\s*(\d+(?:\.\d+)?)")
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _as_utc(moment):
+    """An aware datetime in UTC; naive times are taken to be UTC already."""
+    return moment.astimezone(timezone.utc) if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def _nightly_price(price_range):
+    """Midpoint of a "$120 - $260" price range, or 0 if it cannot be read."""
+    prices = [float(p) for p in _PRICE_RE.findall(str(price_range or ""))]
+    return sum(prices[:2]) / len(prices[:2]) if prices else 0.0
+
+
+def _haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 6371.0 * 2 * np.arcsin(np.sqrt(a))
+
+
+def flight_features(flights, checkin_at):
+    """
+    Per-flight arrays: indexes of usable flights, fixed cost (price plus
+    flight time), arrival hours before check-in, and cab surge multiplier.
+    Flights without a readable arrival time are dropped: the cab cannot be
+    scheduled for them.
+
+    Flight time is measured between the two instants in UTC. `checkin_at`
+    is the hotel's local wall-clock time, so it is compared with the arrival
+    in the arrival's own UTC offset, which is the destination's.
+    """
+    index, price, hours, slack, surge = [], [], [], [], []
+    for i, flight in enumerate(flights):
+        arrival = _parse_time((flight.get("arrival") or {}).get("time"))
+        if arrival is None:
+            continue
+        departure = _parse_time((flight.get("departure") or {}).get("time"))
+        try:
+            flight_hours = (_as_utc(arrival) - _as_utc(departure)).total_seconds() / 3600 if departure else 0.0
+            hours_before_checkin = (checkin_at.replace(tzinfo=arrival.tzinfo) - arrival).total_seconds() / 3600
+        except (OverflowError, TypeError, ValueError):
+            continue
+        index.append(i)
+        price.append(float(flight.get("price") or 0.0))
+        hours.append(flight_hours)
+        slack.append(hours_before_checkin)
+        surge.append(NIGHT_SURGE if arrival.hour >= 22 or arrival.hour < 6 else 1.0)
+    return (np.array(index, dtype=np.int64), np.array(price), np.array(hours),
+            np.array(slack), np.array(surge))
+
+
+def hotel_features(hotels, airport=None):
+    """Per-hotel arrays: nightly price, rating and distance from the airport (km)."""
+    nightly = np.array([_nightly_price(h.get("price_range")) for h in hotels], dtype=np.float64)
+    rating = np.array([float(h.get("rating") or 0.0) for h in hotels], dtype=np.float64)
+    distance = np.zeros(len(hotels))
+    if airport:
+        lat = np.array([h.get("lat", np.nan) for h in hotels], dtype=np.float64)
+        lng = np.array([h.get("lng", np.nan) for h in hotels], dtype=np.float64)
+        known = ~np.isnan(lat) & ~np.isnan(lng)
+        distance[known] = _haversine_km(airport["lat"], airport["lng"], lat[known], lng[known])
+    return nightly, rating, distance
+
+
+def rank_itineraries(flights, hotels, checkin_date, checkout_date=None, num_rooms=1,
+                     airport=None, top_k=5, weights=None):
+    """
+    Score every flight × hotel combination and return (ranked, stats).
+
+    The score of a pair is separable into a flight part (flight time, price,
+    waiting or lateness against check-in), a hotel part (stay cost, rating)
+    and a cab part that couples them (fare from the hotel's distance to
+    `airport`, surged for late-night arrivals, and the ride time counted
+    against check-in). Before building the score matrix, the best pairs among
+    the individually best flights and hotels set a threshold, and every
+    flight or hotel whose lower bound is above it is pruned. The surviving
+    block is scored with numpy and the top k are taken with argpartition.
+
+    `ranked` is a list of {"flight_index", "hotel_index", "score", "breakdown"}
+    ordered best first.
+    """
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    checkin_day = datetime.strptime(checkin_date, "%Y-%m-%d")
+    checkin_at = checkin_day + timedelta(hours=CHECKIN_HOUR)
+    nights = 1
+    if checkout_date:
+        nights = max(1, (datetime.strptime(checkout_date, "%Y-%m-%d") - checkin_day).days)
+    num_rooms = max(1, int(num_rooms or 1))
+
+    f_index, f_price, f_hours, f_slack, f_surge = flight_features(flights, checkin_at)
+    nightly, rating, distance = hotel_features(hotels, airport)
+    stats = {"flights": len(flights), "hotels": len(hotels), "usable_flights": int(f_index.size),
+             "pairs": int(f_index.size) * len(hotels)}
+    if f_index.size == 0 or len(hotels) == 0:
+        return [], {**stats, "evaluated_pairs": 0}
+
+    # Separable parts.
+    flight_part = weights["cost"] * f_price + weights["flight_hour"] * f_hours
+    stay_cost = nightly * nights * num_rooms
+    hotel_part = weights["cost"] * stay_cost - weights["rating"] * rating
+    cab_fare = CAB_BASE_FARE + CAB_PER_KM * distance
+    ride_hours = distance / CAB_SPEED_KMH
+
+    def pair_scores(fi, hi):
+        """Score matrix for flight rows `fi` × hotel columns `hi`."""
+        slack = f_slack[fi, None] - ride_hours[None, hi]
+        timing = np.where(slack >= 0, weights["wait_hour"] * slack, -weights["late_hour"] * slack)
+        fare = f_surge[fi, None] * cab_fare[None, hi]
+        return flight_part[fi, None] + hotel_part[None, hi] + weights["cost"] * fare + timing
+
+    # Lower bounds. The timing term is convex in slack with its minimum (0)
+    # at zero slack, so its bound for a flight is the penalty at the ride time
+    # closest to that flight's slack; for a hotel, at the flight slack closest
+    # to its ride time.
+    def timing_penalty(slack):
+        return np.where(slack >= 0, weights["wait_hour"] * slack, -weights["late_hour"] * slack)
+
+    min_ride, max_ride = ride_hours.min(), ride_hours.max()
+    flight_bound = (flight_part + hotel_part.min() + weights["cost"] * f_surge * cab_fare.min()
+                    + timing_penalty(f_slack - np.clip(f_slack, min_ride, max_ride)))
+    min_slack, max_slack = f_slack.min(), f_slack.max()
+    hotel_bound = (hotel_part + flight_part.min() + weights["cost"] * f_surge.min() * cab_fare
+                   + timing_penalty(np.clip(ride_hours, min_slack, max_slack) - ride_hours))
+
+    # Threshold from a small block of individually promising candidates.
+    k = max(1, int(top_k))
+    seed = max(k, 8)
+    seed_f = np.argsort(flight_bound)[:seed]
+    seed_h = np.argsort(hotel_bound)[:seed]
+    seed_scores = np.sort(pair_scores(seed_f, seed_h), axis=None)
+    threshold = seed_scores[min(k, seed_scores.size) - 1]
+
+    keep_f = np.flatnonzero(flight_bound <= threshold)
+    keep_h = np.flatnonzero(hotel_bound <= threshold)
+    scores = pair_scores(keep_f, keep_h)
+    stats.update({"evaluated_pairs": int(scores.size), "pruned_flights": int(f_index.size - keep_f.size),
+                  "pruned_hotels": int(len(hotels) - keep_h.size)})
+
+    flat = scores.ravel()
+    k = min(k, flat.size)
+    best = np.argpartition(flat, k - 1)[:k]
+    best = best[np.argsort(flat[best], kind="stable")]
+
+    ranked = []
+    for position in best:
+        fi, hi = keep_f[position // keep_h.size], keep_h[position % keep_h.size]
+        fare = float(f_surge[fi] * cab_fare[hi])
+        ranked.append({
+            "flight_index": int(f_index[fi]),
+            "hotel_index": int(hi),
+            "score": round(float(flat[position]), 2),
+            "breakdown": {
+                "total_cost": round(float(f_price[fi] + stay_cost[hi] + fare), 2),
+                "hotel_cost": round(float(stay_cost[hi]), 2),
+                "cab_fare_estimate": round(fare, 2),
+                "flight_hours": round(float(f_hours[fi]), 2),
+                "checkin_slack_hours": round(float(f_slack[fi] - ride_hours[hi]), 2),
+                "hotel_rating": float(rating[hi]),
+                "cab_distance_km": None if math.isclose(distance[hi], 0.0) else round(float(distance[hi]), 1),
+            },
+        })
+    return ranked, stats
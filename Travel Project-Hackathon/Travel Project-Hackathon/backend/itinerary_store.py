@@ -0,0 +1,121 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class ItineraryStore:
+    """
+    Durable itinerary storage shared by every controller worker.
+
+    Itineraries live in a local SQLite database in WAL mode, so several
+    worker processes can read while one writes and nothing is lost on
+    restart. Each itinerary gets an ID and is indexed by the user's email.
+    A bounded LRU cache in front of the database serves repeated lookups by
+    ID without touching disk.
+    """
+    def __init__(self, path, cache_size=1024):
+        self.path = path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS itineraries (
+                id TEXT PRIMARY KEY,
+                email TEXT,
+                created_at REAL NOT NULL,
+                body TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_itineraries_email ON itineraries (email, created_at DESC, id DESC)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_itineraries_created ON itineraries (created_at DESC, id DESC)")
+        conn.commit()
+
+    def _conn(self):
+        # sqlite3 connections must not be shared across threads.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, itinerary_id, record):
+        with self._cache_lock:
+            self._cache[itinerary_id] = record
+            self._cache.move_to_end(itinerary_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _record(itinerary_id, created_at, itinerary):
+        return {"itinerary_id": itinerary_id, "created_at": created_at, **itinerary}
+
+    def save(self, itinerary):
+        """Store `itinerary` and return its new ID."""
+        itinerary_id = uuid.uuid4().hex
+        created_at = time.time()
+        email = (itinerary.get("user") or {}).get("email") or None
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO itineraries (id, email, created_at, body) VALUES (?, ?, ?, ?)",
+                (itinerary_id, email, created_at, json.dumps(itinerary))
+            )
+        self._remember(itinerary_id, self._record(itinerary_id, created_at, itinerary))
+        return itinerary_id
+
+    def get(self, itinerary_id):
+        with self._cache_lock:
+            record = self._cache.get(itinerary_id)
+            if record is not None:
+                self._cache.move_to_end(itinerary_id)
+                return record
+
+        row = self._conn().execute(
+            "SELECT id, created_at, body FROM itineraries WHERE id = ?", (itinerary_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        record = self._record(row[0], row[1], json.loads(row[2]))
+        self._remember(itinerary_id, record)
+        return record
+
+    def list_for_user(self, email, limit=20, cursor=None):
+        """
+        Return (itineraries, next_cursor) for `email`, newest first.
+        `cursor` is the opaque value returned by the previous page.
+        """
+        query = "SELECT id, created_at, body FROM itineraries WHERE email = ?"
+        params = [email]
+        if cursor:
+            created_at, last_id = cursor.split(":", 1)
+            query += " AND (created_at < ? OR (created_at = ? AND id < ?))"
+            params += [float(created_at), float(created_at), last_id]
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        rows = self._conn().execute(query, params).fetchall()
+        page = [self._record(row[0], row[1], json.loads(row[2])) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            next_cursor = f"{last['created_at']!r}:{last['itinerary_id']}"
+        return page, next_cursor
+
+    def latest(self, email=None):
+        if email:
+            page, _ = self.list_for_user(email, limit=1)
+            return page[0] if page else None
+        row = self._conn().execute(
+            "SELECT id, created_at, body FROM itineraries ORDER BY created_at DESC, id DESC LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        return self._record(row[0], row[1], json.loads(row[2]))
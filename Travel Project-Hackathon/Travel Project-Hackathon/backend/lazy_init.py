@@ -0,0 +1,110 @@
+import threading
+import time
+
+from codec import respond
+
+_UNSET = object()
+
+# Every LazyResource created in this process, so a benchmark or a combined
+# process can warm everything without knowing each service's internals.
+_registry = []
+
+
+class LazyResource:
+    """
+    A dataset or client that is built on first use instead of at import.
+
+    Importing an agent module (which the controller and every forked worker
+    do) stays cheap; the first caller of `.value` pays for the factory, once,
+    and concurrent callers wait for that single build. A failed build is
+    recorded and retried by the next caller.
+    """
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.load_ms = None
+        self.error = None
+        self._value = _UNSET
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    @property
+    def ready(self):
+        return self._value is not _UNSET
+
+    @property
+    def value(self):
+        if self._value is _UNSET:
+            with self._lock:
+                if self._value is _UNSET:
+                    started = time.perf_counter()
+                    try:
+                        value = self.factory()
+                    except Exception as e:
+                        self.error = f"{type(e).__name__}: {e}"
+                        raise
+                    self.load_ms = round((time.perf_counter() - started) * 1000, 2)
+                    self.error = None
+                    self._value = value
+        return self._value
+
+    def status(self):
+        return {"ready": self.ready, "load_ms": self.load_ms, "error": self.error}
+
+
+def all_resources():
+    return list(_registry)
+
+
+def warm_up(resources=None, background=False):
+    """
+    Build `resources` (default: every resource in the process). With
+    `background=True` this returns the loader thread immediately.
+    """
+    resources = all_resources() if resources is None else list(resources)
+
+    def load():
+        for resource in resources:
+            try:
+                resource.value
+            except Exception as e:
+                print(f"Warm-up of {resource.name} failed: {e}")
+
+    if background:
+        thread = threading.Thread(target=load, daemon=True, name="warm-up")
+        thread.start()
+        return thread
+    load()
+    return None
+
+
+def install(app, service, resources):
+    """
+    Add readiness reporting to a Flask app:
+
+    - GET /ready returns 200 once every resource is loaded and 503 before
+      that. The first probe starts a background warm-up, so a load balancer
+      or the load-test harness brings the service up without a user request
+      paying for it. A failed warm-up is retried by the next probe.
+    - POST /warmup loads everything synchronously and reports the result.
+    """
+    resources = list(resources)
+    loader = {"thread": None}
+
+    def report():
+        statuses = {resource.name: resource.status() for resource in resources}
+        ready = all(status["ready"] for status in statuses.values())
+        return {"service": service, "ready": ready, "resources": statuses}, (200 if ready else 503)
+
+    @app.route('/ready', methods=['GET'])
+    def ready():
+        body, status = report()
+        if status != 200 and not (loader["thread"] and loader["thread"].is_alive()):
+            loader["thread"] = warm_up(resources, background=True)
+        return respond(body, status)
+
+    @app.route('/warmup', methods=['POST'])
+    def warmup():
+        warm_up(resources)
+        body, status = report()
+        return respond(body, status)
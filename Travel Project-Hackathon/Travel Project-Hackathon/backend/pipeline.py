@@ -0,0 +1,125 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class Stage:
+    """
+    One step of a travel plan. `func` receives a dict with the results of the
+    stages listed in `depends_on` and returns this stage's result.
+    """
+    def __init__(self, name, func, depends_on=()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+
+class StageFailed(Exception):
+    """
+    Raised when a stage raises. Keeps the original error plus whatever
+    results and timings were collected before the failure.
+    """
+    def __init__(self, stage, error, results, timings):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+        self.results = results
+        self.timings = timings
+
+
+def _ordered(stages):
+    """Return the stages in dependency order, rejecting unknown or cyclic deps."""
+    by_name = {stage.name: stage for stage in stages}
+    ordered, done, visiting = [], set(), set()
+
+    def visit(stage):
+        if stage.name in done:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"Cyclic dependency at stage '{stage.name}'")
+        visiting.add(stage.name)
+        for dep in stage.depends_on:
+            if dep not in by_name:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+            visit(by_name[dep])
+        visiting.discard(stage.name)
+        done.add(stage.name)
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+
+def _timed(stage, inputs, origin):
+    """Run one stage, returning (result, error, timing) instead of raising."""
+    started = time.perf_counter()
+    result, error = None, None
+    try:
+        result = stage.func(inputs)
+    except Exception as e:
+        error = e
+    timing = {
+        "start_ms": round((started - origin) * 1000, 2),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+    return result, error, timing
+
+
+def run_stages(stages, mode="concurrent", executor=None, on_stage_done=None):
+    """
+    Run `stages` and return (results, timings).
+
+    In "concurrent" mode every stage is submitted to `executor` as soon as all
+    of its dependencies have finished, so independent stages overlap. In
+    "sequential" mode the stages run one after another in dependency order.
+    Timings are per stage, in milliseconds relative to the start of the run,
+    plus a "total_ms" entry.
+
+    `on_stage_done(name, result, timing)` is called as each stage succeeds,
+    which lets callers report progress before the whole run has finished.
+    """
+    ordered = _ordered(stages)
+    origin = time.perf_counter()
+    results, timings = {}, {}
+
+    def inputs_for(stage):
+        return {dep: results[dep] for dep in stage.depends_on}
+
+    if mode == "sequential" or executor is None:
+        for stage in ordered:
+            result, error, timings[stage.name] = _timed(stage, inputs_for(stage), origin)
+            if error is not None:
+                raise StageFailed(stage.name, error, results, timings) from error
+            results[stage.name] = result
+            if on_stage_done:
+                on_stage_done(stage.name, result, timings[stage.name])
+    elif mode == "concurrent":
+        pending = list(ordered)
+        running = {}
+        while pending or running:
+            for stage in [s for s in pending if all(dep in results for dep in s.depends_on)]:
+                pending.remove(stage)
+                # Copy the caller's context so trace IDs follow the stage into the pool.
+                context = contextvars.copy_context()
+                running[executor.submit(context.run, _timed, stage, inputs_for(stage), origin)] = stage
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                result, error, timings[stage.name] = future.result()
+                if error is not None:
+                    for other in running:
+                        other.cancel()
+                    raise StageFailed(stage.name, error, results, timings) from error
+                results[stage.name] = result
+                if on_stage_done:
+                    on_stage_done(stage.name, result, timings[stage.name])
+    else:
+        raise ValueError(f"Unknown execution mode: {mode}")
+
+    timings["total_ms"] = round((time.perf_counter() - origin) * 1000, 2)
+    return results, timings
+
+
+def make_executor(max_workers=8):
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="plan-stage")
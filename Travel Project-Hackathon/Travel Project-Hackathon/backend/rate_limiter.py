@@ -0,0 +1,195 @@
+import calendar
+import sqlite3
+import threading
+import time
+
+import requests
+
+PRIORITIES = ("interactive", "bulk")
+
+
+class QuotaExceeded(requests.exceptions.RequestException):
+    """Raised when no upstream call may be made within the caller's wait budget."""
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QuotaLimiter:
+    """
+    Token-bucket limiter for an upstream API with a per-second rate and a
+    monthly call quota, shared by every worker process on the host.
+
+    The bucket and the month's call count live in one SQLite row, updated in
+    a BEGIN IMMEDIATE transaction, so forked workers and separate processes
+    draw from the same budget. The bucket refills at `rate_per_second` up to
+    `burst` tokens.
+
+    Callers name a priority class. "interactive" calls may use every token.
+    "bulk" calls must leave `bulk_bucket_reserve` of the bucket and
+    `bulk_monthly_reserve` of the monthly quota untouched, so scans give way
+    to user searches when the budget runs low. Each class waits up to
+    `max_wait[priority]` seconds for a token before QuotaExceeded is raised.
+    A `monthly_quota` of 0 means no monthly limit.
+    """
+    def __init__(self, path, rate_per_second=5.0, burst=10, monthly_quota=0,
+                 bulk_bucket_reserve=0.5, bulk_monthly_reserve=0.1, max_wait=None):
+        self.path = path
+        self.rate = float(rate_per_second)
+        self.burst = float(burst)
+        self.monthly_quota = int(monthly_quota)
+        self.reserves = {
+            "interactive": (0.0, 0),
+            "bulk": (self.burst * bulk_bucket_reserve, int(self.monthly_quota * bulk_monthly_reserve)),
+        }
+        self.max_wait = {"interactive": 2.0, "bulk": 0.0, **(max_wait or {})}
+        self._local = threading.local()
+        self._counts_lock = threading.Lock()
+        self._counts = {(priority, outcome): 0 for priority in PRIORITIES for outcome in ("granted", "rejected")}
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS quota (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                blocked_until REAL NOT NULL,
+                month TEXT NOT NULL,
+                month_used INTEGER NOT NULL
+            )
+        """)
+        conn.execute("INSERT OR IGNORE INTO quota VALUES (1, ?, ?, 0, ?, 0)", (self.burst, time.time(), self._month()))
+        conn.commit()
+
+    def _conn(self):
+        # sqlite3 connections must not be shared across threads.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _month(now=None):
+        return time.strftime("%Y-%m", time.gmtime(now))
+
+    @staticmethod
+    def _next_month(now=None):
+        """Epoch seconds at the start of next month, UTC."""
+        year, month = time.gmtime(now)[:2]
+        return calendar.timegm((year + month // 12, month % 12 + 1, 1, 0, 0, 0))
+
+    def _read(self, conn, now):
+        tokens, updated_at, blocked_until, month, month_used = conn.execute(
+            "SELECT tokens, updated_at, blocked_until, month, month_used FROM quota WHERE id = 1"
+        ).fetchone()
+        tokens = min(self.burst, tokens + max(0.0, now - updated_at) * self.rate)
+        if month != self._month(now):
+            month, month_used = self._month(now), 0
+        return tokens, blocked_until, month, month_used
+
+    def _try_take(self, priority):
+        """
+        Take one token if `priority` may. Returns (granted, seconds to wait
+        before a token could be available, or None if waiting cannot help).
+        """
+        bucket_reserve, monthly_reserve = self.reserves[priority]
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, blocked_until, month, month_used = self._read(conn, now)
+            if self.monthly_quota and month_used >= self.monthly_quota - monthly_reserve:
+                wait = None
+            elif now < blocked_until:
+                wait = blocked_until - now
+            elif tokens - 1 >= bucket_reserve:
+                tokens -= 1
+                month_used += 1
+                wait = 0.0
+            else:
+                wait = (bucket_reserve + 1 - tokens) / self.rate if self.rate > 0 else None
+            conn.execute(
+                "UPDATE quota SET tokens = ?, updated_at = ?, month = ?, month_used = ? WHERE id = 1",
+                (tokens, now, month, month_used)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait == 0.0, wait
+
+    def acquire(self, priority="interactive"):
+        """
+        Block until `priority` may make one upstream call, or raise
+        QuotaExceeded once its wait budget would be overrun.
+        """
+        if priority not in self.reserves:
+            raise ValueError(f"priority must be one of: {', '.join(PRIORITIES)}")
+        deadline = time.monotonic() + self.max_wait[priority]
+        while True:
+            granted, wait = self._try_take(priority)
+            if granted:
+                self._count(priority, "granted")
+                return
+            if wait is None or time.monotonic() + wait > deadline:
+                self._count(priority, "rejected")
+                if wait is None:
+                    raise QuotaExceeded(f"Monthly aviationstack quota left for {priority} calls is used up.")
+                raise QuotaExceeded(f"aviationstack rate limit reached for {priority} calls.",
+                                    retry_after=max(1, round(wait)))
+            time.sleep(wait)
+
+    def throttle(self, seconds):
+        """Stop every worker's calls for `seconds`, after the upstream has throttled us."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("UPDATE quota SET blocked_until = MAX(blocked_until, ?), tokens = 0, updated_at = ? WHERE id = 1",
+                         (time.time() + seconds, time.time()))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def exhaust_month(self):
+        """
+        Record that the upstream reports this month's quota as used up.
+        Without a monthly_quota, calls are blocked until next month (UTC).
+        """
+        if not self.monthly_quota:
+            now = time.time()
+            self.throttle(self._next_month(now) - now)
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("UPDATE quota SET month = ?, month_used = ? WHERE id = 1", (self._month(), self.monthly_quota))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _count(self, priority, outcome):
+        with self._counts_lock:
+            self._counts[(priority, outcome)] += 1
+
+    def stats(self):
+        now = time.time()
+        tokens, blocked_until, month, month_used = self._read(self._conn(), now)
+        with self._counts_lock:
+            counts = {priority: {outcome: self._counts[(priority, outcome)] for outcome in ("granted", "rejected")}
+                      for priority in PRIORITIES}
+        return {
+            "tokens": round(tokens, 3),
+            "burst": self.burst,
+            "rate_per_second": self.rate,
+            "blocked_for_seconds": round(max(0.0, blocked_until - now), 3),
+            "month": month,
+            "month_used": month_used,
+            "monthly_quota": self.monthly_quota or None,
+            "monthly_remaining": max(0, self.monthly_quota - month_used) if self.monthly_quota else None,
+            "calls": counts,
+        }
@@ -0,0 +1,51 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one.
+
+    The first caller for a key runs the function; callers that arrive while
+    it is still running wait for it and get the same result (or exception)
+    instead of making their own call. Nothing is kept once the call
+    finishes, so this is deduplication of in-flight work, not a cache.
+
+    `on_collapse()` is called for every caller that joined an in-flight call.
+    """
+    def __init__(self, on_collapse=None):
+        self.on_collapse = on_collapse
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._counts = {"calls": 0, "collapsed": 0}
+
+    def do(self, key, func):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self._counts["calls"] += 1
+            else:
+                self._counts["collapsed"] += 1
+        if not leader:
+            if self.on_collapse:
+                self.on_collapse()
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self):
+        with self._lock:
+            return {**self._counts, "in_flight": len(self._calls)}
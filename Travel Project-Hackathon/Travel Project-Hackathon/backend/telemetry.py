@@ -0,0 +1,224 @@
+import contextvars
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+TRACE_HEADER = "X-Trace-Id"
+
+# Seconds. Wide enough to cover both in-memory lookups and slow upstream
+# calls such as aviationstack and Gemini.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+_service = contextvars.ContextVar("service", default="unknown")
+_spans = contextvars.ContextVar("spans", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *labels, value):
+        with self._lock:
+            entry = self._values.setdefault(labels, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["buckets"][i] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, dict(entry, buckets=list(entry["buckets"]))) for labels, entry in self._values.items())
+        for labels, entry in items:
+            for bound, count in zip(self.buckets, entry["buckets"]):
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, ('le', bound))} {count}")
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, ('le', '+Inf'))} {entry['count']}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {round(entry['sum'], 6)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {entry['count']}")
+        return lines
+
+
+# --- Process-wide registry ---
+# The controller imports the agent modules, so one process can host several
+# services; every series carries a `service` label.
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Request latency by endpoint.",
+                            ("service", "endpoint", "method", "status"))
+REQUEST_ERRORS = Counter("http_request_errors_total", "Requests that ended in a 5xx or an unhandled error.",
+                         ("service", "endpoint"))
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being served.", ("service", "endpoint"))
+SPAN_LATENCY = Histogram("span_duration_seconds", "Duration of timed spans (external calls and hot loops).",
+                         ("service", "span"))
+SPAN_ERRORS = Counter("span_errors_total", "Spans that raised.", ("service", "span"))
+
+_metrics = [REQUEST_LATENCY, REQUEST_ERRORS, REQUESTS_IN_FLIGHT, SPAN_LATENCY, SPAN_ERRORS]
+
+
+def register(metric):
+    """Add a service-specific metric to the /metrics output."""
+    _metrics.append(metric)
+    return metric
+
+
+def render_metrics():
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def current_trace_id():
+    return _trace_id.get()
+
+
+def current_service():
+    return _service.get()
+
+
+def trace_headers():
+    """Headers to forward the current trace to another service."""
+    trace_id = _trace_id.get()
+    return {TRACE_HEADER: trace_id} if trace_id else {}
+
+
+@contextmanager
+def span(name):
+    """
+    Time a block as a named span. The duration goes into the
+    span_duration_seconds histogram and onto the current request's
+    Server-Timing header.
+    """
+    service = _service.get()
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        SPAN_ERRORS.inc(service, name)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        SPAN_LATENCY.observe(service, name, value=elapsed)
+        spans = _spans.get()
+        if spans is not None:
+            spans.append((name, elapsed))
+
+
+def install(app, service):
+    """
+    Add trace propagation, request metrics and a GET /metrics endpoint
+    (Prometheus text format) to a Flask app.
+    """
+    def endpoint():
+        return request.url_rule.rule if request.url_rule else "unmatched"
+
+    @app.before_request
+    def start_request():
+        trace_id = request.headers.get(TRACE_HEADER) or uuid.uuid4().hex
+        g.telemetry = {
+            "started": time.perf_counter(),
+            "endpoint": endpoint(),
+            "tokens": (_trace_id.set(trace_id), _service.set(service), _spans.set([])),
+        }
+        REQUESTS_IN_FLIGHT.inc(service, g.telemetry["endpoint"])
+
+    @app.after_request
+    def finish_request(response):
+        state = g.get("telemetry")
+        if state is None:
+            return response
+        method, status = request.method, response.status_code
+
+        def record():
+            elapsed = time.perf_counter() - state["started"]
+            REQUEST_LATENCY.observe(service, state["endpoint"], method, str(status), value=elapsed)
+            if status >= 500:
+                REQUEST_ERRORS.inc(service, state["endpoint"])
+
+        if response.is_streamed:
+            # The body is still to be sent: count the request as finished
+            # (and in flight until then) when the server closes it.
+            state["streamed"] = True
+
+            def close():
+                record()
+                REQUESTS_IN_FLIGHT.dec(service, state["endpoint"])
+            response.call_on_close(close)
+        else:
+            record()
+        response.headers[TRACE_HEADER] = _trace_id.get() or ""
+        spans = _spans.get() or []
+        if spans:
+            response.headers["Server-Timing"] = ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in spans)
+        return response
+
+    @app.teardown_request
+    def end_request(error):
+        state = g.pop("telemetry", None)
+        if state is None:
+            return
+        if error is not None:
+            REQUEST_ERRORS.inc(service, state["endpoint"])
+        if not state.get("streamed"):
+            REQUESTS_IN_FLIGHT.dec(service, state["endpoint"])
+        for var, token in zip((_trace_id, _service, _spans), state["tokens"]):
+            try:
+                var.reset(token)
+            except ValueError:
+                pass
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,47 @@
+import codec
+
+
+class HttpTransport:
+    """Reach each agent over HTTP through its pooled AgentClient."""
+    name = "http"
+
+    def __init__(self, clients):
+        self.clients = clients
+
+    def call(self, agent, payload, idempotent=False):
+        response = self.clients[agent].post(payload, idempotent=idempotent)
+        return codec.decode(response.content, response.headers.get("Content-Type"))
+
+
+class InProcessTransport:
+    """
+    Call the agent logic directly as Python functions, skipping the HTTP hop
+    and the JSON encode/decode on both sides. Meant for single-node
+    deployments and tests, where all agents live in the controller process.
+    """
+    name = "inprocess"
+
+    def __init__(self, handlers=None):
+        if handlers is None:
+            import flight_agent
+            import hotel_agent
+            import cab_agent
+            handlers = {
+                "flight": flight_agent.find_flights,
+                "hotel": hotel_agent.find_hotels,
+                "city_suggest": hotel_agent.find_city_suggestions,
+                "cab": cab_agent.book_cab,
+            }
+        self.handlers = handlers
+
+    def call(self, agent, payload, idempotent=False):
+        body, _status = self.handlers[agent](payload)
+        return body
+
+
+def make_transport(name, clients):
+    if name == "http":
+        return HttpTransport(clients)
+    if name == "inprocess":
+        return InProcessTransport()
+    raise ValueError(f"Unknown agent transport: {name}")
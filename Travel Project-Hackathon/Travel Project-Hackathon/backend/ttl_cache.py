@@ -0,0 +1,98 @@
+import contextvars
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+EVENTS = ("hit", "miss", "stale", "refresh", "refresh_error", "eviction")
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after `ttl` seconds, with
+    stale-while-revalidate.
+
+    For `stale_ttl` seconds after an entry expires it is still returned
+    immediately, while a single background refresh reloads it; once that
+    window has passed too, the caller loads the value itself. A failed
+    refresh keeps the stale entry. Loaders signal failure by raising, so
+    errors are never cached.
+
+    `on_event(event)` is called for every hit, miss, stale read, refresh,
+    failed refresh and eviction, e.g. to feed a metrics counter.
+    """
+    def __init__(self, max_entries=512, ttl=300.0, stale_ttl=600.0, on_event=None, refresh_workers=2):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.on_event = on_event
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(EVENTS, 0)
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="cache-refresh")
+
+    def _count(self, event):
+        self._counts[event] += 1
+        if self.on_event:
+            self.on_event(event)
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._count("eviction")
+
+    def _refresh(self, key, loader):
+        try:
+            self._store(key, loader())
+            with self._lock:
+                self._count("refresh")
+        except Exception as e:
+            print(f"Cache refresh for {key} failed: {e}")
+            with self._lock:
+                self._count("refresh_error")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for `key`, calling `loader()` when it is missing or too old."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                age = time.monotonic() - stored_at
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self._count("hit")
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._count("stale")
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        self._refresher.submit(contextvars.copy_context().run, self._refresh, key, loader)
+                    return value
+                del self._entries[key]
+            self._count("miss")
+
+        value = loader()
+        self._store(key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+            size = len(self._entries)
+        lookups = counts["hit"] + counts["stale"] + counts["miss"]
+        return {
+            **counts,
+            "entries": size,
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "hit_ratio": round((counts["hit"] + counts["stale"]) / lookups, 4) if lookups else 0.0,
+        }
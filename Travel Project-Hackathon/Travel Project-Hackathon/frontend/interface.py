@@ -4,6 +4,9 @@ from datetime import date
 import os
 import requests
 
+# Every backend call (plans, streaming, city suggestions) goes to the controller.
+CONTROLLER_URL = os.getenv("CONTROLLER_URL", "http://localhost:5004")
+
 # --- Page Setup ---
 st.set_page_config(page_title="Flight Planner", page_icon="✈️", layout="wide")
 
@@ -66,12 +69,32 @@ def render_flight_details():
         "airline": airline.strip()
     }
 
+# --- City suggestions, through the controller ---
+@st.cache_data(ttl=300, show_spinner=False)
+def suggest_cities(prefix):
+    try:
+        response = requests.get(f"{CONTROLLER_URL}/travel/cities/suggest",
+                                params={"q": prefix, "limit": 8}, timeout=2)
+        response.raise_for_status()
+        return response.json().get("suggestions", [])
+    except (requests.exceptions.RequestException, ValueError):
+        return []
+
 # --- Hotel Details ---
 def render_hotel_details():
     st.markdown("### 🏨 Hotel Details")
     col1, col2 = st.columns(2)
     with col1:
         cityname = st.text_input("City Name", key="hotel_city")
+        # Offer the catalog cities matching what was typed ("nyc", "san f");
+        # the best match is preselected.
+        suggestions = suggest_cities(cityname.strip()) if cityname.strip() else []
+        if suggestions:
+            cityname = st.selectbox(
+                "Matching Cities",
+                [suggestion["city"] for suggestion in suggestions],
+                key="hotel_city_match"
+            )
         checkin_date = st.date_input("Check-in Date", value=date.today(), key="hotel_checkin")
     with col2:
         num_of_rooms = st.number_input("Number of Rooms", min_value=1, step=1, value=1, key="hotel_rooms")
@@ -108,7 +131,7 @@ def validate_fields(data):
 
 # --- Function to send data to API ---
 def send_to_api(data, endpoint_suffix):
-    url = f"http://localhost:5004/travel/{endpoint_suffix}"
+    url = f"{CONTROLLER_URL}/travel/{endpoint_suffix}"
     headers = {"Content-Type": "application/json"}
     
     try:
@@ -120,6 +143,24 @@ def send_to_api(data, endpoint_suffix):
     except requests.exceptions.RequestException as e:
         return False, f"Failed to connect to the API: {str(e)}"
 
+# --- Function to stream plan progress from the API ---
+def stream_plan(data):
+    """
+    Yield progress events from /travel/plan/stream as the controller finishes
+    each stage (flight_selected, hotel_selected, cab_booked, itinerary/error).
+    """
+    url = f"{CONTROLLER_URL}/travel/plan/stream"
+    try:
+        with requests.post(url, json=data, stream=True, timeout=(5, 120)) as response:
+            if response.status_code != 200:
+                yield {"event": "error", "error": f"API Error: {response.status_code} - {response.text}"}
+                return
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+    except requests.exceptions.RequestException as e:
+        yield {"event": "error", "error": f"Failed to connect to the API: {str(e)}"}
+
 # --- Re-Plan Page ---
 def show_replan_page():
     st.title("🧭 Re-Plan Travel")
@@ -161,13 +202,30 @@ def show_replan_page():
         with open(file_path, "w") as f:
             json.dump(existing_data, f, indent=4)
         
-        success, api_response = send_to_api(data, "plan")
-        if success:
-            st.session_state.api_response = api_response
-            st.session_state.current_page = "response"
-            st.rerun()
-        else:
-            st.error(f"Error: {api_response}")
+        # Render each stage as soon as the controller reports it, so partial
+        # results stay on screen even if a later stage fails.
+        placeholders = {
+            "flight": st.empty(),
+            "hotel": st.empty(),
+            "cab": st.empty()
+        }
+        with st.spinner("Planning your trip..."):
+            for event in stream_plan(data):
+                if event["event"] == "flight_selected":
+                    with placeholders["flight"].container():
+                        render_flight_info(event["result"])
+                elif event["event"] == "hotel_selected":
+                    with placeholders["hotel"].container():
+                        render_hotel_info(event["result"])
+                elif event["event"] == "cab_booked":
+                    with placeholders["cab"].container():
+                        render_cab_info(event["result"])
+                elif event["event"] == "itinerary":
+                    st.session_state.api_response = event["itinerary"]
+                    st.session_state.current_page = "response"
+                    st.rerun()
+                elif event["event"] == "error":
+                    st.error(f"Error: {event['error']}")
 
     if st.button("Back to Main"):
         st.session_state.current_page = "main"
@@ -220,20 +278,9 @@ def show_reschedule_page():
         st.session_state.current_page = "main"
         st.rerun()
 
-# --- Response Page ---
-def show_response_page():
-    st.title("✨ Your Travel Plan")
-    
-    if st.session_state.api_response is None:
-        st.warning("No travel plan data available.")
-        st.button("Back to Main", on_click=lambda: st.session_state.update({"current_page": "main"}))
-        return
-    
-    response = st.session_state.api_response
-    
-    # Flight Information
+# --- Response Sections ---
+def render_flight_info(flight):
     st.markdown("## ✈️ Flight Information")
-    flight = response.get('flight', {})
     col1, col2 = st.columns(2)
     with col1:
         st.markdown(f"**Airline:** {flight.get('airline', 'N/A')}")
@@ -245,10 +292,9 @@ def show_response_page():
         st.markdown(f"**Duration:** {flight.get('duration', 'N/A')}")
     
     st.markdown("---")
-    
-    # Hotel Information
+
+def render_hotel_info(hotel):
     st.markdown("## 🏨 Hotel Information")
-    hotel = response.get('hotel', {})
     col1, col2 = st.columns(2)
     with col1:
         st.markdown(f"**Name:** {hotel.get('name', 'N/A')}")
@@ -259,10 +305,9 @@ def show_response_page():
         st.markdown(f"**Price Range:** {hotel.get('price_range', 'N/A')}")
     
     st.markdown("---")
-    
-    # Cab Information
+
+def render_cab_info(cab):
     st.markdown("## 🚗 Cab Information")
-    cab = response.get('cab', {})
     driver = cab.get('driver', {})
     col1, col2 = st.columns(2)
     with col1:
@@ -275,13 +320,49 @@ def show_response_page():
         st.markdown(f"**License Plate:** {driver.get('license_plate', 'N/A')}")
     
     st.markdown("---")
-    
-    # User Information
+
+def render_user_info(user):
     st.markdown("## 👤 User Information")
-    user = response.get('user', {})
     st.markdown(f"**Name:** {user.get('name', 'N/A')}")
     st.markdown(f"**Email:** {user.get('email', 'N/A')}")
     st.markdown(f"**Phone:** {user.get('phone_number', 'N/A')}")
+
+def render_alternatives(alternatives):
+    if len(alternatives) < 2:
+        return
+    st.markdown("## 🔀 Other Ranked Options")
+    for option in alternatives[1:]:
+        flight = option.get('flight', {})
+        hotel = option.get('hotel', {})
+        breakdown = option.get('breakdown', {})
+        with st.expander(f"#{option.get('rank')} · {flight.get('flight_number', 'N/A')} + {hotel.get('name', 'N/A')} (score {option.get('score')})"):
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown(f"**Arrival:** {flight.get('arrival', {}).get('time', 'N/A')}")
+                st.markdown(f"**Duration:** {flight.get('duration', 'N/A')}")
+                st.markdown(f"**Hotel Rating:** {hotel.get('rating', 'N/A')}")
+            with col2:
+                st.markdown(f"**Estimated Cost:** ${breakdown.get('total_cost', 'N/A')}")
+                st.markdown(f"**Hours Before Check-in:** {breakdown.get('checkin_slack_hours', 'N/A')}")
+                st.markdown(f"**Price Range:** {hotel.get('price_range', 'N/A')}")
+    st.markdown("---")
+
+# --- Response Page ---
+def show_response_page():
+    st.title("✨ Your Travel Plan")
+    
+    if st.session_state.api_response is None:
+        st.warning("No travel plan data available.")
+        st.button("Back to Main", on_click=lambda: st.session_state.update({"current_page": "main"}))
+        return
+    
+    response = st.session_state.api_response
+    
+    render_flight_info(response.get('flight', {}))
+    render_hotel_info(response.get('hotel', {}))
+    render_cab_info(response.get('cab', {}))
+    render_alternatives(response.get('alternatives', []))
+    render_user_info(response.get('user', {}))
     
     if st.button("Back to Main"):
         st.session_state.current_page = "main"